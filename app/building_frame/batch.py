@@ -0,0 +1,245 @@
+"""Batch solves of frame designs outside the VIKTOR UI, e.g. for nightly regression runs.
+
+Every input is a json or yaml file with the params of one design, in the structure of SkyCivParametrization. Params that
+are left out get their default::
+
+    {
+        "step_design": {"frame": {"office": {"num_floors": 5}, "columns": {"dist_length": 5}}},
+        "step_call": {"engine": "local", "floor_load": true}
+    }
+
+Every design is built, loaded and solved like the views do (solve_job), in a pool of worker threads, and gets a
+directory of its own in the output directory, named after the input file:
+
+- params.json: the complete params of the design
+- results.json: the results in the s3d format
+- summary.json: the size, steel mass and governing values of the design and the url of the SkyCiv analysis report,
+  report_url, which is not downloaded
+
+The summary of every design is also written to summary.csv in the output directory. summary.json is written last and
+holds the hash of the params, so a batch that was stopped can be started again and skips the designs that are already
+solved with the same params. Run it with ``python -m app.building_frame designs/ --output runs --workers 4``.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+
+from munch import munchify
+
+from .controller import get_engine
+from .controller import solve_job
+from .jobs import STAGES
+from .model import BuildingFrame
+from .result_store import get_result_store
+from .serialization import canonical_hash
+from .summary import geometry_mass
+from .summary import summarise_results
+from .sweep import DEFAULT_PARAMS
+from .sweep import SUMMARY_COLUMNS
+from .sweep import SummaryWriter
+from .sweep import merge_params
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+INPUT_SUFFIXES = (".json", ".yaml", ".yml")
+DEFAULT_WORKERS = 2
+SUMMARY_FILE = "summary.csv"
+COLUMNS = ["name", "input", "status", "engine", "nodes", "members", "mass", *SUMMARY_COLUMNS, "report_url", "error"]
+
+Progress = Callable[[str], None]  # Called with a line of progress output
+
+
+def find_inputs(paths: Iterable[Union[str, Path]]) -> List[Path]:
+    """Get the input files of the paths, a directory gives its json and yaml files in alphabetical order."""
+    inputs = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            inputs += sorted(p for p in path.iterdir() if p.suffix.lower() in INPUT_SUFFIXES)
+        elif path.is_file():
+            inputs.append(path)
+        else:
+            raise FileNotFoundError(f"No input file or directory {path}")
+    names = [path.stem for path in inputs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Inputs with the same name would write to the same directory: {', '.join(duplicates)}")
+    return inputs
+
+
+def _check_params(params: dict, defaults: dict, path: str = "") -> None:
+    """Raise a ValueError for params that are not in the parametrization, so a typo is not silently left out."""
+    for key, value in params.items():
+        name = f"{path}.{key}" if path else key
+        if key not in defaults:
+            raise ValueError(f"Unknown param {name}")
+        if isinstance(defaults[key], dict):
+            if not isinstance(value, dict):
+                raise ValueError(f"The param {name} should be a section with params")
+            _check_params(value, defaults[key], name)
+
+
+def load_params(path: Union[str, Path]) -> dict:
+    """Get the complete params of a json or yaml input file, the params that are left out get their default."""
+    path = Path(path)
+    with open(path, encoding="utf-8") as f:
+        if path.suffix.lower() in (".yaml", ".yml"):
+            if yaml is None:
+                raise ImportError("Reading yaml files needs pyyaml, install it or write the params as json")
+            params = yaml.safe_load(f) or {}
+        else:
+            params = json.load(f)
+    if not isinstance(params, dict):
+        raise ValueError(f"The params in {path} should be a mapping")
+    try:
+        _check_params(params, DEFAULT_PARAMS)
+    except ValueError as error:
+        raise ValueError(f"{error} in {path}") from None
+    return merge_params(DEFAULT_PARAMS, params)
+
+
+def _write(path: Path, text: str) -> None:
+    """Write a file atomically, so a run that is stopped does not leave half a file behind."""
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_text(text, encoding="utf-8")
+    os.replace(temporary, path)
+
+
+def _read_summary(directory: Path) -> Optional[dict]:
+    try:
+        with open(directory / "summary.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def solve_design(params: dict, directory: Union[str, Path], report: Callable[[str], None] = None) -> dict:
+    """Build, load and solve the model of the params, and write the params, results and summary to the directory.
+    Returns the summary.
+
+    :param params: The complete params of the design
+    :param directory: The output directory of the design
+    :param report: Called with the name of every stage of the solve that starts, and a detail like where the snow load
+        is from
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    params_json = json.dumps(params, indent=2, sort_keys=True)
+    _write(directory / "params.json", params_json)
+
+    key = solve_job(munchify(params), report or (lambda stage, detail="": None))
+    evaluation = get_result_store().get(key)
+    if evaluation is None:
+        raise RuntimeError(f"The solve {key} is not in the result store, it could be too small for the results")
+    _write(directory / "results.json", evaluation["results"])
+
+    geometry = BuildingFrame(munchify(params)).geometry  # Cached in the geometry stage by the solve
+    summary = {
+        "params_hash": canonical_hash(params),
+        "engine": get_engine(munchify(params)),
+        "nodes": len(geometry.nodes),
+        "members": len(geometry.members),
+        "mass": geometry_mass(geometry),
+        **summarise_results(json.loads(evaluation["results"])),
+        "report_url": evaluation["url"],
+    }
+    _write(directory / "summary.json", json.dumps(summary, indent=2))
+    return summary
+
+
+def run_batch(
+    inputs: Iterable[Union[str, Path]],
+    output: Union[str, Path],
+    workers: int = None,
+    engine: str = None,
+    force: bool = False,
+    progress: Progress = print,
+) -> List[dict]:
+    """Solve the designs of the input files and write their outputs to the output directory, see the module docstring.
+    Designs that are already solved with the same params are skipped, unless force is set. Returns the summary row of
+    every design, a design that failed has its error in the row.
+
+    :param inputs: Json or yaml files with params, or directories with these files
+    :param output: The output directory
+    :param workers: The number of designs that are solved at the same time
+    :param engine: The analysis engine of all designs, instead of the engine in their params
+    :param force: Solve the designs that are already solved as well
+    :param progress: Called with every line of progress output
+    """
+    paths = find_inputs(inputs)
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    total = len(paths)
+    lock = threading.Lock()
+    finished = 0
+
+    def log(index: int, name: str, message: str) -> None:
+        with lock:
+            progress(f"[{index + 1}/{total}] {name}: {message}")
+
+    def run(index: int, path: Path) -> dict:
+        nonlocal finished
+        name = path.stem
+        row = {"name": name, "input": str(path)}
+
+        def report(stage: str, detail: str = "") -> None:
+            log(index, name, f"{STAGES[stage]} ({detail})" if detail else STAGES[stage])
+
+        try:
+            params = load_params(path)
+            if engine:
+                params["step_call"]["engine"] = engine
+            row["engine"] = get_engine(munchify(params))
+            directory = output / name
+            summary = _read_summary(directory)
+            if not force and summary is not None and summary.get("params_hash") == canonical_hash(params):
+                row.update(status="skipped", **summary)
+            else:
+                summary = solve_design(params, directory, report)
+                row.update(status="solved", **summary)
+        except Exception as error:
+            row.update(status="failed", error=f"{type(error).__name__}: {error}")
+        with lock:
+            finished += 1
+        log(index, name, f"{row['status']} ({finished} of {total} finished)")
+        return row
+
+    with ThreadPoolExecutor(workers or DEFAULT_WORKERS) as executor:
+        rows = list(executor.map(run, range(total), paths))
+    with SummaryWriter(output / SUMMARY_FILE, COLUMNS) as writer:
+        for row in rows:
+            writer.write({column: row.get(column) for column in COLUMNS})
+    return rows
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.building_frame", description="Solve frame designs from params files, outside the VIKTOR UI."
+    )
+    parser.add_argument("inputs", nargs="+", type=Path, help="json or yaml files with params, or directories with them")
+    parser.add_argument("--output", "-o", type=Path, default=Path("runs"), help="output directory")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="number of designs solved at the same time")
+    parser.add_argument("--engine", choices=["skyciv", "local"], help="analysis engine of all designs")
+    parser.add_argument("--force", action="store_true", help="solve the designs that are already solved as well")
+    args = parser.parse_args(argv)
+
+    rows = run_batch(args.inputs, args.output, args.workers, args.engine, args.force)
+    counts = {status: sum(1 for row in rows if row["status"] == status) for status in ("solved", "skipped", "failed")}
+    print(f"Solved {counts['solved']}, skipped {counts['skipped']} and failed {counts['failed']} designs")
+    for row in rows:
+        if row.get("error"):
+            print(f"{row['name']}: {row['error']}", file=sys.stderr)
+    print(f"The summary is written to {args.output / SUMMARY_FILE}")
+    return 1 if counts["failed"] else 0
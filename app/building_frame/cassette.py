@@ -0,0 +1,140 @@
+"""Record and replay of the http traffic of the app, so it can run without network and without SkyCiv credentials.
+
+In record mode every call of the transport is sent as usual, and the request and its response are written to a cassette:
+a directory with a json file per request. In replay mode nothing is sent, every call is answered from the cassette,
+optionally after a latency, and a call that is not in the cassette raises an error. Record the views once with a live
+API, then the view pipeline can be profiled and load tested offline with exactly the same responses every time.
+
+The requests are looked up by their request key, like in the result store: an API object is keyed on its options and
+functions, without the credentials and the session. So a model that is recorded in one session is found in another one,
+with other credentials or at another API url. A solve passes the key it already has, so the json of its model is not
+parsed again; other API objects are parsed for their key, gzipped ones are unpacked first. Only the method, url and size
+of a request are written next to its response, not the request itself.
+
+The mode is set with the environment variable SKYCIV_CASSETTE (record or replay), the directory with
+SKYCIV_CASSETTE_DIRECTORY and the latency of replayed calls with SKYCIV_CASSETTE_LATENCY: seconds, or "recorded" for the
+time every call took when it was recorded.
+"""
+import base64
+import gzip
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+from typing import Union
+
+import requests
+
+from viktor import UserException
+
+from .result_store import request_key
+from .serialization import canonical_hash
+from .tracing import set_attribute
+from .transport import Transport
+
+MODES = ("record", "replay")
+DEFAULT_DIRECTORY = "cassettes"
+RECORDED_LATENCY = "recorded"
+
+
+def cassette_mode() -> Optional[str]:
+    """Get the cassette mode set with the environment variable SKYCIV_CASSETTE, None if the traffic is not recorded."""
+    mode = os.environ.get("SKYCIV_CASSETTE", "").lower() or None
+    if mode is not None and mode not in MODES:
+        raise UserException(f"Unknown cassette mode {mode}, choose from {', '.join(MODES)}")
+    return mode
+
+
+def cassette_key(method: str, url: str, data: bytes = None, headers: dict = None) -> str:
+    """Get the key of a request in the cassette. A request to the API is keyed on its API object without credentials and
+    session, see result_store.request_key, other requests on their method and url.
+    """
+    if not data:
+        return canonical_hash({"method": method, "url": url})
+    if (headers or {}).get("Content-Encoding") == "gzip":
+        data = gzip.decompress(data)
+    return request_key(json.loads(data))
+
+
+class CassetteTransport(Transport):
+    """A transport that records its calls to a cassette, or replays them from it. Only successful responses are
+    recorded, the errors of the API itself are successful responses with an error status, so they are replayed as well.
+    A streamed response is read at once while recording, so recording a large model takes the memory of its response.
+
+    :param directory: The directory of the cassette, defaults to SKYCIV_CASSETTE_DIRECTORY
+    :param mode: record or replay, defaults to SKYCIV_CASSETTE
+    :param latency: The seconds a replayed call waits, or "recorded" for the time it took, defaults to
+        SKYCIV_CASSETTE_LATENCY or no latency
+    """
+
+    def __init__(self, directory: Union[str, Path] = None, mode: str = None, latency: Union[float, str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = Path(directory or os.environ.get("SKYCIV_CASSETTE_DIRECTORY", DEFAULT_DIRECTORY))
+        self.mode = mode or cassette_mode() or "replay"
+        if self.mode not in MODES:
+            raise UserException(f"Unknown cassette mode {self.mode}, choose from {', '.join(MODES)}")
+        if latency is None:
+            latency = os.environ.get("SKYCIV_CASSETTE_LATENCY", 0)
+        self.latency = latency if latency == RECORDED_LATENCY else float(latency)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def send(self, method: str, url: str, key: str = None, **kwargs) -> requests.Response:
+        if key is None:
+            key = cassette_key(method, url, kwargs.get("data"), kwargs.get("headers"))
+        set_attribute("cassette", self.mode)
+        set_attribute("cassette.key", key)
+        if self.mode == "replay":
+            return self.replay(key, method, url)
+        start = time.perf_counter()
+        response = super().send(method, url, **kwargs)
+        content = response.content  # Reads a streamed response, iter_content then iterates over the read content
+        request = {"method": method, "url": url, "bytes": len(kwargs.get("data") or b"")}
+        self.record(key, request, response, content, time.perf_counter() - start)
+        return response
+
+    def record(self, key: str, request: dict, response: requests.Response, content: bytes, seconds: float) -> None:
+        """Write the summary of a request and its response to the cassette. The body is kept as text, or as base64 if it
+        is binary.
+        """
+        entry = {"request": request, "status": response.status_code, "seconds": seconds}
+        entry["content_type"] = response.headers.get("Content-Type")
+        try:
+            entry["body"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_base64"] = base64.b64encode(content).decode("ascii")
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, separators=(",", ":"))
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def replay(self, key: str, method: str, url: str) -> requests.Response:
+        """Get the recorded response of a request from the cassette, after the latency."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            raise UserException(
+                f"{method} {url} is not in the cassette {self.directory}, record it first with SKYCIV_CASSETTE=record"
+            ) from None
+        time.sleep(entry["seconds"] if self.latency == RECORDED_LATENCY else self.latency)
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.url = url
+        if entry.get("content_type"):
+            response.headers["Content-Type"] = entry["content_type"]
+        if "body" in entry:
+            response._content = entry["body"].encode("utf-8")
+            response.encoding = "utf-8"
+        else:
+            response._content = base64.b64decode(entry["body_base64"])
+        response._content_consumed = True  # So iter_content of a streamed call iterates over the content
+        return response
@@ -0,0 +1,139 @@
+"""Load combinations of EN 1990 and their envelopes, solved with the local solver.
+
+The frame is linear, so the results of a combination are the sum of the results of its load cases times their factors.
+Every load case is solved once, with one factorisation of the stiffness matrix, and the results are kept as arrays. Any
+number of combinations is then a matrix product of the factors with these arrays, and the envelope is the maximum or
+minimum over the combinations of every result per member and station.
+
+The load cases are the actions of EN 1990: the permanent action (SW1), the imposed floor loads (AL1..ALn, which are
+one action for all floors together), the snow load (SNOW) and the wind load (WL1). The combinations are those of the
+ultimate limit state (6.10) and the characteristic combinations of the serviceability limit state (6.14b), with the
+recommended factors for buildings of table A1.1 and A1.2(B), and the imposed loads of category B (offices). A variable
+action is either in a combination or left out, as it could be favourable.
+"""
+import itertools
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+from munch import Munch
+
+from viktor.core import UserException
+
+from .solver import LocalSolver
+from .stages import StageCache
+from .tracing import set_attribute
+
+PERMANENT = "permanent"
+ACTIONS = {"SW": PERMANENT, "AL": "imposed", "SNOW": "snow", "WL": "wind"}  # The action of a load group by its prefix
+PSI_0 = {"imposed": 0.7, "snow": 0.5, "wind": 0.6}  # The combination factors of the variable actions
+GAMMA_G = (1.35, 1.0)  # The partial factors of the permanent action in the ultimate limit state, unfavourable first
+GAMMA_Q = 1.5  # The partial factor of the variable actions in the ultimate limit state
+LIMIT_STATES = ("uls", "sls")
+DEFAULT_RESULT_SET = "loads"  # All load groups together, without factors
+RESULT_SETS = {f"{state}_{extreme}": (state, extreme) for state in LIMIT_STATES for extreme in ("max", "min")}
+
+# The solved load cases of the last models, so another envelope of the same model is not solved again. They are the
+# size of a few solves of the model, so only a few are kept.
+LOAD_CASES = StageCache(max_entries=2, name="load_cases")
+
+Combination = Dict[str, float]  # The factor of every action in the combination
+
+
+def get_result_set(params: Munch) -> str:
+    """Get the result set that is shown in the Results view: all loads, or an envelope of the combinations."""
+    return params.step_call.get("result_set") or DEFAULT_RESULT_SET
+
+
+def get_action(load_group: str) -> str:
+    """Get the action of a load group."""
+    for prefix, action in ACTIONS.items():
+        if load_group.startswith(prefix):
+            return action
+    raise UserException(f"The load group {load_group} has no action to combine it with")
+
+
+def get_load_cases(load_groups: Sequence[str]) -> Dict[str, List[str]]:
+    """Get the load groups of every action, the actions in the order of their first load group."""
+    load_cases = {}
+    for load_group in load_groups:
+        load_cases.setdefault(get_action(load_group), []).append(load_group)
+    return load_cases
+
+
+def en1990_combinations(actions: Sequence[str], limit_state: str) -> List[Combination]:
+    """Get the combinations of the actions for a limit state: the permanent action with every variable action as the
+    leading action, and every selection of the others as accompanying actions.
+    """
+    if limit_state not in LIMIT_STATES:
+        raise UserException(f"Unknown limit state {limit_state}, choose from {', '.join(LIMIT_STATES)}")
+    uls = limit_state == "uls"
+    variable = [action for action in actions if action != PERMANENT]
+    gamma_q = GAMMA_Q if uls else 1.0
+    combinations = {}
+    for gamma_g in GAMMA_G if uls else (1.0,):
+        for leading in [None] + variable:
+            others = [action for action in variable if action != leading] if leading else []
+            for n in range(len(others) + 1):
+                for accompanying in itertools.combinations(others, n):
+                    combination = {PERMANENT: gamma_g} if PERMANENT in actions else {}
+                    if leading:
+                        combination[leading] = gamma_q
+                    combination.update({action: gamma_q * PSI_0[action] for action in accompanying})
+                    combinations[tuple(sorted(combination.items()))] = combination
+    return [combination for combination in combinations.values() if combination]
+
+
+def combination_factors(combinations: List[Combination], load_cases: Sequence[str]) -> np.ndarray:
+    """Get the factors of the combinations as a matrix (combinations, load cases)."""
+    return np.array([[combination.get(action, 0.0) for action in load_cases] for combination in combinations])
+
+
+def combine(arrays: Dict[str, np.ndarray], factors: np.ndarray) -> Dict[str, np.ndarray]:
+    """Get the result arrays of a combination from the result arrays of the load cases, stacked along the first axis,
+    and the factor of every load case.
+    """
+    return {key: np.tensordot(factors, values, axes=1) for key, values in arrays.items()}
+
+
+def envelope(arrays: Dict[str, np.ndarray], factors: np.ndarray, extreme: str) -> Dict[str, np.ndarray]:
+    """Get the envelope of the combinations: the maximum or minimum of every result over all combinations. The member
+    displacements are the length of the displacements of every combination. The combinations are reduced one at a
+    time, so only the arrays of one combination are in memory next to the load cases.
+    """
+    reduce = {"max": np.maximum, "min": np.minimum}[extreme]
+    result = None
+    for row in factors:
+        combination = combine(arrays, row)
+        combination["member_displacements"] = np.linalg.norm(combination.pop("displacements"), axis=-1)
+        result = combination if result is None else {k: reduce(result[k], v) for k, v in combination.items()}
+    return result
+
+
+def _solve_load_cases(model: dict) -> Tuple[LocalSolver, List[str], Dict[str, np.ndarray]]:
+    solver = LocalSolver(model)
+    load_cases = get_load_cases(solver.load_groups())
+    return solver, list(load_cases), solver.solve_load_cases(load_cases)
+
+
+def solve_envelope(model: dict, result_set: str, key: str = None) -> dict:
+    """Solve the envelope of the combinations of a model with the local solver, returns the results in the s3d format.
+
+    :param model: The model dictionary made by skyciv.Model.get()
+    :param result_set: The limit state and extreme of the envelope, like uls_max
+    :param key: The key of the loads of the model, to reuse its solved load cases for another envelope
+    """
+    if result_set not in RESULT_SETS:
+        raise UserException(f"Unknown result set {result_set}, choose from {', '.join(RESULT_SETS)}")
+    limit_state, extreme = RESULT_SETS[result_set]
+    if key is None:
+        solver, load_cases, arrays = _solve_load_cases(model)
+    else:
+        solver, load_cases, arrays = LOAD_CASES.get_or_create(key, lambda: _solve_load_cases(model))
+    if not load_cases:
+        raise UserException("The model has no loads to combine, select at least one load")
+    combinations = en1990_combinations(load_cases, limit_state)
+    set_attribute("combinations", len(combinations))
+    return solver.format_results(envelope(arrays, combination_factors(combinations, load_cases), extreme))
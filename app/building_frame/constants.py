@@ -1,590 +1,14 @@
 from viktor.parametrization import OptionListElement
 
-PROFILE_OPTIONS = [
-    OptionListElement(label="SHS 40x40x3.2", value="SHS40x40x3.2"),
-    OptionListElement(label="SHS 40x40x4", value="SHS40x40x4"),
-    OptionListElement(label="SHS 40x40x5", value="SHS40x40x5"),
-    OptionListElement(label="SHS 50x50x3.2", value="SHS50x50x3.2"),
-    OptionListElement(label="SHS 50x50x4", value="SHS50x50x4"),
-    OptionListElement(label="SHS 50x50x5", value="SHS50x50x5"),
-    OptionListElement(label="SHS 50x50x6.3", value="SHS50x50x6.3"),
-    OptionListElement(label="SHS 60x60x4", value="SHS60x60x4"),
-    OptionListElement(label="SHS 60x60x5", value="SHS60x60x5"),
-    OptionListElement(label="SHS 60x60x6.3", value="SHS60x60x6.3"),
-    OptionListElement(label="SHS 60x60x8", value="SHS60x60x8"),
-    OptionListElement(label="SHS 70x70x3.6", value="SHS70x70x3.6"),
-    OptionListElement(label="SHS 70x70x5", value="SHS70x70x5"),
-    OptionListElement(label="SHS 70x70x6.3", value="SHS70x70x6.3"),
-    OptionListElement(label="SHS 70x70x8", value="SHS70x70x8"),
-    OptionListElement(label="SHS 80x80x5", value="SHS80x80x5"),
-    OptionListElement(label="SHS 80x80x6.3", value="SHS80x80x6.3"),
-    OptionListElement(label="SHS 80x80x8", value="SHS80x80x8"),
-    OptionListElement(label="SHS 90x90x3.6", value="SHS90x90x3.6"),
-    OptionListElement(label="SHS 90x90x5", value="SHS90x90x5"),
-    OptionListElement(label="SHS 90x90x6.3", value="SHS90x90x6.3"),
-    OptionListElement(label="SHS 90x90x8", value="SHS90x90x8"),
-    OptionListElement(label="SHS 100x100x4", value="SHS100x100x4"),
-    OptionListElement(label="SHS 100x100x5", value="SHS100x100x5"),
-    OptionListElement(label="SHS 100x100x6.3", value="SHS100x100x6.3"),
-    OptionListElement(label="SHS 100x100x8", value="SHS100x100x8"),
-    OptionListElement(label="SHS 100x100x10", value="SHS100x100x10"),
-    OptionListElement(label="SHS 120x120x5", value="SHS120x120x5"),
-    OptionListElement(label="SHS 120x120x6.3", value="SHS120x120x6.3"),
-    OptionListElement(label="SHS 120x120x8", value="SHS120x120x8"),
-    OptionListElement(label="SHS 120x120x10", value="SHS120x120x10"),
-    OptionListElement(label="SHS 120x120x12.5", value="SHS120x120x12.5"),
-    OptionListElement(label="SHS 140x140x5", value="SHS140x140x5"),
-    OptionListElement(label="SHS 140x140x6.3", value="SHS140x140x6.3"),
-    OptionListElement(label="SHS 140x140x8", value="SHS140x140x8"),
-    OptionListElement(label="SHS 140x140x10", value="SHS140x140x10"),
-    OptionListElement(label="SHS 140x140x12.5", value="SHS140x140x12.5"),
-    OptionListElement(label="SHS 150x150x5", value="SHS150x150x5"),
-    OptionListElement(label="SHS 150x150x6.3", value="SHS150x150x6.3"),
-    OptionListElement(label="SHS 150x150x8", value="SHS150x150x8"),
-    OptionListElement(label="SHS 150x150x10", value="SHS150x150x10"),
-    OptionListElement(label="SHS 150x150x12.5", value="SHS150x150x12.5"),
-    OptionListElement(label="SHS 160x160x5", value="SHS160x160x5"),
-    OptionListElement(label="SHS 160x160x6.3", value="SHS160x160x6.3"),
-    OptionListElement(label="SHS 160x160x8", value="SHS160x160x8"),
-    OptionListElement(label="SHS 160x160x10", value="SHS160x160x10"),
-    OptionListElement(label="SHS 180x180x6.3", value="SHS180x180x6.3"),
-    OptionListElement(label="SHS 180x180x8", value="SHS180x180x8"),
-    OptionListElement(label="SHS 180x180x10", value="SHS180x180x10"),
-    OptionListElement(label="SHS 180x180x12.5", value="SHS180x180x12.5"),
-    OptionListElement(label="SHS 180x180x16", value="SHS180x180x16"),
-    OptionListElement(label="SHS 200x200x5", value="SHS200x200x5"),
-    OptionListElement(label="SHS 200x200x6.3", value="SHS200x200x6.3"),
-    OptionListElement(label="SHS 200x200x8", value="SHS200x200x8"),
-    OptionListElement(label="SHS 200x200x10", value="SHS200x200x10"),
-    OptionListElement(label="SHS 200x200x12.5", value="SHS200x200x12.5"),
-    OptionListElement(label="SHS 200x200x16", value="SHS200x200x16"),
-    OptionListElement(label="SHS 250x250x6.3", value="SHS250x250x6.3"),
-    OptionListElement(label="SHS 250x250x8", value="SHS250x250x8"),
-    OptionListElement(label="SHS 250x250x10", value="SHS250x250x10"),
-    OptionListElement(label="SHS 250x250x12.5", value="SHS250x250x12.5"),
-    OptionListElement(label="SHS 250x250x16", value="SHS250x250x16"),
-    OptionListElement(label="SHS 300x300x8", value="SHS300x300x8"),
-    OptionListElement(label="SHS 300x300x10", value="SHS300x300x10"),
-    OptionListElement(label="SHS 300x300x12.5", value="SHS300x300x12.5"),
-    OptionListElement(label="SHS 300x300x16", value="SHS300x300x16"),
-    OptionListElement(label="SHS 350x350x10", value="SHS350x350x10"),
-    OptionListElement(label="SHS 350x350x12.5", value="SHS350x350x12.5"),
-    OptionListElement(label="SHS 350x350x16", value="SHS350x350x16"),
-    OptionListElement(label="SHS 400x400x10", value="SHS400x400x10"),
-    OptionListElement(label="SHS 400x400x12.5", value="SHS400x400x12.5"),
-    OptionListElement(label="SHS 400x400x16", value="SHS400x400x16"),
+ENGINE_OPTIONS = [
+    OptionListElement(label="SkyCiv", value="skyciv"),
+    OptionListElement(label="Local (offline)", value="local"),
 ]
 
-PROFILE_PROPERTIES = {
-    "SHS40x40x3.2": {
-        "width": 0.04,
-        "mass": 3.61,
-        "area": 0.00046,
-        "inertia": 0.000000102,
-        "section modulus": 0.00000511,
-    },
-    "SHS40x40x4": {
-        "width": 0.04,
-        "mass": 4.39,
-        "area": 0.000559,
-        "inertia": 0.000000118,
-        "section modulus": 0.00000591,
-    },
-    "SHS40x40x5": {
-        "width": 0.04,
-        "mass": 5.28,
-        "area": 0.000673,
-        "inertia": 0.000000134,
-        "section modulus": 0.00000668,
-    },
-    "SHS50x50x3.2": {
-        "width": 0.05,
-        "mass": 4.62,
-        "area": 0.000588,
-        "inertia": 0.000000212,
-        "section modulus": 0.00000849,
-    },
-    "SHS50x50x4": {
-        "width": 0.05,
-        "mass": 5.64,
-        "area": 0.000719,
-        "inertia": 0.00000025,
-        "section modulus": 0.00000999,
-    },
-    "SHS50x50x5": {
-        "width": 0.05,
-        "mass": 6.85,
-        "area": 0.000873,
-        "inertia": 0.000000289,
-        "section modulus": 0.0000116,
-    },
-    "SHS50x50x6.3": {
-        "width": 0.05,
-        "mass": 8.31,
-        "area": 0.00106,
-        "inertia": 0.000000328,
-        "section modulus": 0.0000131,
-    },
-    "SHS60x60x4": {
-        "width": 0.06,
-        "mass": 6.9,
-        "area": 0.000879,
-        "inertia": 0.000000454,
-        "section modulus": 0.0000151,
-    },
-    "SHS60x60x5": {
-        "width": 0.06,
-        "mass": 8.42,
-        "area": 0.00107,
-        "inertia": 0.000000533,
-        "section modulus": 0.0000178,
-    },
-    "SHS60x60x6.3": {
-        "width": 0.06,
-        "mass": 10.3,
-        "area": 0.00131,
-        "inertia": 0.000000616,
-        "section modulus": 0.0000205,
-    },
-    "SHS60x60x8": {
-        "width": 0.06,
-        "mass": 12.5,
-        "area": 0.0016,
-        "inertia": 0.000000697,
-        "section modulus": 0.0000232,
-    },
-    "SHS70x70x3.6": {
-        "width": 0.07,
-        "mass": 7.4,
-        "area": 0.000942,
-        "inertia": 0.000000686,
-        "section modulus": 0.0000196,
-    },
-    "SHS70x70x5": {
-        "width": 0.07,
-        "mass": 9.99,
-        "area": 0.00127,
-        "inertia": 0.000000885,
-        "section modulus": 0.0000253,
-    },
-    "SHS70x70x6.3": {
-        "width": 0.07,
-        "mass": 12.3,
-        "area": 0.00156,
-        "inertia": 0.00000104,
-        "section modulus": 0.0000297,
-    },
-    "SHS70x70x8": {
-        "width": 0.07,
-        "mass": 15,
-        "area": 0.00192,
-        "inertia": 0.0000012,
-        "section modulus": 0.0000342,
-    },
-    "SHS80x80x3.6": {
-        "width": 0.08,
-        "mass": 8.53,
-        "area": 0.00109,
-        "inertia": 0.00000105,
-        "section modulus": 0.0000262,
-    },
-    "SHS80x80x5": {
-        "width": 0.08,
-        "mass": 11.6,
-        "area": 0.00147,
-        "inertia": 0.00000137,
-        "section modulus": 0.0000342,
-    },
-    "SHS80x80x6.3": {
-        "width": 0.08,
-        "mass": 14.2,
-        "area": 0.00181,
-        "inertia": 0.00000162,
-        "section modulus": 0.0000405,
-    },
-    "SHS80x80x8": {
-        "width": 0.08,
-        "mass": 17.5,
-        "area": 0.00224,
-        "inertia": 0.00000189,
-        "section modulus": 0.0000473,
-    },
-    "SHS90x90x3.6": {
-        "width": 0.09,
-        "mass": 9.66,
-        "area": 0.00123,
-        "inertia": 0.00000152,
-        "section modulus": 0.0000338,
-    },
-    "SHS90x90x5": {
-        "width": 0.09,
-        "mass": 13.1,
-        "area": 0.00167,
-        "inertia": 0.000002,
-        "section modulus": 0.0000444,
-    },
-    "SHS90x90x6.3": {
-        "width": 0.09,
-        "mass": 16.2,
-        "area": 0.00207,
-        "inertia": 0.00000238,
-        "section modulus": 0.000053,
-    },
-    "SHS90x90x8": {
-        "width": 0.09,
-        "mass": 20.1,
-        "area": 0.00256,
-        "inertia": 0.00000281,
-        "section modulus": 0.0000626,
-    },
-    "SHS100x100x4": {
-        "width": 0.1,
-        "mass": 11.9,
-        "area": 0.00152,
-        "inertia": 0.00000232,
-        "section modulus": 0.0000464,
-    },
-    "SHS100x100x5": {
-        "width": 0.1,
-        "mass": 14.7,
-        "area": 0.00187,
-        "inertia": 0.00000279,
-        "section modulus": 0.0000559,
-    },
-    "SHS100x100x6.3": {
-        "width": 0.1,
-        "mass": 18.2,
-        "area": 0.00232,
-        "inertia": 0.00000336,
-        "section modulus": 0.0000671,
-    },
-    "SHS100x100x8": {
-        "width": 0.1,
-        "mass": 22.6,
-        "area": 0.00288,
-        "inertia": 0.000004,
-        "section modulus": 0.0000799,
-    },
-    "SHS100x100x10": {
-        "width": 0.1,
-        "mass": 27.4,
-        "area": 0.00349,
-        "inertia": 0.00000462,
-        "section modulus": 0.0000924,
-    },
-    "SHS120x120x5": {
-        "width": 0.12,
-        "mass": 17.8,
-        "area": 0.00227,
-        "inertia": 0.00000498,
-        "section modulus": 0.000083,
-    },
-    "SHS120x120x6.3": {
-        "width": 0.12,
-        "mass": 22.2,
-        "area": 0.00282,
-        "inertia": 0.00000603,
-        "section modulus": 0.0001,
-    },
-    "SHS120x120x8": {
-        "width": 0.12,
-        "mass": 27.6,
-        "area": 0.00352,
-        "inertia": 0.00000726,
-        "section modulus": 0.000121,
-    },
-    "SHS120x120x10": {
-        "width": 0.12,
-        "mass": 33.7,
-        "area": 0.00429,
-        "inertia": 0.00000852,
-        "section modulus": 0.000142,
-    },
-    "SHS120x120x12.5": {
-        "width": 0.12,
-        "mass": 40.9,
-        "area": 0.00521,
-        "inertia": 0.00000982,
-        "section modulus": 0.000164,
-    },
-    "SHS140x140x5": {
-        "width": 0.14,
-        "mass": 21,
-        "area": 0.00267,
-        "inertia": 0.00000807,
-        "section modulus": 0.000115,
-    },
-    "SHS140x140x6.3": {
-        "width": 0.14,
-        "mass": 26.1,
-        "area": 0.00333,
-        "inertia": 0.00000984,
-        "section modulus": 0.000141,
-    },
-    "SHS140x140x8": {
-        "width": 0.14,
-        "mass": 32.6,
-        "area": 0.00416,
-        "inertia": 0.000012,
-        "section modulus": 0.000171,
-    },
-    "SHS140x140x10": {
-        "width": 0.14,
-        "mass": 40,
-        "area": 0.00509,
-        "inertia": 0.0000142,
-        "section modulus": 0.000202,
-    },
-    "SHS140x140x12.5": {
-        "width": 0.14,
-        "mass": 48.7,
-        "area": 0.00621,
-        "inertia": 0.0000165,
-        "section modulus": 0.000236,
-    },
-    "SHS150x150x5": {
-        "width": 0.15,
-        "mass": 22.6,
-        "area": 0.00287,
-        "inertia": 0.00001,
-        "section modulus": 0.000134,
-    },
-    "SHS150x150x6.3": {
-        "width": 0.15,
-        "mass": 28.1,
-        "area": 0.00358,
-        "inertia": 0.0000122,
-        "section modulus": 0.000163,
-    },
-    "SHS150x150x8": {
-        "width": 0.15,
-        "mass": 35.1,
-        "area": 0.00448,
-        "inertia": 0.0000149,
-        "section modulus": 0.000199,
-    },
-    "SHS150x150x10": {
-        "width": 0.15,
-        "mass": 43.1,
-        "area": 0.00549,
-        "inertia": 0.0000177,
-        "section modulus": 0.000236,
-    },
-    "SHS150x150x12.5": {
-        "width": 0.15,
-        "mass": 52.7,
-        "area": 0.00671,
-        "inertia": 0.0000208,
-        "section modulus": 0.000277,
-    },
-    "SHS160x160x5": {
-        "width": 0.16,
-        "mass": 24.1,
-        "area": 0.00307,
-        "inertia": 0.0000122,
-        "section modulus": 0.000153,
-    },
-    "SHS160x160x6.3": {
-        "width": 0.16,
-        "mass": 30.1,
-        "area": 0.00383,
-        "inertia": 0.000015,
-        "section modulus": 0.000187,
-    },
-    "SHS160x160x8": {
-        "width": 0.16,
-        "mass": 37.6,
-        "area": 0.0048,
-        "inertia": 0.0000183,
-        "section modulus": 0.000229,
-    },
-    "SHS160x160x10": {
-        "width": 0.16,
-        "mass": 46.3,
-        "area": 0.00589,
-        "inertia": 0.0000219,
-        "section modulus": 0.000273,
-    },
-    "SHS180x180x6.3": {
-        "width": 0.18,
-        "mass": 34,
-        "area": 0.00433,
-        "inertia": 0.0000217,
-        "section modulus": 0.000241,
-    },
-    "SHS180x180x8": {
-        "width": 0.18,
-        "mass": 42.7,
-        "area": 0.00544,
-        "inertia": 0.0000266,
-        "section modulus": 0.000296,
-    },
-    "SHS180x180x10": {
-        "width": 0.18,
-        "mass": 52.5,
-        "area": 0.00669,
-        "inertia": 0.0000319,
-        "section modulus": 0.000355,
-    },
-    "SHS180x180x12.5": {
-        "width": 0.18,
-        "mass": 64.4,
-        "area": 0.00821,
-        "inertia": 0.0000379,
-        "section modulus": 0.000421,
-    },
-    "SHS180x180x16": {
-        "width": 0.18,
-        "mass": 80.2,
-        "area": 0.0102,
-        "inertia": 0.000045,
-        "section modulus": 0.0005,
-    },
-    "SHS200x200x5": {
-        "width": 0.2,
-        "mass": 30.4,
-        "area": 0.00387,
-        "inertia": 0.0000244,
-        "section modulus": 0.000245,
-    },
-    "SHS200x200x6.3": {
-        "width": 0.2,
-        "mass": 38,
-        "area": 0.00484,
-        "inertia": 0.0000301,
-        "section modulus": 0.000301,
-    },
-    "SHS200x200x8": {
-        "width": 0.2,
-        "mass": 47.7,
-        "area": 0.00608,
-        "inertia": 0.0000371,
-        "section modulus": 0.000371,
-    },
-    "SHS200x200x10": {
-        "width": 0.2,
-        "mass": 58.8,
-        "area": 0.00749,
-        "inertia": 0.0000447,
-        "section modulus": 0.000447,
-    },
-    "SHS200x200x12.5": {
-        "width": 0.2,
-        "mass": 72.3,
-        "area": 0.00921,
-        "inertia": 0.0000534,
-        "section modulus": 0.000534,
-    },
-    "SHS200x200x16": {
-        "width": 0.2,
-        "mass": 90.3,
-        "area": 0.0115,
-        "inertia": 0.0000639,
-        "section modulus": 0.000639,
-    },
-    "SHS250x250x6.3": {
-        "width": 0.25,
-        "mass": 47.9,
-        "area": 0.0061,
-        "inertia": 0.0000601,
-        "section modulus": 0.000481,
-    },
-    "SHS250x250x8": {
-        "width": 0.25,
-        "mass": 60.3,
-        "area": 0.00768,
-        "inertia": 0.0000746,
-        "section modulus": 0.000596,
-    },
-    "SHS250x250x10": {
-        "width": 0.25,
-        "mass": 74.5,
-        "area": 0.00949,
-        "inertia": 0.0000906,
-        "section modulus": 0.000724,
-    },
-    "SHS250x250x12.5": {
-        "width": 0.25,
-        "mass": 91.9,
-        "area": 0.0117,
-        "inertia": 0.000109,
-        "section modulus": 0.000873,
-    },
-    "SHS250x250x16": {
-        "width": 0.25,
-        "mass": 115,
-        "area": 0.0147,
-        "inertia": 0.000133,
-        "section modulus": 0.00106,
-    },
-    "SHS300x300x8": {
-        "width": 0.3,
-        "mass": 72.8,
-        "area": 0.00928,
-        "inertia": 0.000131,
-        "section modulus": 0.000875,
-    },
-    "SHS300x300x10": {
-        "width": 0.3,
-        "mass": 90.2,
-        "area": 0.0115,
-        "inertia": 0.00016,
-        "section modulus": 0.00107,
-    },
-    "SHS300x300x12.5": {
-        "width": 0.3,
-        "mass": 112,
-        "area": 0.0142,
-        "inertia": 0.000194,
-        "section modulus": 0.0013,
-    },
-    "SHS300x300x16": {
-        "width": 0.3,
-        "mass": 141,
-        "area": 0.0179,
-        "inertia": 0.000238,
-        "section modulus": 0.00159,
-    },
-    "SHS350x350x10": {
-        "width": 0.35,
-        "mass": 106,
-        "area": 0.0135,
-        "inertia": 0.000259,
-        "section modulus": 0.00148,
-    },
-    "SHS350x350x12.5": {
-        "width": 0.35,
-        "mass": 131,
-        "area": 0.0167,
-        "inertia": 0.000315,
-        "section modulus": 0.0018,
-    },
-    "SHS350x350x16": {
-        "width": 0.35,
-        "mass": 166,
-        "area": 0.0211,
-        "inertia": 0.000389,
-        "section modulus": 0.00222,
-    },
-    "SHS400x400x10": {
-        "width": 0.4,
-        "mass": 122,
-        "area": 0.0155,
-        "inertia": 0.000391,
-        "section modulus": 0.00196,
-    },
-    "SHS400x400x12.5": {
-        "width": 0.4,
-        "mass": 151,
-        "area": 0.0192,
-        "inertia": 0.000478,
-        "section modulus": 0.00239,
-    },
-    "SHS400x400x16": {
-        "width": 0.4,
-        "mass": 191,
-        "area": 0.0243,
-        "inertia": 0.000593,
-        "section modulus": 0.00297,
-    },
-}
+RESULT_SET_OPTIONS = [
+    OptionListElement(label="All loads", value="loads"),
+    OptionListElement(label="ULS envelope, maximum", value="uls_max"),
+    OptionListElement(label="ULS envelope, minimum", value="uls_min"),
+    OptionListElement(label="SLS envelope, maximum", value="sls_max"),
+    OptionListElement(label="SLS envelope, minimum", value="sls_min"),
+]
@@ -1,50 +1,267 @@
+import functools
 import json
+import os
+import time
+from concurrent.futures import Future
+from typing import Optional
+from typing import Tuple
+from typing import Union
 
 from munch import Munch
-from skyciv.lib.request import request
 
 from viktor import UserException
 from viktor.core import ViktorController
 from viktor.core import progress_message
 from viktor.result import DownloadResult
-from viktor.utils import memoize
 from viktor.views import MapResult
 from viktor.views import MapView
 from viktor.views import WebResult
 from viktor.views import WebView
 
+from .combinations import DEFAULT_RESULT_SET
+from .combinations import get_result_set
+from .combinations import solve_envelope
+from .jobs import JOBS
+from .jobs import Job
+from .jobs import Report
+from .jobs import get_pending_page
+from .large_model import is_large_model
+from .large_model import request_large
 from .map import Map
 from .model import BuildingFrame
+from .model import get_site_load_arguments
+from .page import JSON_SEPARATORS
 from .parametrization import SkyCivParametrization
-from .skyciv_functions import build_api_object
+from .result_store import ResultStore
+from .result_store import get_result_store
+from .result_store import request_key
+from .results_payload import get_result_keys
+from .serialization import canonical_hash
+from .sessions import SESSIONS
+from .single_flight import SingleFlight
+from .site_loads import prefetch_snow_load
+from .skyciv_functions import SkyCivRequest
+from .skyciv_functions import build_request
+from .solver import solve_model
+from .stages import REQUESTS
+from .tracing import record_cache
+from .tracing import span
+from .tracing import traced
+from .transport import get_transport
 
 
-@memoize
-def evaluate_skyciv(api_json: str) -> dict:
+SOLVES = SingleFlight()  # Concurrent views that send the same model wait for a single solve
+DEFAULT_JOB_WAIT = 2  # Seconds a view waits on its solve job before it shows the pending page
+
+
+@traced("skyciv.evaluate")
+def evaluate_skyciv(api_json: Union[str, SkyCivRequest]) -> dict:
     """Creates a SkyCiv API object and sends the functions to the API.
     Also implements our own UserException to the error send by SkyCiv.
-    The reason we use the json here and not the ao.request() method is because
-    now it is serialised and we can use memoize.
+    The evaluation is kept in the result store, keyed on the content of the request without the credentials. So every view
+    and every worker that sends the same model shares a single solve, also after a restart. Concurrent requests for the
+    same model in this process wait for the request that is already in flight.
+
+    :param json: The json made by ApiObject.to_json(), or a SkyCivRequest which runs in an open session if there is one
+    """
+    store = get_result_store()
+    key = api_json.key if isinstance(api_json, SkyCivRequest) else request_key(api_json)
+    return SOLVES.do(key, lambda: _solve(api_json, key), lookup=lambda: _lookup(store, key))
+
+
+def _lookup(store: ResultStore, key: str) -> Optional[dict]:
+    """Get an evaluation from the result store, and record in the current span whether it was there."""
+    evaluation = store.get(key)
+    record_cache("result_store", evaluation is not None)
+    return evaluation
 
-    :param json: The json made by ApiObject.to_json()
+
+def _send(api_json: Union[str, SkyCivRequest], key: str) -> dict:
+    """Send a request to SkyCiv. A SkyCivRequest runs in an open session of an earlier request if there is one, so SkyCiv
+    does not have to start a new session. The model is still sent: the API has no function to only change load groups.
+    The request of a large model only fetches some of the results, see large_model.
+    """
+    if isinstance(api_json, str):
+        return get_transport().request_api(api_json, key)
+    if api_json.result_keys is not None:
+        request_api = functools.partial(request_large, result_keys=api_json.result_keys, key=key)
+    else:
+        request_api = functools.partial(get_transport().request_api, key=key)
+    session_id = SESSIONS.acquire()
+    response = request_api(api_json.to_json(session_id))
+    if session_id is not None and _is_session_error(response):
+        response = request_api(api_json.to_json())  # The session was closed, start a new one
+    if response["response"]["status"] == 0:
+        SESSIONS.release(response["response"].get("last_session_id", session_id))
+    return response
+
+
+def _is_session_error(response: dict) -> bool:
+    """Whether SkyCiv refused a request because of its session, e.g. because it expired. Other errors, like an error in
+    the model, are not sent again, as that would solve the model twice.
     """
+    status = response["response"]
+    return status["status"] != 0 and "session" in str(status.get("msg", "")).lower()
+
+
+def _solve(api_json: Union[str, SkyCivRequest], key: str) -> dict:
+    """Send the request to SkyCiv and put the evaluation in the result store."""
+    store = get_result_store()
+    evaluation = store.get(key)  # Another process could have solved it in the meantime
+    if evaluation is not None:
+        return evaluation
 
     # Send an api request
-    response = request(api_json, {"https", 3})  # Send the json to the api
+    response = _send(api_json, key)  # Send the json to the api
     if response["response"]["status"] != 0:  # The skyciv response status, 0 means no succesful
         raise UserException(response["response"]["msg"])  # Send the skyciv error to the user
 
     # Evaluate the response
+    results, model_object, url = None, None, None  # A large model is not sent back
     functions = response["functions"]
     for function in functions:
         if function["function"] == "S3D.results.get":  # Get the correct function out the response
-            results = json.dumps(function["data"][0], indent=4)
+            results = json.dumps(function["data"][0], separators=JSON_SEPARATORS)
         if function["function"] == "S3D.model.get":
             model_object = function["data"]  # Get the returned model so we know for sure they match the results
         if function["function"] == "S3D.results.getAnalysisReport":  # Get the correct function out the response
             analysisReport = function["data"]
             url = analysisReport["view_link"]
-    return {"results": results, "model": model_object, "url": url}
+    if results is None:
+        raise UserException("SkyCiv did not send back the results of the analysis, update the view to solve again")
+    evaluation = {"results": results, "model": model_object, "url": url}
+    store.put(key, evaluation)
+    return evaluation
+
+
+@traced("local.evaluate")
+def evaluate_local(building_frame: BuildingFrame) -> dict:
+    """Solves the model with the local solver instead of SkyCiv. Returns the same evaluation as evaluate_skyciv, without
+    the url of the analysis report, which is only made by SkyCiv, and without the model: it is the model of the params,
+    which the views build from the cached geometry and loads. The results are those of the result set: all loads, or
+    an envelope of the load combinations. The evaluation is kept in the result store like the evaluations of SkyCiv,
+    keyed on the loads key and the result set.
+    """
+    store = get_result_store()
+    key = local_key(building_frame)
+    return SOLVES.do(key, lambda: _solve_local(building_frame, key), lookup=lambda: _lookup(store, key))
+
+
+def _solve_local(building_frame: BuildingFrame, key: str) -> dict:
+    """Solve the model with the local solver and put the evaluation in the result store."""
+    model_object = building_frame.get_model_object()
+    result_set = get_result_set(building_frame.params)
+    with span("local.solve", result_set=result_set):
+        if result_set == DEFAULT_RESULT_SET:
+            results = solve_model(model_object)
+        else:  # The load cases are solved once for all envelopes of the model
+            results = solve_envelope(model_object, result_set, key=building_frame.loads_key)
+        results = json.dumps(results, separators=JSON_SEPARATORS)
+    evaluation = {"results": results, "model": None, "url": None}  # The model is built from the params again
+    get_result_store().put(key, evaluation)
+    return evaluation
+
+
+def local_key(building_frame: BuildingFrame) -> str:
+    """Get the result store key of a local solve."""
+    result_set = get_result_set(building_frame.params)
+    if result_set != DEFAULT_RESULT_SET:
+        return f"local-{building_frame.loads_key}-{result_set}"
+    return f"local-{building_frame.loads_key}"
+
+
+def get_engine(params: Munch) -> str:
+    """Get the analysis engine. The environment variable SKYCIV_ANALYSIS_ENGINE overrides the engine selected in the
+    params, e.g. to run fully offline.
+    """
+    engine = os.environ.get("SKYCIV_ANALYSIS_ENGINE") or params.step_call.get("engine") or "skyciv"
+    return engine.lower()
+
+
+def get_request(building_frame: BuildingFrame) -> SkyCivRequest:
+    """Get the SkyCiv request of the model, from the request stage if the same geometry and loads were requested before.
+    A large model only requests the results of the Results view.
+    """
+
+    def build() -> SkyCivRequest:
+        model_object = building_frame.get_model_payload()  # The geometry is written straight from its arrays
+        result_keys = get_result_keys() if is_large_model(len(building_frame.geometry.members)) else None
+        return build_request(model_object, result_keys=result_keys)
+
+    return REQUESTS.get_or_create(building_frame.loads_key, build)
+
+
+def evaluate(building_frame: BuildingFrame) -> dict:
+    """Solve the model with the selected analysis engine."""
+    if get_engine(building_frame.params) == "local":
+        return evaluate_local(building_frame)
+    return evaluate_skyciv(get_request(building_frame))
+
+
+def start_snow_load(params: Munch) -> Tuple[Optional[Future], str]:
+    """Start the snow load lookup before the model is built, so the lookup and the model build overlap and only the solve
+    is waited on. Returns the future of the snow load (None if there is no snow load) and a message about the chosen path.
+    """
+    if not params.step_call.snow_load:
+        return None, ""
+    snow_load, cached = prefetch_snow_load(get_site_load_arguments(params))
+    if cached:
+        return snow_load, "snow load from cache"
+    return snow_load, "requesting snow load in parallel"
+
+
+def solve_job_id(params: Munch) -> str:
+    """Get the id of the solve job of the params. It only depends on the inputs of the solve: the frame, the site if there
+    is a snow load, the loads and the engine. The params of the map, like its rotation, do not start another solve.
+    """
+    site = get_site_load_arguments(params) if params.step_call.snow_load else None
+    loads = {k: v for k, v in params.step_call.items() if k != "engine"}
+    engine = get_engine(params)
+    return canonical_hash({"frame": params.step_design.frame, "site": site, "loads": loads, "engine": engine})
+
+
+@traced("job.solve")
+def solve_job(params: Munch, report: Report) -> str:
+    """Build and solve the model of the params as a background job, reports every stage it starts. Returns the key of the
+    evaluation in the result store.
+    """
+    snow_load, snow_path = start_snow_load(params)  # Overlaps the snow load lookup with building the model
+    report("model", snow_path)
+    building_frame = BuildingFrame(params)
+    building_frame.geometry  # The geometry is built on first use, build it while the snow load is looked up
+    if snow_load is not None and not snow_load.done():
+        report("snow_load", snow_path)
+    snow_load = snow_load.result() if snow_load else None
+    report("loads")
+    building_frame.add_loads(snow_load)
+    if get_engine(params) == "local":
+        report("solve")
+        evaluate_local(building_frame)
+        return local_key(building_frame)
+    report("request")
+    request = get_request(building_frame)
+    report("solve")
+    evaluate_skyciv(request)
+    return request.key
+
+
+def submit_solve(params: Munch, timeout: float = None) -> Job:
+    """Submit the solve job of the params, or get it if it was submitted before, and wait a short time for it to finish,
+    so a solve that is cached or quick is shown right away. The wait time is set with the environment variable
+    SKYCIV_JOB_WAIT. A job of another worker that is lost while it is waited on is submitted again.
+    """
+    if timeout is None:
+        timeout = float(os.environ.get("SKYCIV_JOB_WAIT", DEFAULT_JOB_WAIT))
+    deadline = time.monotonic() + timeout
+    while True:
+        job = JOBS.submit(solve_job_id(params), lambda report: solve_job(params, report))
+        job = JOBS.wait(job, deadline - time.monotonic(), on_change=_show_progress)
+        if job.state != "lost":
+            return job
+
+
+def _show_progress(job: Job) -> None:
+    progress_message(message=f"{job.message}...", percentage=job.progress)
 
 
 class SkyCivController(ViktorController):
@@ -53,13 +270,12 @@ class SkyCivController(ViktorController):
 
     def download_solve(self, params, **kwargs):
         """Download button for debugging. Will send a request to skyciv and let you download the solve response."""
-        building_frame = BuildingFrame(params)
-        building_frame.add_loads()
-        api_object = build_api_object(building_frame.model)
-        evaluation = evaluate_skyciv(api_object.to_json())
+        job = submit_solve(params, timeout=float("inf"))  # A download can not be pending, so wait for the solve
+        evaluation = JOBS.result(job)
         return DownloadResult(evaluation["results"], "solve.json")
 
     @WebView("Render", duration_guess=1)
+    @traced("view.render")
     def get_web_view(self, params, **kwargs):
         """Builds the model and renders it inside the skyciv renderer embedded in the WebView."""
         progress_message(message="Building the model...", percentage=(1 / 2) * 100)
@@ -69,27 +285,40 @@ class SkyCivController(ViktorController):
         return WebResult(html=html)
 
     @WebView("Results", duration_guess=10)
+    @traced("view.results")
     def get_results_view(self, params, **kwargs):
-        """Get the results from the model and then adds the results to the skyciv renderer embedded in the WebView."""
-        progress_message(message="Building the model...", percentage=(1 / 4) * 100)
-        building_frame = BuildingFrame(params)  # Build the model
-        progress_message(message="Adding loads...", percentage=(2 / 4) * 100)
-        building_frame.add_loads()
-        progress_message(message="Sending API request...", percentage=(3 / 4) * 100)
-        api_object = build_api_object(building_frame.model)
-        evaluation = evaluate_skyciv(api_object.to_json())
-        building_frame.set(evaluation["model"])  # Update the model with the dict we got from the API
-        progress_message(message="Rendering...", percentage=(4 / 4) * 100)
+        """Get the results from the model and then adds the results to the skyciv renderer embedded in the WebView.
+        The model is solved in a background job, while it is running a page with the progress is shown.
+        """
+        if get_result_set(params) != DEFAULT_RESULT_SET and get_engine(params) != "local":
+            raise UserException("The envelopes are solved with the local engine, select it as analysis engine to view them.")
+        job = submit_solve(params)
+        if not job.finished:
+            return WebResult(html=get_pending_page(job))
+        evaluation = JOBS.result(job)
+        building_frame = BuildingFrame(params)
+        if evaluation["model"] is not None:
+            building_frame.set(evaluation["model"])  # Update the model with the dict we got from the API
+        else:  # A local solve or a large model, the model is the one that was solved, the snow load is cached
+            snow_load, snow_path = start_snow_load(params)
+            progress_message(message=f"Adding loads ({snow_path})..." if snow_path else "Adding loads...", percentage=100)
+            building_frame.add_loads(snow_load.result() if snow_load else None)
+        progress_message(message="Rendering...", percentage=100)
         html = building_frame.get_html_render("results", evaluation["results"])  # Build the html page
         return WebResult(html=html)  # Parse it to the WebView
 
     @WebView("Analysis Report", duration_guess=10)
+    @traced("view.analysis_report")
     def get_analysis_report(self, params, **kwargs):
-        """Get an url from skyciv with the analysis report of the model, then view it inside the WebView."""
-        building_frame = BuildingFrame(params)
-        building_frame.add_loads()
-        api_object = build_api_object(building_frame.model)
-        evaluation = evaluate_skyciv(api_object.to_json())
+        """Get an url from skyciv with the analysis report of the model, then view it inside the WebView.
+        The model is solved in a background job, while it is running a page with the progress is shown.
+        """
+        if get_engine(params) == "local":
+            raise UserException("The analysis report is made by SkyCiv, select SkyCiv as analysis engine to view it.")
+        job = submit_solve(params)
+        if not job.finished:
+            return WebResult(html=get_pending_page(job))
+        evaluation = JOBS.result(job)
         return WebResult(url=evaluation["url"])
 
     @MapView("Map View", duration_guess=1)
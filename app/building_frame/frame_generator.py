@@ -0,0 +1,245 @@
+import json
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+import skyciv
+from skyciv.classes.model.components.members.member import Member
+from skyciv.classes.model.components.nodes.node import Node
+from skyciv.classes.model.components.supports.support import Support
+
+from .serialization import RawJson
+
+# Member ids:
+# 1: Column
+# 2: Beams
+# 3: Braces
+COLUMN, BEAM, BRACE = 1, 2, 3
+SECTION_LIBRARY = ["European", "Steel", "EN 10210-2 SHS"]  # How the profiles are accessed in SkyCiv's library
+MATERIAL = "Structural Steel"
+# The collections of skyciv.Model that make up the geometry, all the others are loads
+GEOMETRY_ATTRIBUTES = ("settings", "nodes", "members", "plates", "meshed_plates", "sections", "materials", "supports")
+TOPOLOGY_ATTRIBUTES = ("nodes", "members", "supports")  # The part of the geometry that does not depend on the sections
+CHUNK_ITEMS = 65536  # Elements that are formatted at once, so not all small strings of a collection are in memory
+POWERS_OF_TEN = 10 ** np.arange(1, 19)
+
+
+def _item_format(element: object, fields: Tuple[str, ...]) -> str:
+    """Get the %-format of the canonical json of an element of a SkyCiv collection, with a %s for the id and for every
+    field. The other attributes keep the defaults of the SkyCiv class, the same as SkyCiv writes them.
+    """
+    attributes = dict(vars(element))
+    attributes.update({field: f"\0{field}" for field in fields})  # Placeholders that can not be in the json
+    item = json.dumps(attributes, sort_keys=True, separators=(",", ":")).replace("%", "%%")
+    for field in fields:
+        item = item.replace(json.dumps(f"\0{field}"), "%s")
+    return '"%s":' + item
+
+
+# The fields of an element are in the order of its sorted attributes, like in its json
+NODE_FORMAT = _item_format(Node(0, 0, 0), ("x", "y", "z"))
+MEMBER_FORMAT = _item_format(Member(0, 0, 0), ("node_A", "node_B", "section_id"))
+
+
+class FrameGeometry:
+    """The geometry of a building frame as contiguous arrays, the compact form in which the geometry is built and
+    cached. Node, member and support ids are the array index + 1, the same ids SkyCiv gives them when they are added one
+    by one. A node takes 24 bytes and a member 24 bytes, instead of a SkyCiv object and a dictionary of about a kB.
+
+    The geometry is exported to the forms the rest of the app uses: a skyciv.Model (to_model), the model dictionary of
+    skyciv.Model.get() (model_object) and the same dictionary with the large collections as canonical json, written
+    straight from the arrays (model_payload), for the requests and the renderer page.
+    """
+
+    __slots__ = ("nodes", "members", "member_types", "supports", "restraint_code", "sections")
+
+    def __init__(
+        self,
+        nodes: np.ndarray,
+        members: np.ndarray,
+        member_types: np.ndarray,
+        supports: np.ndarray,
+        restraint_code: str = "FFFFFF",
+        sections: Optional[Tuple[str, str, str]] = None,
+    ):
+        self.nodes = nodes  # (n, 3) float, x y z of every node
+        self.members = members  # (m, 2) int, node_A and node_B of every member
+        self.member_types = member_types  # (m,) int, the section id of every member (see member ids above)
+        self.supports = supports  # (s,) int, the node id of every support
+        self.restraint_code = restraint_code  # Of every support
+        self.sections = sections  # The profiles of the columns, beams and braces, None for only the topology
+
+    def with_sections(self, sections: Tuple[str, str, str]) -> "FrameGeometry":
+        """Get the geometry with the profiles of the columns, beams and braces, it shares the arrays of this one."""
+        return FrameGeometry(self.nodes, self.members, self.member_types, self.supports, self.restraint_code, sections)
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the arrays in bytes."""
+        return self.nodes.nbytes + self.members.nbytes + self.member_types.nbytes + self.supports.nbytes
+
+    def to_model(self, model: skyciv.Model = None) -> skyciv.Model:
+        """Add the geometry to a SkyCiv model, or to a new one. The collections are filled in bulk, as the add() methods
+        of SkyCiv search all existing elements for the next free id and duplicates, which makes adding elements one by
+        one quadratic in the model size.
+        """
+        model = model if model is not None else skyciv.Model("metric")
+        model.nodes.__dict__.update(
+            (str(i), Node(x, y, z)) for i, (x, y, z) in enumerate(zip(*self.node_coordinates()), start=1)
+        )
+        model.members.__dict__.update(
+            (str(i), Member(a, b, t))
+            for i, ((a, b), t) in enumerate(zip(self.members.tolist(), self.member_types.tolist()), start=1)
+        )
+        model.supports.__dict__.update(
+            (str(i), Support(node, self.restraint_code)) for i, node in enumerate(self.supports.tolist(), start=1)
+        )
+        self._add_sections(model)
+        return model
+
+    def _add_sections(self, model: skyciv.Model) -> None:
+        """Add the sections and the material of the profiles to a model."""
+        if self.sections is None:
+            return
+        for designation in self.sections:
+            model.sections.add_library_section(SECTION_LIBRARY + [designation], 1)
+        model.materials.add(MATERIAL)
+
+    def _node_columns(self) -> List[np.ndarray]:
+        """Get the x, y and z of the nodes as object arrays, with the number types the frame had when it was built node by
+        node: the first node of every row starts at the int 0, and the floors are whole numbers that are ints as well.
+        So the json of a model, and the hashes of the requests, are the same as they have always been.
+        """
+        columns = []
+        for axis, values in enumerate(self.nodes.T):
+            whole = values == np.round(values) if axis == 1 else values == 0
+            column = values.astype(object)
+            column[whole] = values[whole].astype(np.int64).astype(object)
+            columns.append(column)
+        return columns
+
+    def node_coordinates(self) -> Tuple[list, list, list]:
+        """Get the x, y and z of the nodes as lists, with the number types of _node_columns."""
+        x, y, z = (column.tolist() for column in self._node_columns())
+        return x, y, z
+
+    def _small_collections(self) -> Dict[str, object]:
+        """Get the model dictionary of the collections of the geometry other than the nodes, members and supports."""
+        model = skyciv.Model("metric")
+        self._add_sections(model)
+        return {name: getattr(model, name).get() for name in GEOMETRY_ATTRIBUTES if name not in TOPOLOGY_ATTRIBUTES}
+
+    def model_object(self) -> Dict[str, object]:
+        """Get the model dictionary of the geometry, like skyciv.Model.get() of the model of to_model."""
+        member = vars(Member())
+        support = vars(Support(None, self.restraint_code))
+        model_object = {
+            "nodes": {
+                str(i): {"x": x, "y": y, "z": z} for i, (x, y, z) in enumerate(zip(*self.node_coordinates()), start=1)
+            },
+            "members": {
+                str(i): {**member, "node_A": a, "node_B": b, "section_id": t}
+                for i, ((a, b), t) in enumerate(zip(self.members.tolist(), self.member_types.tolist()), start=1)
+            },
+            "supports": {str(i): {**support, "node": n} for i, n in enumerate(self.supports.tolist(), start=1)},
+        }
+        model_object.update(self._small_collections())
+        return {name: model_object[name] for name in GEOMETRY_ATTRIBUTES}
+
+    def model_payload(self) -> Dict[str, object]:
+        """Get the model dictionary of the geometry with the nodes, members and supports as RawJson. Their canonical
+        json is formatted straight from the arrays, without a dictionary per element.
+        """
+        support_format = _item_format(Support(None, self.restraint_code), ("node",))
+        model_object = {
+            "nodes": RawJson(_collection_json(NODE_FORMAT, np.column_stack(self._node_columns()))),
+            "members": RawJson(_collection_json(MEMBER_FORMAT, np.column_stack((self.members, self.member_types)))),
+            "supports": RawJson(_collection_json(support_format, self.supports[:, None])),
+        }
+        model_object.update(self._small_collections())
+        return {name: model_object[name] for name in GEOMETRY_ATTRIBUTES}
+
+
+def _collection_json(item_format: str, values: np.ndarray) -> str:
+    """Get the canonical json of a SkyCiv collection, with an element per row of the values. The ids are sorted as
+    strings, like the keys of the canonical json: by their digits padded to the same length, and shorter ids first.
+    """
+    ids = np.arange(1, len(values) + 1)
+    digits = np.searchsorted(POWERS_OF_TEN, ids, side="right") + 1
+    order = np.lexsort((digits, ids * 10 ** (digits.max(initial=1) - digits)))
+    columns = [ids[order], *values[order].T]
+    return "{" + ",".join(_iter_items(item_format, columns)) + "}"
+
+
+def _iter_items(item_format: str, columns: List[np.ndarray]) -> Iterator[str]:
+    for start in range(0, len(columns[0]), CHUNK_ITEMS):
+        rows = zip(*(column[start : start + CHUNK_ITEMS].tolist() for column in columns))
+        yield ",".join(map(item_format.__mod__, rows))
+
+
+def generate_frame(
+    grid_num_length: int,
+    grid_num_width: int,
+    grid_size_length: float,
+    grid_size_width: float,
+    num_floors: int,
+    floor_height: float,
+    corner_positions: List[int],
+    neighbours: List[Tuple[int, int]],
+    add_braces: bool,
+) -> FrameGeometry:
+    """Calculate the nodes, members and supports of the frame in one batched pass.
+
+    Every floor above the ground has the same members, only shifted by the nodes per plain. So we build the members of
+    a single floor once and tile them over all floors. The order within a floor is the same as adding them node by node:
+    column, beam in x direction, beam in z direction and at last the braces of a corner.
+    """
+    nodes_per_plain = grid_num_length * grid_num_width
+
+    # Nodes, the coordinates are accumulated in the same way as stepping through the grid
+    x = np.cumsum(np.r_[0.0, np.full(grid_num_length - 1, grid_size_length)])
+    z = np.cumsum(np.r_[0.0, np.full(grid_num_width - 1, grid_size_width)])
+    y = np.arange(num_floors + 1) * floor_height
+    yy, zz, xx = np.meshgrid(y, z, x, indexing="ij")
+    nodes = np.column_stack((xx.ravel(), yy.ravel(), zz.ravel()))
+
+    # Members of the first floor, as (node_A, node_B) per slot of every floor position
+    position = np.arange(nodes_per_plain)
+    uid = position + 1 + nodes_per_plain  # The id of the node on the first floor
+    num_slots = 7  # Column, two beams and four braces
+    candidates = np.zeros((nodes_per_plain, num_slots, 2), dtype=np.int64)
+    mask = np.zeros((nodes_per_plain, num_slots), dtype=bool)
+
+    candidates[:, 0] = np.column_stack((uid - nodes_per_plain, uid))  # Connect the node to the node below
+    mask[:, 0] = True
+    candidates[:, 1] = np.column_stack((uid, uid - 1))  # Connect beam in x direction
+    mask[:, 1] = position % grid_num_length > 0  # If the column is not the first in its row
+    candidates[:, 2] = np.column_stack((uid, uid - grid_num_length))  # Connect beam in z direction
+    mask[:, 2] = position >= grid_num_length  # If the column is not the first in its column
+
+    if add_braces:
+        for c, n in zip(corner_positions, neighbours):
+            corner = c + 1 + nodes_per_plain
+            for i, sn in enumerate(n):
+                nid = sn + 1 + nodes_per_plain  # The id of the neighbor
+                candidates[c, 3 + 2 * i] = (nid, corner - nodes_per_plain)  # Brace from neighbor to column of corner
+                candidates[c, 4 + 2 * i] = (nid - nodes_per_plain, corner)  # Brace from column of neighbor to corner
+                mask[c, 3 + 2 * i : 5 + 2 * i] = True
+
+    slot_types = np.array([COLUMN, BEAM, BEAM, BRACE, BRACE, BRACE, BRACE])
+    floor_members = candidates[mask]
+    floor_types = np.broadcast_to(slot_types, mask.shape)[mask]
+
+    # Tile the first floor over all floors
+    offsets = np.arange(num_floors)[:, None, None] * nodes_per_plain
+    members = (floor_members[None, :, :] + offsets).reshape(-1, 2)
+    member_types = np.tile(floor_types, num_floors)
+
+    # Every node on the ground floor gets a support
+    supports = np.arange(1, nodes_per_plain + 1)
+
+    return FrameGeometry(nodes=nodes, members=members, member_types=member_types, supports=supports)
+
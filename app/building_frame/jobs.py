@@ -0,0 +1,317 @@
+"""Background solve jobs.
+
+A solve can take minutes, most of it waiting on SkyCiv. Instead of keeping the worker of a view busy for that time, the
+solve runs as a job in a background executor and the view returns right away: with the results when the job is done,
+or with a pending page that shows the stage of the job otherwise. Updating the view checks the job again.
+
+The status of every job is written to the jobs namespace of the result store, so the workers of the app share their jobs
+and the records are never evicted. The evaluation of a finished job is kept in the result store itself, the job only
+keeps the key of it. A running job has the id of the worker that runs it and a heartbeat that this worker updates. When
+the worker is stopped halfway, its heartbeat stops, and the job is submitted again by the next view that asks for it.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+from viktor.core import File
+from viktor.core import UserException
+
+from .page import write_page
+from .result_store import ResultStore
+from .result_store import get_result_store
+from .tracing import propagate
+
+PENDING_PAGE = Path(__file__).parent.parent / "lib" / "pending.html.jinja"
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT = 60 * 60  # A job without progress for this long is considered lost, e.g. its solve hangs
+DEFAULT_HEARTBEAT = 10  # Seconds between the heartbeats of running jobs
+STALE_HEARTBEATS = 3  # A job of another worker is lost when it missed this many heartbeats, e.g. its worker was stopped
+POLL_INTERVAL = 0.5  # Seconds between the checks of a job of another worker that is waited on
+JOB_NAMESPACE = "jobs"  # The subdirectory of the result store with the job records
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"  # The worker of the jobs of this process
+
+# The stages of a solve job, in the order they run, with the message that is shown while the job is in that stage
+STAGES = {
+    "queued": "Waiting for a free worker",
+    "model": "Building the model",
+    "snow_load": "Waiting for the snow load",
+    "loads": "Adding loads",
+    "request": "Building the request",
+    "solve": "Solving the model",
+    "done": "Done",
+}
+
+# Called by the job function with the name of every stage it starts, and optionally a detail that is shown with it
+Report = Callable[..., None]
+
+
+class Job:
+    """The status of a job: its state (running, done, failed, or lost when its worker stopped), the stage it is in and the
+    time spent in every stage.
+    """
+
+    def __init__(self, job_id: str, record: dict = None):
+        record = record or {}
+        self.id = job_id
+        self.state: str = record.get("state", "running")
+        self.stage: str = record.get("stage", "queued")
+        self.detail: str = record.get("detail", "")  # Shown with the stage, e.g. where the snow load is from
+        self.error: Optional[str] = record.get("error")
+        self.reported: bool = record.get("reported", False)  # Whether the error was shown to the user
+        self.result_key: Optional[str] = record.get("result_key")
+        self.created: float = record.get("created", time.time())
+        self.updated: float = record.get("updated", self.created)
+        self.owner: Optional[str] = record.get("owner", None if record else WORKER_ID)  # The worker that runs the job
+        self.heartbeat: float = record.get("heartbeat", self.updated)
+        self.timings: Dict[str, float] = record.get("timings", {})  # Seconds spent in every finished stage
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed")
+
+    @property
+    def progress(self) -> float:
+        """The progress in percent, from the position of the stage."""
+        stages = list(STAGES)
+        return 100 * stages.index(self.stage) / (len(stages) - 1)
+
+    @property
+    def message(self) -> str:
+        return f"{STAGES[self.stage]} ({self.detail})" if self.detail else STAGES[self.stage]
+
+    def to_record(self) -> dict:
+        return {
+            "state": self.state,
+            "stage": self.stage,
+            "detail": self.detail,
+            "error": self.error,
+            "reported": self.reported,
+            "result_key": self.result_key,
+            "created": self.created,
+            "updated": self.updated,
+            "owner": self.owner,
+            "heartbeat": self.heartbeat,
+            "timings": self.timings,
+        }
+
+
+class JobManager:
+    """Runs jobs in a thread pool. A job is identified by an id made from its inputs, so submitting the same job again
+    while it is running or after it is done gives the existing job. A failed job is given until its error is shown, after
+    that it is run again when it is submitted.
+    """
+
+    def __init__(self, store: ResultStore = None, workers: int = None, timeout: float = None, heartbeat: float = None):
+        self._store = store
+        if timeout is None:
+            timeout = float(os.environ.get("SKYCIV_JOB_TIMEOUT", DEFAULT_TIMEOUT))
+        if heartbeat is None:
+            heartbeat = float(os.environ.get("SKYCIV_JOB_HEARTBEAT", DEFAULT_HEARTBEAT))
+        self.timeout = timeout or float("inf")  # A timeout of 0 is no limit
+        self.heartbeat = heartbeat  # A heartbeat of 0 turns the heartbeats off
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or int(os.environ.get("SKYCIV_JOB_WORKERS", DEFAULT_WORKERS)),
+            thread_name_prefix="solve-job",
+        )
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._saving = threading.Lock()  # Held from the change of a job until its record is written, taken before _lock
+        self._jobs: Dict[str, Job] = {}
+        self._heartbeats: Optional[threading.Thread] = None
+
+    @property
+    def store(self) -> ResultStore:
+        return self._store or get_result_store()
+
+    @property
+    def records(self) -> ResultStore:
+        """The store of the job records, a namespace of the result store that is never evicted."""
+        return self.store.namespace(JOB_NAMESPACE)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job of this worker, or of another worker from the result store. Returns None if there is no such job, or
+        when the job is lost or its evaluation is no longer in the result store.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            record = self.records.get(job_id)
+            if record is None:
+                return None
+            job = Job(job_id, record)
+            if job.state == "running" and self._is_stale(job):
+                return None
+        if job.state == "running" and time.time() - job.updated > self.timeout:
+            return None
+        if job.state == "done" and self.store.get(job.result_key) is None:
+            return None  # Evicted from the result store
+        return job
+
+    def submit(self, job_id: str, function: Callable[[Report], str]) -> Job:
+        """Submit a job, unless the same job is already running or done.
+
+        :param function: The job, it gets a function to report the stages it starts and returns the key of its evaluation
+            in the result store
+        """
+        job = self.get(job_id)
+        if job is not None and not job.reported:
+            return job
+        with self._lock:
+            if job_id in self._jobs and self._jobs[job_id].state == "running":
+                return self._jobs[job_id]  # Submitted by another thread in the meantime
+            job = Job(job_id)
+            self._jobs[job_id] = job
+        self._save(job)
+        self._start_heartbeats()
+        self._executor.submit(propagate(self._run), job, function)  # The spans of the job are part of the view
+        return job
+
+    def clear(self) -> None:
+        """Forget the jobs of this worker, e.g. to start a benchmark cold. Their records in the result store are kept."""
+        with self._lock:
+            self._jobs.clear()
+
+    def _is_stale(self, job: Job) -> bool:
+        """Whether a running job in the result store missed its heartbeats. A job of this worker that it does not run
+        itself can not be running either.
+        """
+        if job.owner == WORKER_ID:
+            return True
+        return self.heartbeat > 0 and time.time() - job.heartbeat > STALE_HEARTBEATS * self.heartbeat
+
+    def _start_heartbeats(self) -> None:
+        with self._lock:
+            if self._heartbeats is None and self.heartbeat > 0:
+                self._heartbeats = threading.Thread(target=self._beat, name="solve-job-heartbeat", daemon=True)
+                self._heartbeats.start()
+
+    def _beat(self) -> None:
+        """Update the heartbeat of the running jobs of this worker, so other workers know they are still running. The
+        records are written while holding the save lock, so a heartbeat can not overwrite the record of a job that
+        finished in the meantime.
+        """
+        while True:
+            time.sleep(self.heartbeat)
+            with self._saving:
+                with self._lock:
+                    now = time.time()
+                    records = {}
+                    for job in self._jobs.values():
+                        if job.state == "running":
+                            job.heartbeat = now
+                            records[job.id] = job.to_record()
+                for job_id, record in records.items():
+                    self.records.put(job_id, record)
+
+    def _run(self, job: Job, function: Callable[[Report], str]) -> None:
+        try:
+            job.result_key = function(lambda stage, detail="": self._update(job, stage, detail=detail))
+        except Exception as error:
+            job.error = str(error) if isinstance(error, UserException) else f"{type(error).__name__}: {error}"
+            self._update(job, job.stage, state="failed")
+        else:
+            self._update(job, "done", state="done")
+
+    def _update(self, job: Job, stage: str, state: str = None, detail: str = "") -> None:
+        """Move the job to a stage or state and write its record. A finished job is no longer running, so the heartbeats
+        stop before its final record is written.
+        """
+        with self._saving:
+            with self._lock:
+                now = time.time()
+                if stage != job.stage:
+                    job.timings[job.stage] = round(now - job.updated, 3)
+                    job.stage = stage
+                    job.detail = detail
+                job.state = state or job.state
+                job.updated = job.heartbeat = now
+                record = job.to_record()
+                self._changed.notify_all()
+            self.records.put(job.id, record)
+
+    def _save(self, job: Job) -> None:
+        with self._saving:
+            with self._lock:
+                record = job.to_record()
+            self.records.put(job.id, record)
+
+    def wait(self, job: Job, timeout: float, on_change: Callable[[Job], None] = None) -> Job:
+        """Wait until the job is finished, at most timeout seconds. A job of another worker is polled in the result store,
+        and is returned as lost when its worker stopped, so it can be submitted again.
+
+        :param on_change: Called with the job every time it moves to another stage
+        """
+        deadline = time.monotonic() + timeout
+        stage = None
+        with self._lock:
+            own = self._jobs.get(job.id) is job
+        if not own:
+            return self._poll(job, deadline, on_change)
+        with self._lock:
+            while not job.finished:
+                if on_change is not None and job.stage != stage:
+                    stage = job.stage
+                    self._lock.release()
+                    try:
+                        on_change(job)
+                    finally:
+                        self._lock.acquire()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining if remaining != float("inf") else None)  # An infinite timeout overflows
+        return job
+
+    def _poll(self, job: Job, deadline: float, on_change: Callable[[Job], None] = None) -> Job:
+        """Wait on a job of another worker by reading its record from the result store until it is finished."""
+        stage = None
+        while True:
+            if on_change is not None and job.stage != stage:
+                stage = job.stage
+                on_change(job)
+            if job.finished or time.monotonic() >= deadline:
+                return job
+            time.sleep(max(0.0, min(POLL_INTERVAL, deadline - time.monotonic())))
+            polled = self.get(job.id)
+            if polled is None:
+                job.state = "lost"
+                return job
+            job = polled
+
+    def result(self, job: Job) -> dict:
+        """Get the evaluation of a finished job, raises the error of a failed job. The failed job is run again when it is
+        submitted after this.
+        """
+        if not job.finished:
+            raise UserException("The solve is not finished yet, update the view to see its progress")
+        if job.state == "failed":
+            job.reported = True
+            self._save(job)
+            raise UserException(job.error)
+        evaluation = self.store.get(job.result_key)
+        if evaluation is None:
+            raise UserException("The results of the solve are no longer available, update the view to solve again")
+        return evaluation
+
+
+def get_pending_page(job: Job) -> File:
+    """Get the page of a job that is not finished yet."""
+    timings = "".join(f"<li>{STAGES[stage]}: {seconds:.1f} s</li>" for stage, seconds in job.timings.items())
+    context = {
+        "message": job.message,
+        "progress": f"{job.progress:.0f}",
+        "created": f"{job.created * 1000:.0f}",
+        "timings": timings,
+    }
+    return write_page(PENDING_PAGE, context)
+
+
+JOBS = JobManager()
@@ -0,0 +1,141 @@
+"""The large model mode, for frames at the far end of the parametrization.
+
+A frame of 100 x 100 m with a column every metre and 20 floors has hundreds of thousands of members. Sent the usual way,
+the request is one giant json, SkyCiv sends the whole model back and the response holds every result, which is parsed
+into memory at once. For a large model instead:
+- the request is gzipped, which makes the json of a model many times smaller
+- only the result keys of the Results view are requested (SKYCIV_RESULT_KEYS), and the model is not sent back
+- the response is streamed to a temporary file and parsed incrementally with ijson, so only the selected results are
+  ever built in memory. The other results are skipped while parsing, also when SkyCiv sends them anyway.
+
+ijson is optional, without it the response is still streamed to a file, but parsed in one go with the json module.
+A model is large from SKYCIV_LARGE_MODEL_MEMBERS members. The mode is off by default (0): the gzipped requests and the
+result_filter of S3D.results.get have only been tried against the local stub, not yet in a round trip with SkyCiv.
+"""
+import json
+import os
+from typing import BinaryIO
+from typing import Iterator
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+from .tracing import span
+from .transport import get_transport
+
+try:
+    import ijson
+except ImportError:  # ijson is optional, without it the response is parsed in one go
+    ijson = None
+
+DEFAULT_LARGE_MODEL_MEMBERS = 0  # Off until a round trip with SkyCiv is verified
+RESULTS_FUNCTION = "S3D.results.get"
+
+Event = Tuple[str, str, object]  # The prefix, event and value of ijson.parse
+
+
+def is_large_model(num_members: int) -> bool:
+    """Whether a model with this many members is large enough for the large model mode."""
+    threshold = int(os.environ.get("SKYCIV_LARGE_MODEL_MEMBERS", DEFAULT_LARGE_MODEL_MEMBERS))
+    return threshold > 0 and num_members >= threshold
+
+
+def request_large(api_json: str, result_keys: Sequence[str], key: str = None) -> dict:
+    """Send the json of a large model to SkyCiv and parse the response incrementally. The response has the same form as
+    the one of Transport.request_api, but S3D.results.get only has the result keys.
+    """
+    compress = os.environ.get("SKYCIV_LARGE_MODEL_COMPRESS", "1") != "0"
+    with get_transport().request_api_file(api_json, compress=compress, key=key) as f:
+        with span("skyciv.parse", parser="ijson" if ijson is not None else "json"):
+            return parse_response(f, result_keys)
+
+
+def parse_response(f: BinaryIO, result_keys: Sequence[str]) -> dict:
+    """Parse a SkyCiv response from a file, and keep only the result keys of S3D.results.get."""
+    keys = set(result_keys)
+    if ijson is None:
+        return _select_results(json.load(f), keys)
+    return _select_results(_parse_events(ijson.parse(f, use_float=True), keys), keys)
+
+
+def _select_results(response: dict, keys: set) -> dict:
+    """Keep only the result keys in the data of S3D.results.get."""
+    for function in response.get("functions", []):
+        if function.get("function") == RESULTS_FUNCTION and isinstance(function.get("data"), list):
+            function["data"] = [_select(results, keys) for results in function["data"]]
+    return response
+
+
+def _select(results, keys: set):
+    return {k: v for k, v in results.items() if k in keys} if isinstance(results, dict) else results
+
+
+def _parse_events(events: Iterator[Event], keys: set) -> dict:
+    """Build the response from the ijson events. Every value is built as it comes in, except for the data of
+    S3D.results.get: of that only the result keys are built, the other results are skipped. That needs the name of the
+    function before its data, as SkyCiv sends it. Data that comes first is built whole, and filtered afterwards.
+    """
+    response = {"response": {}, "functions": []}
+    function = None
+    for prefix, event, key in events:
+        if prefix == "functions.item" and event == "start_map":
+            function = {}
+            response["functions"].append(function)
+        if event != "map_key":
+            continue
+        if prefix == "" and key == "functions":
+            continue  # The functions are built one by one in this loop
+        _, event, value = next(events)
+        if prefix == "":
+            if key == "response":
+                response["response"] = _build(events, event, value)
+            else:
+                _skip(events, event)
+        elif prefix == "functions.item":
+            if key == "data" and function.get("function") == RESULTS_FUNCTION and event == "start_array":
+                function["data"] = _build_results(events, keys)
+            else:
+                function[key] = _build(events, event, value)
+    return response
+
+
+def _build(events: Iterator[Event], event: str, value) -> object:
+    """Build the value that starts with the event from the events that follow it."""
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    depth = 1 if event in ("start_map", "start_array") else 0
+    while depth:
+        _, event, value = next(events)
+        builder.event(event, value)
+        depth += 1 if event in ("start_map", "start_array") else -1 if event in ("end_map", "end_array") else 0
+    return builder.value
+
+
+def _skip(events: Iterator[Event], event: str) -> None:
+    """Skip the value that starts with the event, without building it."""
+    depth = 1 if event in ("start_map", "start_array") else 0
+    while depth:
+        _, event, _ = next(events)
+        depth += 1 if event in ("start_map", "start_array") else -1 if event in ("end_map", "end_array") else 0
+
+
+def _build_results(events: Iterator[Event], keys: set) -> List[object]:
+    """Build the data of S3D.results.get, a list with the results per result key, with only the result keys."""
+    data = []
+    for _, event, value in events:
+        if event == "end_array":
+            return data
+        if event != "start_map":
+            data.append(_build(events, event, value))
+            continue
+        results = {}
+        for _, event, key in events:
+            if event == "end_map":
+                break
+            _, event, value = next(events)
+            if key in keys:
+                results[key] = _build(events, event, value)
+            else:
+                _skip(events, event)
+        data.append(results)
+    return data
@@ -1,4 +1,4 @@
-import json
+import copy
 from pathlib import Path
 
 import numpy as np
@@ -6,11 +6,27 @@ import skyciv
 from munch import Munch
 from typing_extensions import Literal
 
-from viktor.core import UserException
-from viktor.utils import render_jinja_template
-
-from .skyciv_functions import build_api_object
-from .skyciv_functions import get_renderer
+from skyciv.utils.helpers import has_get_method
+
+from viktor.core import File
+
+from .frame_generator import GEOMETRY_ATTRIBUTES
+from .frame_generator import FrameGeometry
+from .frame_generator import generate_frame
+from .page import write_page
+from .renderer_assets import get_renderer_asset
+from .results_payload import encode_results
+from .serialization import dumps
+from .site_loads import get_snow_load
+from .site_loads import get_snow_load_arguments
+from .stages import GEOMETRY
+from .stages import LOADS
+from .stages import TOPOLOGY
+from .stages import geometry_key
+from .stages import loads_key
+from .stages import topology_key
+from .tracing import set_attribute
+from .tracing import traced
 
 FLOOR_HEIGHT = 3  # Default height of the floor
 SUPPORT = [
@@ -20,12 +36,28 @@ SUPPORT = [
     "FFRRRR",  # Vertical Roller
 ]
 G = -9.81  # Gravity
+DEFAULT_LOCATION = (51.92224690568676, 4.469871725409869)  # Used when no building corner is selected
+
+
+def get_site_load_arguments(params: Munch) -> dict:
+    """Get the arguments for the snow load lookup straight from the params, without building the model. This way the
+    lookup can already be started while the model is being built.
+    """
+    office = params.step_design.frame.office
+    if params.step_design.loc.start:
+        lat, lng = params.step_design.loc.start.lat, params.step_design.loc.start.lon
+    else:
+        lat, lng = DEFAULT_LOCATION
+    return get_snow_load_arguments(lat, lng, office.length, office.width, FLOOR_HEIGHT * office.num_floors)
 
 
 class BuildingFrame:
     """The reason this class is not a child of skyciv.Model is because when we send an api request we send all the attributes of the model.
     So this will also send our own added attributes, which will cause an error. If you want to make this a child of skyciv.Model you need to
     overwrite the get() method.
+
+    Only the grid is calculated when the frame is made, the nodes and members are built when the model is first needed.
+    So the dimensions of the grid, the corners and the snow load lookup do not depend on the size of the model.
     """
 
     def __init__(self, params: Munch):
@@ -70,7 +102,7 @@ class BuildingFrame:
             self.lat = self.params.step_design.loc.start.lat
             self.lng = self.params.step_design.loc.start.lon
         else:
-            self.lat, self.lng = 51.92224690568676, 4.469871725409869
+            self.lat, self.lng = DEFAULT_LOCATION
 
         # Nodal positioning
         self.nodes_per_plain = int(
@@ -91,80 +123,80 @@ class BuildingFrame:
         n4 = (c4 + 1, c4 - self.grid_num_length)
         self.neighbours = [n1, n2, n3, n4]
 
-        # Model
-        self.model = self._build_model_from_parameters()
+        # Model, the geometry is shared with the other frames with the same geometry and only added when it is needed
+        self.topology_key = topology_key(self.params)
+        self.geometry_key = geometry_key(self.params)
+        self._model = skyciv.Model("metric")  # Only the loads until the geometry is needed, see model
+        self._has_geometry = False
+        self._staged = True  # The model is made of the geometry and loads stages, see get_model_object
 
         # Loads
         self.loads = self.params.step_call
+        self.loads_key = loads_key(self.geometry_key)  # No loads yet
+
+    @property
+    def model(self) -> skyciv.Model:
+        """The SkyCiv model of the frame. The geometry is added on first access from the cached FrameGeometry, the model
+        has its own collections.
+        """
+        if not self._has_geometry:
+            self.geometry.to_model(self._model)
+            self._has_geometry = True
+        return self._model
+
+    @property
+    def geometry(self) -> FrameGeometry:
+        """The geometry of the frame as arrays, built once and shared with the other frames with the same geometry."""
+        return GEOMETRY.get_or_create(self.geometry_key, self._build_geometry)
+
+    def _build_geometry(self) -> FrameGeometry:
+        """Build the geometry stage: the topology with the chosen profiles. The nodes, members and supports come from the
+        topology stage, so they are not built again when only the profiles change.
+        """
+        topology = TOPOLOGY.get_or_create(self.topology_key, self._build_topology)
+        return topology.with_sections((self.column_material, self.beam_material, self.brace_material))
+
+    @traced("model.build")
+    def _build_topology(self) -> FrameGeometry:
+        """Build the topology stage: the nodes, members and supports of the chosen parameters as arrays."""
+        topology = generate_frame(
+            grid_num_length=self.grid_num_length,
+            grid_num_width=self.grid_num_width,
+            grid_size_length=self.grid_size_length,
+            grid_size_width=self.grid_size_width,
+            num_floors=self.num_floors,
+            floor_height=FLOOR_HEIGHT,
+            corner_positions=self.corner_positions,
+            neighbours=self.neighbours,
+            add_braces=self.add_braces,
+        )
+        topology.restraint_code = SUPPORT[0]  # Every support is a fixed support
+        set_attribute("nodes", len(topology.nodes))
+        set_attribute("bytes", topology.nbytes)
+        return topology
 
-    def _build_model_from_parameters(self) -> skyciv.Model:
-        """Builds a SkyCiv model with the chosen parameters"""
-        model = skyciv.Model("metric")  # Initialise an empty model
-
-        # Member ids:
-        # 1: Column
-        # 2: Beams
-        # 3: Braces
-
-        current_y = 0  # Would be the current height
-        for current_floor in range(self.num_floors + 1):
-            current_z = 0  # Would be the current "width"
-            for _ in range(self.grid_num_width):
-                current_x = 0  # Would be the current "length"
-                for _ in range(self.grid_num_length):
-                    uid = int(
-                        model.nodes.add(current_x, current_y, current_z)
-                    )  # Add the node to the model and record the id tag
-                    if uid > self.nodes_per_plain:  # If the node ID is bigger then the nodes per plain
-                        #   then there is a node below it
-                        model.members.add(uid - self.nodes_per_plain, uid, 1)  # Connect the node to the node below
-                        if (uid - 1) % self.grid_num_length > 0:  # If the column is not the first in its row
-                            model.members.add(uid, uid - 1, 2)  # Connect beam in x direction
-                        floor_position = (uid - 1) % self.nodes_per_plain  # The id on its own floor
-                        if floor_position >= self.grid_num_length:  # If the column is not in the in the column
-                            model.members.add(uid, uid - self.grid_num_length, 2)  # Connect beam in z direction
-                        if self.add_braces:  # Enable braces on the model
-                            for c, n in zip(self.corner_positions, self.neighbours):  # Check for corners
-                                if floor_position == c:  # This is a corner
-                                    for sn in n:  # Check every neighbor of corner
-                                        nid = sn + current_floor * self.nodes_per_plain + 1  # The id of the neighbor
-                                        model.members.add(
-                                            nid, uid - self.nodes_per_plain, 3
-                                        )  # Add brace from neighbor to column of corner
-                                        model.members.add(
-                                            nid - self.nodes_per_plain, uid, 3
-                                        )  # Add brace from column of neighbor to corner
-                    else:  # These nodes are on the floor
-                        model.supports.add(uid, SUPPORT[0])  # Add support to the floor node
-                    current_x += self.grid_size_length  # Increment on the x-axis
-                current_z += self.grid_size_width  # Increment on the z-axis
-            current_y += FLOOR_HEIGHT  # Increment on the y-axis
-
-        # Add the sections to the skyciv model. We also format the material in our selection to how
-        # it is accessed in SkyCiv's library.
-        model.sections.add_library_section(["European", "Steel", "EN 10210-2 SHS", self.column_material], 1)
-        model.sections.add_library_section(["European", "Steel", "EN 10210-2 SHS", self.beam_material], 1)
-        model.sections.add_library_section(["European", "Steel", "EN 10210-2 SHS", self.brace_material], 1)
-
-        # Material
-        model.materials.add("Structural Steel")
-
-        return model
-
-    def add_loads(self) -> None:
-        """Add different kind of loads to analyse the model"""
+    @traced("model.add_loads")
+    def add_loads(self, snow_load: float = None) -> None:
+        """Add different kind of loads to analyse the model
+
+        :param snow_load: The snow pressure if it is already known, otherwise it is requested when the snow load is added
+        """
+        if self.loads.snow_load and snow_load is None:
+            snow_load = self.get_snow_load()  # Get the snow pressure for the load
+        self.loads_key = loads_key(self.geometry_key, self.loads, snow_load if self.loads.snow_load else None)
+
+        # The loads are added to the load collections only, so the geometry is not needed
         if self.loads.self_weight:
             # Selfweight
-            self.model.self_weight.add(y=-1, LG="SW1")
+            self._model.self_weight.add(y=-1, LG="SW1")
         if self.loads.snow_load:
             # Area loads
-            n1 = self.model.nodes.length()
+            n1 = self.nodes_per_plain * (self.num_floors + 1)  # The number of nodes
             n2 = n1 - int(self.grid_num_length - 1)
             n3 = n1 + 1 - self.nodes_per_plain
             n4 = n3 + int(self.grid_num_length - 1)
             nodes = [n1, n2, n3, n4]  # The nodes where we want to set the load between
-            p = self.get_snow_load()  # Get the snow pressure for the load
-            self.model.area_loads.add(type="two_way", nodes=nodes, mag=-p, direction="Y", LG="SNOW")
+            self._model.area_loads.add(type="two_way", nodes=nodes, mag=-snow_load, direction="Y", LG="SNOW")
         if self.loads.wind_load:
             n1 = 1
             n2 = self.grid_num_length
@@ -174,7 +206,7 @@ class BuildingFrame:
             elevations = ""  # This parameter needs to be a string of nodes
             for elevation in np.arange(0, self.num_floors * FLOOR_HEIGHT + FLOOR_HEIGHT, FLOOR_HEIGHT):
                 elevations += str(elevation) + ","  # Nodes need to be seperated with a comma
-            self.model.area_loads.add(
+            self._model.area_loads.add(
                 type="column_wind_load",
                 nodes=nodes,
                 mag=1,
@@ -190,11 +222,15 @@ class BuildingFrame:
                 nodes = []  # nodes for the area
                 for fp in self.corner_positions:  # Every floor corner position
                     nodes.append(fp + n * self.nodes_per_plain + 1)  # Add this exact node to the area load
-                self.model.area_loads.add(type="two_way", nodes=nodes, mag=p, direction="Y", LG=f"AL{n}")
+                self._model.area_loads.add(type="two_way", nodes=nodes, mag=p, direction="Y", LG=f"AL{n}")
 
-    def get_html_render(self, mode: Literal["model", "results"] = "model", results: str = None):
+    @traced("page.render")
+    def get_html_render(self, mode: Literal["model", "results"] = "model", results: str = None) -> File:
         """The SkyCiv render is written in javascript. We can use the webview to use it. However the webview only uses a single
-        html file. We therefor use the jinja utility to build the html file.
+        html file. We therefor build the html file from a template, with the renderer, model and results written straight
+        into the file.
+
+        :param results: The json string of the results
         """
 
         # We use two renders, one for designing and one for the results
@@ -203,62 +239,61 @@ class BuildingFrame:
 
         # Build the html file
         path = Path(__file__).parent.parent / "lib"  # Get the path to the directory of the files we need
-        url = (
-            "https://api.skyciv.com/dist/v3/javascript/skyciv-renderer-dist-2.0.0.js"  # The url to the skyciv renderer
-        )
-        renderer = get_renderer(url)  # Request the renderer, uses viktor.utils.memoize so only gets called once
+        renderer = get_renderer_asset().script()  # Inlined, compressed or referenced, see SKYCIV_RENDERER_MODE
         context = {
             "renderer": renderer,
-            "model": self.get(),
+            "model": self.get(),  # The compact json, the geometry is written straight from its arrays
             "mode": mode,
-            "results": "{{ results }}",
-        }  # Create the context to use with jinja
-        with open(path / "renderer.html.jinja", "rb") as template:  # Open the html file to be used as jinja template
-            filedata = render_jinja_template(template, context)  # Build the html file using the template and context
-
-        # Results can be too big for render_jinja_template, so we do it in two steps
-        context = {"results": results}
-        with filedata.open_binary() as f:
-            filedata = render_jinja_template(f, context)
-        return filedata  # The return type of the jinja utility is already an viktor.core.File
+            "results": encode_results(results),  # The json as it is, or packed, see SKYCIV_RESULTS_ENCODING
+        }
+        page = write_page(path / "renderer.html.jinja", context)
+        with page.open_binary() as f:
+            set_attribute("bytes", f.seek(0, 2))
+        return page
 
     def get_snow_load(self) -> float:
         """Uses the wind and snow calculator from SkyCiv to get the potential pressure of the snow in the given location.
-        Because this is an extra api call it will increase the processing time.
+        Because this is an extra api call it will increase the processing time, so the snow load of every site is cached.
         """
-        # Build the api object
-        ao = build_api_object()
-
-        # Get the template for the arguments for this call
-        with open(Path(__file__).parent.parent / "lib" / "load_function_arguments.json") as f:
-            arguments = json.load(f)
-
-        # Parse the template
-        arguments["site_data"]["lat"] = self.lat
-        arguments["site_data"]["lng"] = self.lng
-        arguments["building_data"]["building_dimensions"]["length"] = self.length_office
-        arguments["building_data"]["building_dimensions"]["width"] = self.width_office
-        arguments["building_data"]["building_dimensions"]["ground_to_top"] = self.height
-
-        # Add functions to the call
-        ao.functions.add("standalone.loads.start", {"keep_open": True})
-        ao.functions.add("standalone.loads.getLoads", arguments)
-
-        # Call the API
-        response = ao.request()["response"]
-        if response["status"] == 0:
-            snow_load = response["data"]["snow_data"]["snow_load"]
-        else:
-            # If status == 1, skyciv has given an error
-            msg = response["msg"]
-            raise UserException(msg)
+        arguments = get_snow_load_arguments(self.lat, self.lng, self.length_office, self.width_office, self.height)
+        return get_snow_load(arguments)
 
-        return snow_load
+    def get_model_object(self) -> dict:
+        """Get the model dictionary, like skyciv.Model.get(). It is put together from the cached geometry and loads, the
+        loads are shared with other frames and must not be changed.
+        """
+        if not self._staged:
+            return self.model.get()
+        geometry = self.geometry.model_object()
+        loads = LOADS.get_or_create(self.loads_key, self._get_loads_object)
+        return {name: geometry[name] if name in geometry else loads[name] for name in vars(self._model)}
+
+    def get_model_payload(self) -> dict:
+        """Get the model dictionary to serialise, for the requests and the page. It is the same as get_model_object, but
+        the nodes, members and supports are RawJson, written straight from the arrays of the geometry.
+        """
+        if not self._staged:
+            return self.model.get()
+        geometry = self.geometry.model_payload()
+        loads = LOADS.get_or_create(self.loads_key, self._get_loads_object)
+        return {name: geometry[name] if name in geometry else loads[name] for name in vars(self._model)}
+
+    def _get_loads_object(self) -> dict:
+        """Get the model dictionary of the load collections."""
+        return {
+            name: value.get() if has_get_method(value) else copy.deepcopy(value)
+            for name, value in vars(self._model).items()
+            if name not in GEOMETRY_ATTRIBUTES
+        }
 
     def set(self, model_object: dict) -> None:
         """Set individual properties of the model object."""
+        # A whole model replaces the geometry, so it does not have to be built. Only the collections are replaced, the
+        # shared geometry is not changed.
+        self._has_geometry = self._has_geometry or all(name in model_object for name in GEOMETRY_ATTRIBUTES)
         self.model.set(model_object)
+        self._staged = False  # The model no longer matches the stages
 
     def get(self) -> str:
-        """Get the json string of the model. Used for the renderer."""
-        return json.dumps(self.model.get(), indent=4)
+        """Get the canonical json string of the model."""
+        return dumps(self.get_model_payload())
@@ -0,0 +1,53 @@
+import functools
+import json
+import re
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import TextIO
+from typing import Tuple
+from typing import Union
+
+from viktor.core import File
+
+PLACEHOLDER = re.compile(r"{{\s*(\w+)\s*}}")
+JSON_SEPARATORS = (",", ":")  # Compact json, the indentation only makes the page bigger
+
+
+@functools.lru_cache()
+def parse_template(path: Path) -> List[Tuple[str, str]]:
+    """Split a template in the text before every placeholder and the name of that placeholder. The last part has no
+    placeholder, its name is an empty string. Only plain {{ name }} placeholders are supported, which is all the renderer
+    template needs, so the template is parsed once instead of rendered with Jinja for every page.
+    """
+    template = Path(path).read_text(encoding="utf-8")
+    parts, start = [], 0
+    for match in PLACEHOLDER.finditer(template):
+        parts.append((template[start : match.start()], match.group(1)))
+        start = match.end()
+    parts.append((template[start:], ""))
+    return parts
+
+
+def write_value(f: TextIO, value: Union[str, dict, list]) -> None:
+    """Write a value into the page. Strings, like the renderer or a json string, are written as they are. Dictionaries and
+    lists are written as compact json. They are encoded in one go and written at once, as json.dump encodes and writes
+    them in many small chunks, which is about a hundred times slower.
+    """
+    if isinstance(value, str):
+        f.write(value)
+    else:
+        f.write(json.dumps(value, separators=JSON_SEPARATORS))
+
+
+def write_page(template: Path, context: Dict[str, Union[str, dict, list]]) -> File:
+    """Write the page of a template straight into a File, every placeholder is replaced by its value in the context."""
+    page = File()
+    with page.open(encoding="utf-8") as f:
+        for text, name in parse_template(template):
+            f.write(text)
+            if name:
+                if name not in context:
+                    raise KeyError(f"The template {Path(template).name} needs a value for {name}")
+                write_value(f, context[name])
+    return page
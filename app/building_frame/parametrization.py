@@ -11,7 +11,11 @@ from viktor.parametrization import Step
 from viktor.parametrization import Tab
 from viktor.parametrization import Text
 
-from .constants import PROFILE_OPTIONS
+from .constants import ENGINE_OPTIONS
+from .constants import RESULT_SET_OPTIONS
+from .sections import get_catalogue
+
+PROFILE_OPTIONS = get_catalogue().options()
 
 
 class SkyCivParametrization(Parametrization):
@@ -54,6 +58,12 @@ class SkyCivParametrization(Parametrization):
     step_call.information = Text(
         "Clicking the reload button will send a request to SkyCiv. If you have provided your own credentials you can also view the model from the [dashboard](https://platform.skyciv.com/dashboard)."
     )
+    step_call.engine = OptionField(
+        "Analysis engine",
+        options=ENGINE_OPTIONS,
+        default="skyciv",
+        description="SkyCiv solves the model in the cloud. The local engine solves it on the server, which is faster and does not use API credits, but has no analysis report.",
+    )
     step_call.self_weight = BooleanField(
         "Self weight", default=True, description="The weight of the materials on the model."
     )
@@ -69,4 +79,10 @@ class SkyCivParametrization(Parametrization):
     step_call.floor_pressure = NumberField(
         "Weight", default=1, suffix="kg/m^2", step=1, visible=Lookup("step_call.floor_load")
     )
+    step_call.result_set = OptionField(
+        "Results",
+        options=RESULT_SET_OPTIONS,
+        default="loads",
+        description="The results of all loads together, or the envelope of the EN 1990 load combinations of the ultimate (ULS) or serviceability (SLS) limit state. The envelopes are solved with the local engine.",
+    )
     step_call.download_solve = DownloadButton("Download solve", method="download_solve")
@@ -0,0 +1,201 @@
+"""The SkyCiv renderer, a few MB of javascript, as a versioned asset.
+
+The renderer is taken from the bundle of the app in app/lib/renderer, or else downloaded from the SkyCiv CDN once and
+kept on disk, so later cold starts do not download it again. The copies are written atomically, so they are never half
+written. The sha256 digest of every version is pinned in RENDERER_SHA256 (or set with SKYCIV_RENDERER_SHA256), and the
+copies and every download are checked against it. A version without a pinned digest is used, but is not verified: the
+asset says so in its verified attribute and in the trace. Download the renderer into the bundle and print its digest, to
+pin it, with:
+
+    python -m app.building_frame.renderer_assets --bundle
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict
+from typing import Optional
+from typing import Union
+
+from viktor.core import UserException
+
+from .tracing import set_attribute
+from .transport import get_transport
+
+RENDERER_VERSION = "2.0.0"
+RENDERER_URL = "https://api.skyciv.com/dist/v3/javascript/skyciv-renderer-dist-{version}.js"
+DEFAULT_DIRECTORY = Path(tempfile.gettempdir()) / "skyciv-renderer"
+BUNDLE_DIRECTORY = Path(__file__).parent.parent / "lib" / "renderer"  # Shipped with the app, filled by main
+
+# The sha256 digest of every renderer version, the copies and downloads must match it. 2.0.0 still has to be pinned:
+# the CDN could not be reached when this was written, run this module with --bundle to get the digest of a version.
+RENDERER_SHA256: Dict[str, str] = {}
+
+# How the renderer ends up in the page:
+# inline: the script is embedded in every page, as it always was
+# compress: the script is embedded gzipped and base64 encoded, and unpacked by the browser (needs DecompressionStream)
+# reference: the page only refers to the url of the renderer, so the browser downloads it once and caches it
+RENDERER_MODES = ("inline", "compress", "reference")
+DEFAULT_MODE = "inline"
+
+COMPRESSED_SCRIPT = """<script>
+    const rendererReady = (async () => {
+        const bytes = Uint8Array.from(atob("%s"), (c) => c.charCodeAt(0));
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+        const script = document.createElement("script");
+        script.text = await new Response(stream).text();
+        document.head.appendChild(script);
+    })();
+</script>"""
+
+
+def sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class RendererAsset:
+    """A version of the SkyCiv renderer, loaded once per process from the bundle, the copy on disk or the network. After
+    it is loaded, verified tells whether it matched a pinned digest.
+
+    :param sha256: The expected digest of the renderer, defaults to SKYCIV_RENDERER_SHA256 or the digest pinned for the
+        version in RENDERER_SHA256. Without one the renderer is not checked, and not verified.
+    :param bundle: The directory of the bundled copy, defaults to app/lib/renderer
+    """
+
+    def __init__(
+        self,
+        version: str = None,
+        directory: Union[str, Path] = None,
+        url: str = None,
+        sha256: str = None,
+        bundle: Union[str, Path] = None,
+    ):
+        self.version = version or os.environ.get("SKYCIV_RENDERER_VERSION", RENDERER_VERSION)
+        self.directory = Path(directory or os.environ.get("SKYCIV_RENDERER_DIRECTORY", DEFAULT_DIRECTORY))
+        self.url = url or os.environ.get("SKYCIV_RENDERER_URL") or RENDERER_URL.format(version=self.version)
+        self.sha256 = sha256 or os.environ.get("SKYCIV_RENDERER_SHA256") or RENDERER_SHA256.get(self.version)
+        self.bundle = Path(bundle or BUNDLE_DIRECTORY)
+        self.filename = f"skyciv-renderer-dist-{self.version}.js"
+        self.verified = False
+
+        self._lock = threading.Lock()
+        self._content: Optional[bytes] = None
+        self._compressed: Optional[str] = None
+
+    def _read(self, path: Path) -> Optional[bytes]:
+        """Read the copy of the renderer, returns None if it does not exist or does not match the pinned digest."""
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        return content if self.sha256 is None or sha256(content) == self.sha256 else None
+
+    def write(self, directory: Path, content: bytes) -> Path:
+        """Write a copy of the renderer. It is first written to a temporary file and then moved in place, so other
+        processes never read a half written copy.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / self.filename
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return path
+
+    def download(self) -> bytes:
+        """Download the renderer from the CDN, raises a UserException when it does not match the pinned digest."""
+        content = get_transport().get(self.url)
+        if self.sha256 and sha256(content) != self.sha256:
+            raise UserException(f"The checksum of the SkyCiv renderer from {self.url} does not match")
+        return content
+
+    def content(self) -> bytes:
+        """Get the javascript of the renderer: the bundled copy, else the copy on disk, else a download that is kept on
+        disk. Without a bundle and without network this raises a UserException that explains how to bundle it.
+        """
+        with self._lock:
+            if self._content is None:
+                content = self._read(self.bundle / self.filename)
+                source = "bundle"
+                if content is None:
+                    content = self._read(self.directory / self.filename)
+                    source = "disk"
+                if content is None:
+                    try:
+                        content = self.download()
+                    except UserException as error:
+                        raise UserException(
+                            f"The SkyCiv renderer {self.version} is not bundled and could not be downloaded, bundle it "
+                            f"with python -m app.building_frame.renderer_assets --bundle: {error}"
+                        ) from error
+                    self.write(self.directory, content)
+                    source = "download"
+                self.verified = self.sha256 is not None  # Every copy that is read or downloaded matched a pinned digest
+                self._content = content
+                set_attribute("renderer.source", source)
+                set_attribute("renderer.verified", self.verified)
+            return self._content
+
+    def compressed(self) -> str:
+        """Get the renderer gzipped and base64 encoded, minified javascript compresses to well under half its size."""
+        content = self.content()
+        with self._lock:
+            if self._compressed is None:
+                self._compressed = base64.b64encode(gzip.compress(content, mtime=0)).decode("ascii")
+            return self._compressed
+
+    def script(self, mode: str = None) -> str:
+        """Get the html that loads the renderer in a page. The page waits for the promise rendererReady before it uses the
+        renderer, which is only pending in the compress mode.
+        """
+        mode = (mode or os.environ.get("SKYCIV_RENDERER_MODE") or DEFAULT_MODE).lower()
+        if mode == "compress":
+            return COMPRESSED_SCRIPT % self.compressed()
+        ready = "<script>\n    const rendererReady = Promise.resolve();\n</script>"
+        if mode == "reference":
+            return f'<script src="{self.url}"></script>\n{ready}'
+        if mode == "inline":
+            return f"<script>\n{self.content().decode('utf-8')}\n</script>\n{ready}"
+        raise UserException(f"Unknown renderer mode {mode}, choose from {', '.join(RENDERER_MODES)}")
+
+
+_renderer_asset = None
+
+
+def get_renderer_asset() -> RendererAsset:
+    """Get the renderer asset of this process, configured with the environment variables."""
+    global _renderer_asset
+    if _renderer_asset is None:
+        _renderer_asset = RendererAsset()
+    return _renderer_asset
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.building_frame.renderer_assets",
+        description="Download the SkyCiv renderer and print its digest, to pin it.",
+    )
+    parser.add_argument(
+        "--bundle", action="store_true", help="write it to the bundle of the app instead of the renderer directory"
+    )
+    args = parser.parse_args(argv)
+
+    asset = get_renderer_asset()
+    content = asset.download()
+    path = asset.write(asset.bundle if args.bundle else asset.directory, content)
+    digest = sha256(content)
+    print(f"Wrote {path} ({len(content)} bytes, sha256 {digest})")
+    if asset.sha256 is None:
+        print(f'The digest is not pinned yet, add "{asset.version}": "{digest}" to RENDERER_SHA256')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+from typing import Optional
+from typing import Union
+
+from .serialization import canonical_hash
+
+# The directory and size of the store can be set with environment variables, just like the SkyCiv credentials
+DEFAULT_DIRECTORY = Path(tempfile.gettempdir()) / "skyciv-results"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+EVICT_FRACTION = 1 / 32  # The store is evicted after this part of max_bytes is written
+EVICT_INTERVAL = 60  # Or after this many seconds, as other processes write to the store as well
+
+
+def request_key(api_object: Union[str, dict]) -> str:
+    """Get a content hash of a SkyCiv API request. The hash only depends on what SkyCiv will calculate: the model with its
+    loads and the functions with their analysis options. The credentials and session, including the functions that start
+    a session, are left out, and the keys are sorted so the same model always gives the same key.
+
+    :param api_object: The json made by ApiObject.to_json() or the dictionary made by ApiObject.get()
+    """
+    if isinstance(api_object, str):
+        api_object = json.loads(api_object)
+    functions = [f for f in api_object.get("functions", []) if not f["function"].startswith("S3D.session.")]
+    return canonical_hash({"options": api_object.get("options", {}), "functions": functions})
+
+
+class ResultStore:
+    """A content addressed store for SkyCiv responses on disk. Every entry is a json file named after its key, so the
+    store is shared between processes and survives restarts. Files are written atomically, and when the store grows
+    bigger than max_bytes the least recently used entries are removed. The size is not checked on every write, but after
+    a part of max_bytes is written or a minute has passed. A max_bytes of 0 keeps every entry.
+    """
+
+    def __init__(self, directory: Union[str, Path] = None, max_bytes: int = None):
+        if directory is None:
+            directory = os.environ.get("SKYCIV_RESULT_STORE", DEFAULT_DIRECTORY)
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("SKYCIV_RESULT_STORE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._written = 0  # Bytes written since the last eviction
+        self._evicted: Optional[float] = None  # The time of the last eviction
+        self._namespaces: Dict[str, ResultStore] = {}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Get an entry from the store, returns None if it is not stored."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        try:
+            os.utime(path)  # Mark the entry as recently used
+        except FileNotFoundError:
+            pass  # Evicted by another process in the meantime
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        """Write an entry to the store. The entry is first written to a temporary file and then moved in place, so other
+        processes never read a half written file.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, separators=(",", ":"))
+                size = f.tell()
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        if self._evict_due(size):
+            self.evict()
+
+    def _evict_due(self, size: int) -> bool:
+        """Count the bytes of a write, and whether the store should be evicted now. The first write evicts the entries
+        that were left by earlier processes.
+        """
+        if not self.max_bytes:
+            return False
+        with self._lock:
+            self._written += size
+            now = time.monotonic()
+            if (
+                self._evicted is not None
+                and self._written < self.max_bytes * EVICT_FRACTION
+                and now - self._evicted < EVICT_INTERVAL
+            ):
+                return False
+            self._written = 0
+            self._evicted = now
+            return True
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the store fits in max_bytes. The entries of namespaces are not
+        counted and not removed.
+        """
+        if not self.max_bytes:
+            return
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def namespace(self, name: str) -> "ResultStore":
+        """Get a store in a subdirectory of this store that is never evicted, for entries that must be kept, like the
+        records of running jobs.
+        """
+        with self._lock:
+            if name not in self._namespaces:
+                self._namespaces[name] = ResultStore(self.directory / name, max_bytes=0)
+            return self._namespaces[name]
+
+    def clear(self) -> None:
+        """Remove all entries from the store."""
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+_result_store = None
+
+
+def get_result_store() -> ResultStore:
+    """Get the result store of this process, configured with the environment variables."""
+    global _result_store
+    if _result_store is None:
+        _result_store = ResultStore()
+    return _result_store
@@ -0,0 +1,107 @@
+"""A compact encoding of the results for the renderer page.
+
+The results of large frames are tens of MB of json. With a compact encoding only the result keys that the page uses are
+sent, and every result that is a table of values per node or member, like {"12": {"0": 0.1, "25": 0.3, ...}}, is packed
+as a typed array: float32, or uint16 quantized between the minimum and maximum of the table. The array is gzipped and
+base64 encoded, decodeResults in renderer.html.jinja rebuilds the s3d_result object in the browser.
+"""
+import base64
+import gzip
+import json
+import os
+from typing import List
+from typing import Optional
+from typing import Union
+
+import numpy as np
+
+from viktor.core import UserException
+
+from .page import JSON_SEPARATORS
+
+RESULT_ENCODINGS = ("json", "float32", "uint16")
+DEFAULT_ENCODING = "json"
+DEFAULT_RESULT_KEYS = ["member_displacements"]  # The result that renderer.html.jinja shows
+DTYPES = {"float32": "<f4", "uint16": "<u2"}  # Little endian, like the typed arrays of every browser
+UINT16_MAX = 2**16 - 1
+
+
+def get_result_keys() -> List[str]:
+    """Get the result keys that the Results view uses, set with SKYCIV_RESULT_KEYS or member_displacements."""
+    return [k for k in os.environ.get("SKYCIV_RESULT_KEYS", "").split(",") if k] or DEFAULT_RESULT_KEYS
+
+
+def _table(result) -> Optional[np.ndarray]:
+    """Get a result as a table with a row per node or member, returns None if it is not a table with the same columns in
+    every row and only numbers.
+    """
+    if not isinstance(result, dict) or not result:
+        return None
+    rows = list(result.values())
+    if not all(isinstance(row, dict) for row in rows):
+        return None
+    columns = list(rows[0])
+    if any(list(row) != columns for row in rows):
+        return None
+    try:
+        values = np.array([list(row.values()) for row in rows], dtype=float)
+    except (TypeError, ValueError):
+        return None
+    return values if np.all(np.isfinite(values)) else None
+
+
+def pack_table(result: dict, encoding: str, compress: bool = True) -> Optional[dict]:
+    """Pack a result table as a typed array, returns None if the result is not a table."""
+    values = _table(result)
+    if values is None:
+        return None
+    table = {"ids": list(result), "columns": list(next(iter(result.values()))), "dtype": encoding}
+    if encoding == "uint16":
+        low, high = float(values.min()), float(values.max())
+        scale = (high - low) / UINT16_MAX or 1.0
+        values = np.rint((values - low) / scale)
+        table.update(offset=low, scale=scale)
+    data = values.astype(DTYPES[encoding]).tobytes()
+    if compress:
+        data = gzip.compress(data, mtime=0)
+    table.update(compressed=compress, data=base64.b64encode(data).decode("ascii"))
+    return table
+
+
+def encode_results(
+    results: Union[str, dict],
+    encoding: str = None,
+    keys: List[str] = None,
+    compress: bool = None,
+) -> str:
+    """Get the javascript expression of the results for the renderer page: the json itself, or a call to decodeResults
+    with the packed tables.
+
+    :param results: The results, as json string or dictionary
+    :param encoding: json, float32 or uint16, defaults to the environment variable SKYCIV_RESULTS_ENCODING or json
+    :param keys: The result keys to send with a compact encoding, defaults to SKYCIV_RESULT_KEYS or member_displacements
+    :param compress: Gzip the typed arrays, defaults to SKYCIV_RESULTS_COMPRESS or True
+    """
+    encoding = (encoding or os.environ.get("SKYCIV_RESULTS_ENCODING") or DEFAULT_ENCODING).lower()
+    if encoding not in RESULT_ENCODINGS:
+        raise UserException(f"Unknown results encoding {encoding}, choose from {', '.join(RESULT_ENCODINGS)}")
+    if encoding == "json":
+        return results if isinstance(results, str) else json.dumps(results, separators=JSON_SEPARATORS)
+
+    if keys is None:
+        keys = get_result_keys()
+    if compress is None:
+        compress = os.environ.get("SKYCIV_RESULTS_COMPRESS", "1") != "0"
+    if isinstance(results, str):
+        results = json.loads(results)
+
+    payload = {"json": {}, "tables": {}}
+    for key in keys:
+        if key not in results:
+            continue
+        table = pack_table(results[key], encoding, compress)
+        if table is None:
+            payload["json"][key] = results[key]  # Not a table, sent as it is
+        else:
+            payload["tables"][key] = table
+    return f"decodeResults({json.dumps(payload, separators=JSON_SEPARATORS)})"
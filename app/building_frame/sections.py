@@ -0,0 +1,89 @@
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Union
+
+import numpy as np
+
+from viktor.core import UserException
+from viktor.parametrization import OptionListElement
+
+SECTIONS = Path(__file__).parent.parent / "lib" / "sections.csv"
+FIELDS = ["width", "thickness", "mass", "area", "inertia", "section_modulus"]  # m, m, kg/m, m2, m4, m3
+SORTED_FIELDS = ["inertia", "section_modulus", "mass"]
+
+
+class SectionCatalogue:
+    """The properties of the SHS profiles, loaded once from a csv file into a structured array with a row per profile.
+
+    A designation is looked up in a dictionary with the row of every profile, the properties of many profiles at once are
+    taken from the columns of the array. For the inertia, section modulus and mass there is an index of the rows sorted by
+    that field, which is used for range queries and to find the profile that is nearest to a value.
+    """
+
+    def __init__(self, path: Union[str, Path] = SECTIONS):
+        dtype = [("designation", "U24")] + [(field, "f8") for field in FIELDS]
+        self.data = np.loadtxt(path, dtype=dtype, delimiter=",", skiprows=1, ndmin=1)
+        self.designations: List[str] = self.data["designation"].tolist()
+        self._rows: Dict[str, int] = {designation: row for row, designation in enumerate(self.designations)}
+        self._sorted = {field: np.argsort(self.data[field], kind="stable") for field in SORTED_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.designations)
+
+    def __contains__(self, designation: str) -> bool:
+        return designation in self._rows
+
+    def row(self, designation: str) -> int:
+        """Get the row of a profile in the catalogue."""
+        try:
+            return self._rows[designation]
+        except KeyError:
+            raise UserException(f"{designation} is not in the section catalogue")
+
+    def rows(self, designations: List[str]) -> np.ndarray:
+        """Get the rows of many profiles, e.g. to take a property of every member from a column."""
+        return np.array([self.row(designation) for designation in designations], dtype=int)
+
+    def get(self, designation: str) -> Dict[str, float]:
+        """Get all properties of a profile."""
+        record = self.data[self.row(designation)]
+        return {field: float(record[field]) for field in FIELDS}
+
+    def property(self, designation: str, field: str) -> float:
+        """Get one property of a profile."""
+        return float(self.data[field][self.row(designation)])
+
+    def sorted_by(self, field: str) -> List[str]:
+        """Get the designations sorted by a field, from small to large."""
+        return [self.designations[row] for row in self._sorted[field]]
+
+    def between(self, field: str, low: float = -np.inf, high: float = np.inf) -> List[str]:
+        """Get the designations with a value of the field within [low, high], sorted by that field."""
+        order = self._sorted[field]
+        values = self.data[field][order]
+        start, end = np.searchsorted(values, low, side="left"), np.searchsorted(values, high, side="right")
+        return [self.designations[row] for row in order[start:end]]
+
+    def nearest(self, field: str, value: float) -> str:
+        """Get the designation with the value of the field that is nearest to the value."""
+        order = self._sorted[field]
+        values = self.data[field][order]
+        index = int(np.searchsorted(values, value))
+        candidates = [i for i in (index - 1, index) if 0 <= i < len(values)]
+        return self.designations[order[min(candidates, key=lambda i: abs(values[i] - value))]]
+
+    def options(self) -> List[OptionListElement]:
+        """Get the options of an OptionField with all profiles in the catalogue."""
+        return [OptionListElement(label=d.replace("SHS", "SHS "), value=d) for d in self.designations]
+
+
+_catalogue = None
+
+
+def get_catalogue() -> SectionCatalogue:
+    """Get the section catalogue, it is loaded the first time it is needed."""
+    global _catalogue
+    if _catalogue is None:
+        _catalogue = SectionCatalogue()
+    return _catalogue
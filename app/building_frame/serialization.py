@@ -0,0 +1,87 @@
+"""Canonical json of SkyCiv models and requests.
+
+The json is compact and its keys are sorted, so equal models always give the same json and the same hash. The json for
+the wire is made with orjson when orjson 3.9 or later is installed, older versions cannot write RawJson and are not used.
+The hash is always made from the json of the standard encoder, as orjson writes some floats differently (e.g. 1e-05 as
+0.00001), so the keys in the result store do not depend on whether orjson is installed.
+
+Parts of a value can be given as RawJson, json that is already encoded, like the nodes and members that FrameGeometry
+writes straight from its arrays. They are written as they are, so they must be canonical json themselves.
+"""
+import hashlib
+import json
+from typing import Iterator
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, without it the standard json encoder is used
+    orjson = None
+if orjson is not None and not hasattr(orjson, "Fragment"):  # RawJson is written as a Fragment, new in orjson 3.9
+    orjson = None
+
+SEPARATORS = (",", ":")
+HASH_BYTES = 16  # A 128-bit hash, plenty to tell models apart and short enough for file names
+SPLIT_ITEMS = 16  # Containers with up to this many items are hashed per item, larger ones are encoded in one go
+SPLIT_DEPTH = 6  # The deepest container that is split, a request holds the model collections at depth 5
+
+_ENCODER = json.JSONEncoder(sort_keys=True, separators=SEPARATORS, ensure_ascii=False)
+
+
+class RawJson:
+    """Json that is already encoded, to put in a value that is serialised with dumps or hashed with canonical_hash."""
+
+    __slots__ = ("json",)
+
+    def __init__(self, json: str):
+        self.json = json
+
+
+def _orjson_default(value):
+    if isinstance(value, RawJson):
+        return orjson.Fragment(value.json)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value) -> str:
+    """Get the compact json of a value with sorted keys."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_orjson_default, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+    return "".join(iter_canonical(value))
+
+
+def iter_canonical(value, depth: int = 0) -> Iterator[str]:
+    """Get the canonical json of a value in parts. The small containers at the top, like a request, its functions and the
+    model, are split, the large ones below them, like the nodes and members of a model, are encoded in one go. So the
+    whole json is never held in memory at once, while every part is still encoded by the fast C encoder of json. The
+    joined parts are the same as the json of the standard encoder with sorted keys. A container with RawJson in it is
+    always split, so the RawJson is written as it is.
+    """
+    if isinstance(value, RawJson):
+        yield value.json
+    elif isinstance(value, dict) and (
+        depth < SPLIT_DEPTH and len(value) <= SPLIT_ITEMS or any(isinstance(v, RawJson) for v in value.values())
+    ):
+        yield "{"
+        for i, key in enumerate(sorted(value)):
+            yield f'{"," if i else ""}{_ENCODER.encode(str(key))}:'
+            yield from iter_canonical(value[key], depth + 1)
+        yield "}"
+    elif depth < SPLIT_DEPTH and isinstance(value, (list, tuple)) and len(value) <= SPLIT_ITEMS:
+        yield "["
+        for i, item in enumerate(value):
+            if i:
+                yield ","
+            yield from iter_canonical(item, depth + 1)
+        yield "]"
+    else:
+        yield _ENCODER.encode(value)
+
+
+def canonical_hash(value) -> str:
+    """Get a 128-bit blake2b hash of a json serialisable value. The keys are sorted so equal values always give the same
+    hash. The json is hashed while it is encoded, see iter_canonical.
+    """
+    digest = hashlib.blake2b(digest_size=HASH_BYTES)
+    for part in iter_canonical(value):
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,41 @@
+import os
+import threading
+import time
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+DEFAULT_TTL = 10 * 60  # SkyCiv closes sessions that are idle for too long, so only recently used sessions are reused
+
+
+class SessionPool:
+    """Keeps the ids of open SkyCiv sessions that are not in use, so a request can run in an open session instead of
+    starting a new one. A session is only used by one request at a time: it is taken out of the pool for the request and
+    put back with the session id of the response. Sessions that are idle longer than the time to live are dropped.
+    A time to live of 0 turns the reuse of sessions off.
+    """
+
+    def __init__(self, ttl: float = None):
+        self.ttl = ttl if ttl is not None else float(os.environ.get("SKYCIV_SESSION_TTL", DEFAULT_TTL))
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[str, float]] = []  # Session id and the time it was last used
+
+    def acquire(self) -> Optional[str]:
+        """Take the most recently used open session out of the pool, returns None if there is none."""
+        with self._lock:
+            now = time.monotonic()
+            self._idle = [(session_id, used) for session_id, used in self._idle if now - used < self.ttl]
+            return self._idle.pop()[0] if self._idle else None
+
+    def release(self, session_id: Optional[str]) -> None:
+        """Put an open session back in the pool after a request."""
+        if session_id and self.ttl > 0:
+            with self._lock:
+                self._idle.append((session_id, time.monotonic()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._idle = []
+
+
+SESSIONS = SessionPool()
@@ -0,0 +1,79 @@
+import threading
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+
+class _Call:
+    """A call that is in flight. The callers that join it wait for the event."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Makes sure that concurrent callers with the same key share one call. The first caller executes the function, the
+    other callers wait for it and all get the same result (or the same exception).
+
+    The counters keep track of how the calls were served:
+    - hits: the result was already available, e.g. in the result store
+    - joins: the caller waited on a call that was already in flight
+    - misses: the caller executed the function itself
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._counters = {"hits": 0, "joins": 0, "misses": 0}
+
+    def do(self, key: str, function: Callable[[], Any], lookup: Callable[[], Any] = None) -> Any:
+        """Execute the function once for all concurrent callers with this key.
+
+        :param key: The key of the request, callers with the same key share the call
+        :param function: The function to execute, without arguments
+        :param lookup: Optional function to get an already available result, returns None if there is none
+        """
+        if lookup is not None:
+            result = lookup()
+            if result is not None:
+                self._count("hits")
+                return result
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._counters["misses"] += 1
+            else:
+                self._counters["joins"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Get the counters of the hits, joins and misses."""
+        with self._lock:
+            return dict(self._counters)
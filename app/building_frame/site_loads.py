@@ -0,0 +1,204 @@
+import csv
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from viktor.core import UserException
+
+from .result_store import ResultStore
+from .serialization import canonical_hash
+from .single_flight import SingleFlight
+from .skyciv_functions import build_api_object
+from .tracing import propagate
+from .tracing import record_cache
+from .tracing import traced
+from .transport import get_transport
+
+LOAD_FUNCTION_ARGUMENTS = Path(__file__).parent.parent / "lib" / "load_function_arguments.json"
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Snow zones are coarse, so all sites within a geo cell share their loads. Precision 5 is a cell of about 5 x 5 km
+DEFAULT_PRECISION = 5
+DEFAULT_DIRECTORY = Path(tempfile.gettempdir()) / "skyciv-site-loads"
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024  # 16 MB
+DEFAULT_TTL = 30 * 24 * 60 * 60  # 30 days
+
+SNOW_LOADS = SingleFlight()  # Concurrent snow load lookups for the same site wait for a single request
+_lookups = ThreadPoolExecutor(max_workers=4, thread_name_prefix="snow-load")  # Runs lookups next to the model build
+
+
+def get_snow_load_arguments(lat: float, lng: float, length: float, width: float, height: float) -> dict:
+    """Parse the template of the arguments for the wind and snow calculator with the site and building dimensions."""
+    with open(LOAD_FUNCTION_ARGUMENTS) as f:
+        arguments = json.load(f)
+
+    # Floats everywhere, so 20 and 20.0 give the same cache key
+    arguments["site_data"]["lat"] = float(lat)
+    arguments["site_data"]["lng"] = float(lng)
+    arguments["building_data"]["building_dimensions"]["length"] = float(length)
+    arguments["building_data"]["building_dimensions"]["width"] = float(width)
+    arguments["building_data"]["building_dimensions"]["ground_to_top"] = float(height)
+    return arguments
+
+
+def geo_cell(lat: float, lng: float, precision: int) -> Tuple[str, float, float]:
+    """Get the geohash of the cell that contains the location, together with the latitude and longitude of the center of
+    that cell. Every extra character of precision makes the cell 4 to 8 times smaller.
+    """
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    cell = ""
+    bits, bit, even = 0, 0, True
+    while len(cell) < precision:
+        interval, value = (lng_range, lng) if even else (lat_range, lat)  # Bits alternate between lng and lat
+        mid = (interval[0] + interval[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            interval[0] = mid
+        else:
+            bits = bits * 2
+            interval[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            cell += GEOHASH_ALPHABET[bits]
+            bits, bit = 0, 0
+    return cell, (lat_range[0] + lat_range[1]) / 2, (lng_range[0] + lng_range[1]) / 2
+
+
+class SiteLoadCache:
+    """A persistent cache for the loads of a site. Sites are bucketed in geo cells, so moving the building a few metres
+    does not need a new lookup. The key is made of the geo cell, the building dimensions and all the other fields of the
+    load function template. Entries expire after the time to live, and the size of the cache is bounded.
+    """
+
+    def __init__(
+        self, directory: Union[str, Path] = None, precision: int = None, ttl: float = None, max_bytes: int = None
+    ):
+        if directory is None:
+            directory = os.environ.get("SKYCIV_SITE_LOAD_CACHE", DEFAULT_DIRECTORY)
+        if precision is None:
+            precision = int(os.environ.get("SKYCIV_SITE_LOAD_PRECISION", DEFAULT_PRECISION))
+        if ttl is None:
+            ttl = float(os.environ.get("SKYCIV_SITE_LOAD_TTL", DEFAULT_TTL))
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("SKYCIV_SITE_LOAD_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.precision = precision
+        self.ttl = ttl
+        self.store = ResultStore(directory, max_bytes)
+
+    def bucket(self, arguments: dict) -> dict:
+        """Move the site of the arguments to the center of its geo cell, so every site in the cell is looked up the same."""
+        arguments = json.loads(json.dumps(arguments))  # Copy, so the arguments of the caller are left alone
+        site = arguments["site_data"]
+        _, site["lat"], site["lng"] = geo_cell(site["lat"], site["lng"], self.precision)
+        return arguments
+
+    def key(self, arguments: dict) -> str:
+        return "snow-" + canonical_hash(self.bucket(arguments))
+
+    def get(self, arguments: dict) -> Optional[float]:
+        """Get the snow load of the site, returns None if it has not been looked up or has expired."""
+        entry = self.store.get(self.key(arguments))
+        if entry is None or time.time() - entry["created"] > self.ttl:
+            return None
+        return entry["snow_load"]
+
+    def put(self, arguments: dict, snow_load: float) -> None:
+        self.store.put(self.key(arguments), {"snow_load": snow_load, "created": time.time()})
+
+
+_site_load_cache = None
+
+
+def get_site_load_cache() -> SiteLoadCache:
+    """Get the site load cache of this process, configured with the environment variables."""
+    global _site_load_cache
+    if _site_load_cache is None:
+        _site_load_cache = SiteLoadCache()
+    return _site_load_cache
+
+
+def get_cached_snow_load(arguments: dict) -> Optional[float]:
+    """Get the snow load from the site load cache, returns None if this site has not been looked up before."""
+    return get_site_load_cache().get(arguments)
+
+
+@traced("site_loads.snow_load")
+def get_snow_load(arguments: dict) -> float:
+    """Get the snow load for the arguments. The snow load is looked up in the site load cache first, so every geo cell
+    and design code is only requested once from SkyCiv.
+    """
+    cache = get_site_load_cache()
+    key = cache.key(arguments)
+
+    def lookup() -> Optional[float]:
+        snow_load = cache.get(arguments)
+        record_cache("site_loads", snow_load is not None)
+        return snow_load
+
+    return SNOW_LOADS.do(key, lambda: _request_and_store(arguments), lookup=lookup)
+
+
+def prefetch_snow_load(arguments: dict) -> Tuple[Future, bool]:
+    """Start getting the snow load in the background, so the lookup overlaps with building the model. Returns the
+    future of the snow load and whether it was already in the cache, in which case no request is made.
+    """
+    snow_load = get_cached_snow_load(arguments)
+    if snow_load is not None:
+        future = Future()
+        future.set_result(snow_load)
+        return future, True
+    return _lookups.submit(propagate(get_snow_load), arguments), False
+
+
+def _request_and_store(arguments: dict) -> float:
+    cache = get_site_load_cache()
+    snow_load = request_snow_load(cache.bucket(arguments))  # Request the center of the cell
+    cache.put(arguments, snow_load)
+    return snow_load
+
+
+def prewarm_site_loads(path: Union[str, Path]) -> int:
+    """Look up the snow loads of the project sites in a csv file, so the views do not have to.
+    The csv file needs a header with the columns lat, lng, length, width and height (all in m). Sites that are already
+    in the cache are skipped. Returns the number of sites that have been requested.
+    """
+    cache = get_site_load_cache()
+    requested = 0
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            arguments = get_snow_load_arguments(
+                float(row["lat"]), float(row["lng"]), float(row["length"]), float(row["width"]), float(row["height"])
+            )
+            if cache.get(arguments) is None:
+                get_snow_load(arguments)
+                requested += 1
+    return requested
+
+
+def request_snow_load(arguments: dict) -> float:
+    """Uses the wind and snow calculator from SkyCiv to get the potential pressure of the snow with the parsed arguments."""
+    # Build the api object
+    ao = build_api_object()
+
+    # Add functions to the call
+    ao.functions.add("standalone.loads.start", {"keep_open": True})
+    ao.functions.add("standalone.loads.getLoads", arguments)
+
+    # Call the API
+    response = get_transport().request_api(ao.get())["response"]
+    if response["status"] == 0:
+        snow_load = response["data"]["snow_data"]["snow_load"]
+    else:
+        # If status == 1, skyciv has given an error
+        msg = response["msg"]
+        raise UserException(msg)
+
+    return snow_load
@@ -0,0 +1,187 @@
+import copy
+import json
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import numpy as np
+from munch import Munch
+
+from viktor.core import UserException
+
+from .model import BuildingFrame
+from .sections import get_catalogue
+from .skyciv_functions import build_request
+from .solver import solve_model
+from .summary import model_mass
+from .summary import summarise_results
+
+GROUPS = ["columns", "beams", "braces"]  # In the order of the section ids of the model
+
+# The profiles in the catalogue sorted by their inertia, so the stiffness increases with the index
+PROFILES_BY_INERTIA = get_catalogue().sorted_by("inertia")
+
+
+def _with_sections(model_object: dict, profiles: Tuple[str, str, str]) -> dict:
+    """Get a copy of the model with other profiles, only the sections are copied as the rest stays the same."""
+    model_object = dict(model_object)
+    model_object["sections"] = copy.deepcopy(model_object["sections"])
+    for section_id, profile in enumerate(profiles, start=1):
+        model_object["sections"][str(section_id)]["load_section"][-1] = profile
+    return model_object
+
+
+def _max_stress(model_object: dict, results: dict) -> Dict[str, float]:
+    """Get the maximum stress (MPa) per member group: the axial stress plus the bending stress about both axes."""
+    catalogue = get_catalogue()
+    sections = {k: catalogue.get(s["load_section"][-1]) for k, s in model_object["sections"].items()}
+    stress = {group: 0.0 for group in GROUPS}
+    for member_id, member in model_object["members"].items():
+        properties = sections[str(member["section_id"])]
+        axial = np.abs(list(results["axial_force"][member_id].values())) / properties["area"]
+        bending_y = np.abs(list(results["bending_moment_y"][member_id].values()))
+        bending_z = np.abs(list(results["bending_moment_z"][member_id].values()))
+        bending = (bending_y + bending_z) / properties["section_modulus"]
+        group = GROUPS[member["section_id"] - 1]
+        stress[group] = max(stress[group], float(np.max(axial + bending)) / 1000)  # kPa to MPa
+    return stress
+
+
+class SectionSizer:
+    """Searches the lightest profiles for the columns, beams and braces for which the frame stays within a displacement
+    and/or stress limit.
+
+    The profiles are sorted by inertia, so the smallest feasible profile can be found by bisection in a logarithmic
+    number of solves instead of one per profile. First all groups get the same profile, then every group is bisected on
+    its own while the others keep their profile, the heaviest group first. The passes are repeated, each warm started
+    from the previous one, until no profile changes. Every evaluated combination is cached. At last the lightest profile
+    that is at least as stiff as the found one is tried per group, since the lightest profile is not always the one with
+    the least inertia.
+    """
+
+    def __init__(
+        self,
+        params: Munch,
+        max_displacement: float = None,
+        max_stress: float = None,
+        engine: str = "local",
+        max_passes: int = 3,
+    ):
+        """
+        :param params: The params of the frame, the selected profiles are used as warm start
+        :param max_displacement: The maximum displacement (mm)
+        :param max_stress: The maximum stress (MPa), only available with the local engine
+        :param engine: The analysis engine, "local" or "skyciv"
+        """
+        if max_displacement is None and max_stress is None:
+            raise UserException("Give a maximum displacement, a maximum stress or both to size the sections")
+        if max_stress is not None and engine != "local":
+            raise UserException("The stress limit needs the member forces of the local analysis engine")
+        self.max_displacement = max_displacement
+        self.max_stress = max_stress
+        self.engine = engine
+        self.max_passes = max_passes
+
+        building_frame = BuildingFrame(params)
+        building_frame.add_loads()
+        self.model_object = building_frame.get_model_object()
+        materials = params.step_design.frame.materials
+        self.start = (materials.columns, materials.beams, materials.braces)
+        self.groups = [0, 1, 2] if building_frame.add_braces else [0, 1]  # Without braces their profile does not matter
+
+        self.solves = 0
+        self._evaluations: Dict[Tuple[str, str, str], Tuple[bool, dict]] = {}
+
+    def _solve(self, model_object: dict) -> dict:
+        if self.engine == "local":
+            return solve_model(model_object)
+        from .controller import evaluate_skyciv  # The controller and its views are only needed to size with SkyCiv
+
+        return json.loads(evaluate_skyciv(build_request(model_object))["results"])
+
+    def evaluate(self, profiles: Tuple[str, str, str]) -> Tuple[bool, dict]:
+        """Solve the frame with these profiles, returns whether it is within the limits and the governing values."""
+        if profiles not in self._evaluations:
+            model_object = _with_sections(self.model_object, profiles)
+            results = self._solve(model_object)
+            self.solves += 1
+            summary = summarise_results(results)
+            feasible = True
+            if self.max_displacement is not None:
+                feasible &= summary["max_displacement"] <= self.max_displacement
+            if self.max_stress is not None:
+                summary["max_stress"] = max(_max_stress(model_object, results).values())
+                feasible &= summary["max_stress"] <= self.max_stress
+            summary["mass"] = model_mass(model_object)
+            self._evaluations[profiles] = (feasible, summary)
+        return self._evaluations[profiles]
+
+    def _group_mass(self, profiles: Tuple[str, str, str]) -> List[float]:
+        """Get the steel mass (kg) per member group."""
+        model_object = _with_sections(self.model_object, profiles)
+        return [model_mass(model_object, section_id=group + 1) for group in range(len(GROUPS))]
+
+    def _replace(self, profiles: Tuple[str, str, str], group: int, profile: str) -> Tuple[str, str, str]:
+        profiles = list(profiles)
+        profiles[group] = profile
+        return tuple(profiles)
+
+    def _bisect(self, high: int, feasible: Callable[[int], bool]) -> int:
+        """Find the smallest index in PROFILES_BY_INERTIA that is feasible, the high index is known to be feasible."""
+        low = 0
+        while low < high:
+            middle = (low + high) // 2
+            if feasible(middle):
+                high = middle
+            else:
+                low = middle + 1
+        return high
+
+    def _uniform(self, profiles: Tuple[str, str, str], index: int) -> Tuple[str, str, str]:
+        """Give every group that can change the same profile."""
+        return tuple(PROFILES_BY_INERTIA[index] if g in self.groups else p for g, p in enumerate(profiles))
+
+    def size(self) -> dict:
+        """Size the sections. Returns the chosen profiles, the number of solves and the mass and governing values."""
+        # Warm start: if the selected profiles suffice, no group needs a stiffer profile than the stiffest selected one
+        indices = [PROFILES_BY_INERTIA.index(self.start[g]) for g in self.groups]
+        high = max(indices) if self.evaluate(self.start)[0] else len(PROFILES_BY_INERTIA) - 1
+        if not self.evaluate(self._uniform(self.start, high))[0]:
+            raise UserException("Even the largest profiles do not meet the limits")
+
+        # First the same profile for all groups, then every group on its own, the heaviest group first
+        index = self._bisect(high, lambda i: self.evaluate(self._uniform(self.start, i))[0])
+        profiles = self._uniform(self.start, index)
+        mass = self._group_mass(profiles)
+        groups = sorted(self.groups, key=lambda g: -mass[g])
+        for _ in range(self.max_passes):
+            previous = profiles
+            for group in groups:
+                index = self._bisect(
+                    PROFILES_BY_INERTIA.index(profiles[group]),
+                    lambda i: self.evaluate(self._replace(profiles, group, PROFILES_BY_INERTIA[i]))[0],
+                )
+                profiles = self._replace(profiles, group, PROFILES_BY_INERTIA[index])
+            if profiles == previous:
+                break
+
+        # Try the lightest profile that is at least as stiff, per group
+        catalogue = get_catalogue()
+        for group in self.groups:
+            candidates = catalogue.between("inertia", low=catalogue.property(profiles[group], "inertia"))
+            lightest = min(candidates, key=lambda p: catalogue.property(p, "mass"))
+            if lightest != profiles[group] and self.evaluate(self._replace(profiles, group, lightest))[0]:
+                profiles = self._replace(profiles, group, lightest)
+
+        _, summary = self.evaluate(profiles)
+        return {**dict(zip(GROUPS, profiles)), "solves": self.solves, **summary}
+
+
+def size_sections(
+    params: Munch, max_displacement: float = None, max_stress: float = None, engine: str = "local"
+) -> dict:
+    """Find the lightest profiles for the columns, beams and braces within a displacement (mm) and/or stress (MPa) limit.
+    Returns the chosen profiles, the number of solves that were needed, the total steel mass (kg) and governing values.
+    """
+    return SectionSizer(params, max_displacement, max_stress, engine).size()
@@ -1,46 +1,120 @@
+import json
 import os
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import Union
 
-import requests
 import skyciv
 
-from viktor.utils import memoize
+from .cassette import cassette_mode
+from .serialization import canonical_hash
+from .serialization import dumps
+from .tracing import set_attribute
+from .tracing import traced
 
+REPLAY_CREDENTIALS = ("replay", "replay")
+SESSION_START = {"function": "S3D.session.start", "arguments": {"keep_open": True}}
 
-def build_api_object(model: skyciv.Model = None, solve: bool = True, save: bool = True) -> skyciv.ApiObject:
-    """Initialises the API object and adds the authentication and functions"""
-    api_object = skyciv.ApiObject()
 
+def get_credentials() -> Tuple[str, str]:
+    """Get the SkyCiv username and api key from the environment variable VIKTOR_APP_SECRET. A cassette that is replayed
+    does not need them, the requests are looked up without the credentials.
+    """
     # Authorize using the environment variables, these need to be set. You can get your own token on the your SkyCiv profile page
-    secrets = os.environ.get("VIKTOR_APP_SECRET").split(";")
-    api_object.auth.username = secrets[0]
-    api_object.auth.key = secrets[1]
+    secret = os.environ.get("VIKTOR_APP_SECRET")
+    if secret is None and cassette_mode() == "replay":
+        return REPLAY_CREDENTIALS
+    secrets = secret.split(";")
+    return secrets[0], secrets[1]
 
-    # All the functions are found on https://skyciv.com/api/v3/docs/getting-started/. The basic format to add a function is: api_object.functions.add(<function>,{arguments})
 
+def get_functions(
+    model: Union[skyciv.Model, dict] = None, solve: bool = True, save: bool = True, result_keys: List[str] = None
+) -> List[dict]:
+    """Get the functions to send to SkyCiv for a model, as a list of dictionaries with the function and its arguments.
+
+    :param result_keys: Only get these results, and not the model back, for large models. By default all results are
+        fetched together with the model
+    """
+    # All the functions are found on https://skyciv.com/api/v3/docs/getting-started/. The basic format to add a function is: api_object.functions.add(<function>,{arguments})
+    functions = []
     if model is not None:
         # Start the session and set the model
-        api_object.functions.add("S3D.session.start", {"keep_open": True})  # Session for the API Call
-        api_object.functions.add("S3D.model.set", {"s3d_model": model})  # Select the model
+        functions.append(SESSION_START)  # Session for the API Call
+        functions.append({"function": "S3D.model.set", "arguments": {"s3d_model": model}})  # Select the model
 
         if solve:
             # Parse functions
-            api_object.functions.add("S3D.model.solve", {"analysis_type": "linear"})
-            api_object.functions.add("S3D.results.get", {"format": "s3d"})
+            functions.append({"function": "S3D.model.solve", "arguments": {"analysis_type": "linear"}})
+            if result_keys is None:
+                functions.append({"function": "S3D.results.get", "arguments": {"format": "s3d"}})
+            else:
+                arguments = {"format": "s3d", "result_filter": list(result_keys)}
+                functions.append({"function": "S3D.results.get", "arguments": arguments})
 
             # Get analysis report
-            api_object.functions.add("S3D.results.getAnalysisReport", {"file_type": "pdf"})
+            functions.append({"function": "S3D.results.getAnalysisReport", "arguments": {"file_type": "pdf"}})
 
-            # Return the model in case skyciv changes it
-            api_object.functions.add("S3D.model.get", {})
+            # Return the model in case skyciv changes it, a large model is not sent back
+            if result_keys is None:
+                functions.append({"function": "S3D.model.get", "arguments": {}})
 
         # Save the model in our library
         if save:
-            api_object.functions.add("S3D.file.save", {"name": "Example viktor", "path": "VIKTOR/"})
+            functions.append({"function": "S3D.file.save", "arguments": {"name": "Example viktor", "path": "VIKTOR/"}})
+    return functions
 
+
+@traced("skyciv.build_api_object")
+def build_api_object(model: skyciv.Model = None, solve: bool = True, save: bool = True) -> skyciv.ApiObject:
+    """Initialises the API object and adds the authentication and functions"""
+    api_object = skyciv.ApiObject()
+    api_object.auth.username, api_object.auth.key = get_credentials()
+    for function in get_functions(model, solve, save):
+        api_object.functions.add(function["function"], dict(function["arguments"]))
     return api_object
 
 
-@memoize
-def get_renderer(url: str = "https://api.skyciv.com/dist/v3/javascript/skyciv-renderer-dist-2.0.0.js") -> str:
-    """Get the renderer with the memoize decorator so we can speed up the application."""
-    return requests.get(url).content.decode("utf-8")
+class SkyCivRequest(NamedTuple):
+    """A solve request for SkyCiv without the credentials and the session, so it can be cached and sent in any session.
+    The options and functions are kept as json, so they are only serialised once.
+    """
+
+    key: str  # The request key, see result_store.request_key
+    options: str
+    functions: str  # The functions after S3D.session.start
+    result_keys: Optional[Tuple[str, ...]] = None  # Only these results are fetched, for large models
+
+    def to_json(self, session_id: Optional[str] = None) -> str:
+        """Get the json of the API object. Without a session id a new session is started, with a session id the request
+        runs in that open session.
+        """
+        username, key = get_credentials()
+        auth = json.dumps({"username": username, "key": key, "session_id": session_id})
+        functions = self.functions
+        if session_id is None:
+            functions = "[" + json.dumps(SESSION_START) + ("," + functions[1:] if functions != "[]" else "]")
+        return f'{{"auth":{auth},"options":{self.options},"functions":{functions}}}'
+
+
+@traced("skyciv.build_request")
+def build_request(
+    model_object: dict, solve: bool = True, save: bool = True, result_keys: List[str] = None
+) -> SkyCivRequest:
+    """Build the solve request of a model dictionary made by skyciv.Model.get(), its collections can be RawJson. Unlike
+    ApiObject.to_json() the model is not deep copied first, and it is serialised with the canonical json of serialization.
+
+    :param result_keys: Only fetch these results, see large_model
+    """
+    options = skyciv.ApiObject().options.get()
+    functions = [f for f in get_functions(model_object, solve, save, result_keys) if f is not SESSION_START]
+    request = SkyCivRequest(
+        key=canonical_hash({"options": options, "functions": functions}),
+        options=dumps(options),
+        functions=dumps(functions),
+        result_keys=tuple(result_keys) if result_keys is not None else None,
+    )
+    set_attribute("bytes", len(request.options) + len(request.functions))
+    return request
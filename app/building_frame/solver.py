@@ -0,0 +1,454 @@
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import numpy as np
+import scipy.sparse
+from scipy.sparse.linalg import splu
+
+from viktor.core import UserException
+
+from .sections import get_catalogue
+from .symmetry import find_symmetry
+from .symmetry import symmetry_enabled
+from .tracing import set_attribute
+
+GRAVITY = 9.81
+STATIONS = np.array([0, 25, 50, 75, 100])  # Percentages along the member where the member results are given
+AXES = {"X": 0, "Y": 1, "Z": 2}
+INTERNAL_FORCES = ("axial_force", "shear_force_y", "shear_force_z", "torsion", "bending_moment_y", "bending_moment_z")
+TOLERANCE = 1e-6  # m, used to find the nodes that lie within an area load
+
+
+def section_properties(designation: str) -> Tuple[float, float, float]:
+    """Get the area, moment of inertia and torsion constant (all in m) of a SHS profile. The torsion constant is not in
+    the section catalogue, so it is calculated from the width and thickness with Bredt's formula for a thin walled square
+    tube: J = t * (b - t)^3.
+    """
+    properties = get_catalogue().get(designation)
+    width, thickness = properties["width"], properties["thickness"]
+    return properties["area"], properties["inertia"], thickness * (width - thickness) ** 3
+
+
+def _local_stiffness(E, G, A, I, J, L) -> np.ndarray:
+    """The 12 x 12 stiffness matrices of 3D frame members in their local axes. All arguments are arrays with a value
+    per member. The sections are square, so the inertia is the same about both axes.
+    """
+    k = np.zeros((len(L), 12, 12))
+    EA_L = E * A / L
+    GJ_L = G * J / L
+    EI = E * I
+    k12, k6, k4, k2 = 12 * EI / L**3, 6 * EI / L**2, 4 * EI / L, 2 * EI / L
+
+    # Axial and torsion
+    for a, b, value in ((0, 6, EA_L), (3, 9, GJ_L)):
+        k[:, a, a] = k[:, b, b] = value
+        k[:, a, b] = k[:, b, a] = -value
+
+    # Bending about the local z axis (displacement in y, rotation about z) and about the local y axis (displacement in
+    # z, rotation about y). The sign of the coupling terms flips for the y axis.
+    for v, r, sign in ((1, 5, 1), (2, 4, -1)):
+        vA, rA, vB, rB = v, r, v + 6, r + 6
+        k[:, vA, vA] = k[:, vB, vB] = k12
+        k[:, vA, vB] = k[:, vB, vA] = -k12
+        k[:, vA, rA] = k[:, rA, vA] = k[:, vA, rB] = k[:, rB, vA] = sign * k6
+        k[:, vB, rA] = k[:, rA, vB] = k[:, vB, rB] = k[:, rB, vB] = -sign * k6
+        k[:, rA, rA] = k[:, rB, rB] = k4
+        k[:, rA, rB] = k[:, rB, rA] = k2
+    return k
+
+
+def _tributary(coordinates: np.ndarray) -> np.ndarray:
+    """Get the tributary length of every coordinate on a grid line, half the distance to each neighbour."""
+    lines = np.unique(coordinates)
+    if len(lines) == 1:
+        return np.ones_like(coordinates)
+    edges = np.r_[lines[0], (lines[1:] + lines[:-1]) / 2, lines[-1]]
+    lengths = np.diff(edges)
+    return lengths[np.searchsorted(lines, coordinates)]
+
+
+class MemberLoads:
+    """Loads along the members in their local axes, kept as what the results need of them: the fixed end forces
+    (members, 12), and at every station the resultant of the load between node A and the station and its moment about
+    the station (members, stations, 3). These are linear in the loads, so the loads of load groups are added up.
+    """
+
+    __slots__ = ("fixed_end", "resultant", "moment")
+
+    def __init__(self, num_members: int):
+        self.fixed_end = np.zeros((num_members, 12))
+        self.resultant = np.zeros((num_members, len(STATIONS), 3))
+        self.moment = np.zeros((num_members, len(STATIONS), 3))
+
+    def __iadd__(self, other: "MemberLoads") -> "MemberLoads":
+        self.fixed_end += other.fixed_end
+        self.resultant += other.resultant
+        self.moment += other.moment
+        return self
+
+    def add(self, members: np.ndarray, loads: np.ndarray, length: np.ndarray, ramp: np.ndarray) -> None:
+        """Add symmetric trapezoidal loads to members: zero at both ends, rising linearly over the ramp to the load in
+        the middle part. A ramp of 0 is a uniform load, a ramp of half the length a triangular load.
+
+        :param members: The index of the member of every load, a member can have several loads
+        :param loads: The load in the middle part in local axes (kN/m), (loads, 3)
+        :param length: The length of the members (m)
+        :param ramp: The length of the ramps at both ends (m)
+        """
+        L, c = length[:, None], ramp[:, None]
+
+        # Fixed end forces: half the load at each end, and the fixed end moments of a symmetric trapezoid
+        fixed_end = np.zeros((len(members), 12))
+        fixed_end[:, 0:3] = fixed_end[:, 6:9] = loads * (L - c) / 2
+        r = c / L
+        end_moment = loads * (L**2 / 12 * (1 - 2 * r**2 + r**3))
+        fixed_end[:, 5], fixed_end[:, 11] = end_moment[:, 1], -end_moment[:, 1]
+        fixed_end[:, 4], fixed_end[:, 10] = -end_moment[:, 2], end_moment[:, 2]
+
+        # The first and second integral of the load shape up to the stations, the uniform load minus the ramps at A, B
+        x = L * STATIONS[None, :] / 100
+        divisor = np.where(c > 0, c, 1.0)  # Without ramps the ramp terms are 0
+        first_a = np.where(x < c, x - x**2 / (2 * divisor), c / 2)
+        second_a = np.where(x < c, x**2 / 2 - x**3 / (6 * divisor), c**2 / 3 + c * (x - c) / 2)
+        y = np.clip(x - (L - c), 0, None)
+        first = x - first_a - y**2 / (2 * divisor)
+        second = x**2 / 2 - second_a - y**3 / (6 * divisor)
+
+        np.add.at(self.fixed_end, members, fixed_end)
+        np.add.at(self.resultant, members, first[:, :, None] * loads[:, None, :])
+        np.add.at(self.moment, members, second[:, :, None] * loads[:, None, :])
+
+
+class LocalSolver:
+    """A linear elastic direct stiffness solver for 3D frames, used as an offline alternative to the SkyCiv solve.
+
+    It takes the model dictionary made by skyciv.Model.get() and supports what the BuildingFrame makes: nodes, rigidly
+    connected members with a SHS section from the section catalogue, supports, self weight, two way area loads and column
+    wind loads. The stiffness matrix is assembled as a sparse matrix and factorised once, so the model can be solved for
+    every load group with a cheap substitution. When the frame and all its load groups are mirror symmetric, only the
+    symmetric displacements of a half or a quarter of the frame are solved, see symmetry.
+
+    Two way area loads are spread over the beams around every panel as trapezoidal and triangular member loads, like
+    SkyCiv does, so the beams get the bending moments of the floor and snow loads. Column wind loads are lumped to the
+    nodes of the columns by their tributary area, so the bending moments in the columns between the floors differ.
+    """
+
+    def __init__(self, model: dict, symmetry: bool = None):
+        """
+        :param model: The model dictionary
+        :param symmetry: Whether to use the symmetry of the frame, defaults to the environment variable
+            SKYCIV_LOCAL_SYMMETRY
+        """
+        self.model = model
+
+        # Nodes
+        self.node_ids = np.array(sorted(int(i) for i in model["nodes"]))
+        nodes = model["nodes"]
+        self.coordinates = np.array([[nodes[str(i)][c] for c in "xyz"] for i in self.node_ids], dtype=float)
+        self.num_dofs = 6 * len(self.node_ids)
+
+        # Members
+        members = model["members"]
+        self.member_ids = np.array(sorted(int(i) for i in members))
+        member_list = [members[str(i)] for i in self.member_ids]
+        self.member_nodes = self.node_index(np.array([[m["node_A"], m["node_B"]] for m in member_list]))
+        section_ids = [str(m["section_id"]) for m in member_list]
+
+        # Sections and materials
+        properties = {}
+        for section_id, section in model["sections"].items():
+            material = model["materials"][str(section["material_id"])]
+            E = material["elasticity_modulus"] * 1000  # MPa to kPa
+            properties[section_id] = (
+                E,
+                E / (2 * (1 + material["poissons_ratio"])),
+                *section_properties(section["load_section"][-1]),
+                material["density"],
+            )
+        E, G, A, I, J, density = np.array([properties[s] for s in section_ids]).T
+        self.area, self.density = A, density
+
+        # Local axes, the reference vector is the global Y axis, or the global X axis for vertical members
+        vector = self.coordinates[self.member_nodes[:, 1]] - self.coordinates[self.member_nodes[:, 0]]
+        self.length = np.linalg.norm(vector, axis=1)
+        ex = vector / self.length[:, None]
+        reference = np.where(np.abs(ex[:, [1]]) > 0.999, [[1.0, 0, 0]], [[0, 1.0, 0]])
+        ez = np.cross(ex, reference)
+        ez /= np.linalg.norm(ez, axis=1)[:, None]
+        ey = np.cross(ez, ex)
+        self.rotation = np.stack((ex, ey, ez), axis=1)  # (m, 3, 3), the rows are the local axes
+
+        # Global stiffness matrices of the members: K = T^T k T, with T four times the rotation on the diagonal
+        self.local_stiffness = _local_stiffness(E, G, A, I, J, self.length)
+        k = self.local_stiffness.reshape(-1, 4, 3, 4, 3)
+        stiffness = np.einsum("mji,majbk,mkl->maibl", self.rotation, k, self.rotation).reshape(-1, 12, 12)
+
+        # Assemble the sparse stiffness matrix
+        self.member_dofs = (6 * self.member_nodes[:, :, None] + np.arange(6)).reshape(-1, 12)
+        self._members_between = {(a, b): i for i, (a, b) in enumerate(self.member_nodes.tolist())}
+        rows = np.broadcast_to(self.member_dofs[:, :, None], stiffness.shape).ravel()
+        cols = np.broadcast_to(self.member_dofs[:, None, :], stiffness.shape).ravel()
+        self.stiffness = scipy.sparse.coo_matrix(
+            (stiffness.ravel(), (rows, cols)), shape=(self.num_dofs, self.num_dofs)
+        ).tocsc()
+
+        # Supports, every F in the restraint code is a fixed degree of freedom
+        fixed = np.zeros(self.num_dofs, dtype=bool)
+        for support in model["supports"].values():
+            index = self.node_index(np.array([support["node"]]))[0]
+            fixed[6 * index : 6 * index + 6] = [c == "F" for c in support["restraint_code"]]
+        self.free = np.flatnonzero(~fixed)
+        self.supported = np.unique(self.node_index(np.array([s["node"] for s in model["supports"].values()])))
+
+        stiffness_free = self.stiffness[self.free][:, self.free]
+        if np.any(stiffness_free.diagonal() <= 0):
+            raise UserException("The model is unstable, not every node is connected to a member")
+
+        # The symmetric part of the frame, the displacements of the free degrees of freedom are basis @ the solved ones
+        if symmetry is None:
+            symmetry = symmetry_enabled()
+        self.symmetry = None
+        if symmetry:
+            loads = [self.loads(load_group)[0] for load_group in self.load_groups()]
+            self.symmetry = find_symmetry(self.coordinates, self.stiffness, self.free, loads)
+        if self.symmetry is not None:
+            stiffness_free = self.symmetry.basis.T @ stiffness_free @ self.symmetry.basis
+        set_attribute("symmetry", ",".join(self.symmetry.planes) if self.symmetry else "")
+        set_attribute("dofs", stiffness_free.shape[0])
+        try:
+            self.factorisation = splu(
+                stiffness_free.tocsc(),
+                permc_spec="MMD_AT_PLUS_A",  # The matrix is symmetric, a symmetric ordering keeps the fill-in low
+                diag_pivot_thresh=0,
+                options={"SymmetricMode": True},
+            )
+        except RuntimeError:
+            raise UserException("The model is unstable, the stiffness matrix is singular")
+
+    def node_index(self, node_ids: np.ndarray) -> np.ndarray:
+        """Get the index in the node arrays of node ids."""
+        return np.searchsorted(self.node_ids, node_ids)
+
+    def load_groups(self) -> List[str]:
+        """Get the names of all load groups in the model, in the order they appear."""
+        groups = []
+        for collection in ("self_weight", "area_loads"):
+            for load in self.model.get(collection, {}).values():
+                if load.get("enabled", True) and load["LG"] not in groups:
+                    groups.append(load["LG"])
+        return groups
+
+    def loads(self, load_group: str) -> Tuple[np.ndarray, MemberLoads]:
+        """Get the loads of a load group. Returns the nodal load vector (kN and kNm) and the loads along the members,
+        which are needed to get the member forces in between the nodes.
+        """
+        forces = np.zeros(self.num_dofs)
+        member_loads = MemberLoads(len(self.member_ids))
+        members = np.arange(len(self.member_ids))
+
+        for self_weight in self.model.get("self_weight", {}).values():
+            if self_weight.get("enabled", True) and self_weight["LG"] == load_group:
+                acceleration = GRAVITY * np.array([self_weight["x"], self_weight["y"], self_weight["z"]])
+                weight = (self.density * self.area / 1000)[:, None] * acceleration  # kN/m in global axes
+                local = np.einsum("mij,mj->mi", self.rotation, weight)
+                member_loads.add(members, local, self.length, np.zeros(len(members)))
+
+        for area_load in self.model.get("area_loads", {}).values():
+            if area_load["LG"] != load_group:
+                continue
+            if area_load["type"] == "two_way":
+                self._add_two_way_load(forces, member_loads, area_load)
+            elif area_load["type"] == "column_wind_load":
+                self._add_column_wind_load(forces, area_load)
+            else:
+                raise UserException(f"The local solver does not support {area_load['type']} area loads")
+
+        # The member loads are replaced by their fixed end forces on the nodes
+        fixed_end = member_loads.fixed_end.reshape(-1, 4, 3)
+        global_end = np.einsum("mji,maj->mai", self.rotation, fixed_end).reshape(-1, 12)
+        np.add.at(forces, self.member_dofs, global_end)
+        return forces, member_loads
+
+    def _area_nodes(self, corners: np.ndarray, normal_axis: int) -> np.ndarray:
+        """Get the index of the nodes in the plane of the area load that lie within the corners."""
+        lower, upper = corners.min(axis=0) - TOLERANCE, corners.max(axis=0) + TOLERANCE
+        inside = np.all((self.coordinates >= lower) & (self.coordinates <= upper), axis=1)
+        return np.flatnonzero(inside & (np.abs(self.coordinates[:, normal_axis] - corners[0, normal_axis]) < TOLERANCE))
+
+    def _add_two_way_load(self, forces: np.ndarray, member_loads: MemberLoads, area_load: dict) -> None:
+        """Spread a pressure on a horizontal area over the edges of every panel of the grid of nodes in the area, like a
+        two way slab: an edge carries the part of the panel between it and the lines at 45 degrees from the corners, a
+        trapezoid, or a triangle on the short sides. The edges are carried by their members, an edge without a member by
+        its nodes. An area with its nodes on a single line is lumped to the nodes by their tributary length.
+        """
+        corners = self.coordinates[self.node_index(np.array(area_load["nodes"]))]
+        axis = AXES[area_load["direction"]]
+        nodes = self._area_nodes(corners, axis)
+        u, v = [a for a in range(3) if a != axis]
+        lines_u, index_u = np.unique(self.coordinates[nodes, u], return_inverse=True)
+        lines_v, index_v = np.unique(self.coordinates[nodes, v], return_inverse=True)
+        if len(lines_u) == 1 or len(lines_v) == 1:
+            area = _tributary(self.coordinates[nodes, u]) * _tributary(self.coordinates[nodes, v])
+            forces[6 * nodes + axis] += area_load["mag"] * area
+            return
+        grid = np.full((len(lines_u), len(lines_v)), -1)
+        grid[index_u, index_v] = nodes
+        if np.any(grid < 0):
+            raise UserException("The local solver needs a node at every grid point of a two way area load")
+
+        # The four edges of every panel: their nodes, their length and the size of the panel across them
+        i, j = (a.ravel() for a in np.meshgrid(np.arange(len(lines_u) - 1), np.arange(len(lines_v) - 1), indexing="ij"))
+        size_u, size_v = np.diff(lines_u)[i], np.diff(lines_v)[j]
+        start = np.concatenate((grid[i, j], grid[i, j + 1], grid[i, j], grid[i + 1, j]))
+        end = np.concatenate((grid[i + 1, j], grid[i + 1, j + 1], grid[i, j + 1], grid[i + 1, j + 1]))
+        length = np.concatenate((size_u, size_u, size_v, size_v))
+        across = np.concatenate((size_v, size_v, size_u, size_u))
+        ramp = np.minimum(length, across) / 2
+        load = area_load["mag"] * ramp  # kN/m in the middle part of the edge
+
+        between = self._members_between
+        members = np.array([between.get((a, b), between.get((b, a), -1)) for a, b in zip(start.tolist(), end.tolist())])
+        on_member = members >= 0
+        local = self.rotation[members[on_member], :, axis] * load[on_member, None]
+        member_loads.add(members[on_member], local, length[on_member], ramp[on_member])
+        total = load[~on_member] * (length[~on_member] - ramp[~on_member])
+        np.add.at(forces, 6 * start[~on_member] + axis, total / 2)
+        np.add.at(forces, 6 * end[~on_member] + axis, total / 2)
+
+    def _add_column_wind_load(self, forces: np.ndarray, area_load: dict) -> None:
+        """Lump a wind pressure on a vertical face to the nodes of the columns in the face. The pressure acts
+        perpendicular to the face and changes with the elevation bands along the column direction.
+        """
+        corners = self.coordinates[self.node_index(np.array(area_load["nodes"]))]
+        column_start, column_end = self.node_index(np.array([int(n) for n in area_load["column_direction"].split(",")]))
+        column_axis = int(np.argmax(np.abs(self.coordinates[column_end] - self.coordinates[column_start])))
+        normal_axis = int(np.argmin(np.ptp(corners, axis=0)))
+        width_axis = 3 - column_axis - normal_axis
+        nodes = self._area_nodes(corners, normal_axis)
+
+        # Pressure per elevation band, the last magnitude is used for the bands without one
+        elevations = np.array([float(e) for e in str(area_load["elevations"]).split(",")])
+        mags = [float(m) for m in str(area_load["mags"]).split(",")]
+        mags = np.array(mags + mags[-1:] * (len(elevations) - 1 - len(mags)))
+        elevation = self.coordinates[nodes, column_axis]
+        band = np.clip(np.searchsorted(elevations, elevation, side="right") - 1, 0, len(mags) - 1)
+
+        area = _tributary(self.coordinates[nodes, width_axis]) * _tributary(elevation)
+        forces[6 * nodes + normal_axis] += area_load["mag"] * mags[band] * area
+
+    def displacements(self, forces: np.ndarray) -> np.ndarray:
+        """Solve the displacements (m and rad) of all degrees of freedom for a load vector, or for the columns of a
+        matrix of load vectors. With the symmetry of the frame, every load vector must be a sum of the load groups of the
+        model, which are all symmetric.
+        """
+        displacements = np.zeros(forces.shape)
+        if self.symmetry is None:
+            displacements[self.free] = self.factorisation.solve(forces[self.free])
+        else:  # Solve the symmetric part and mirror it onto the whole frame
+            basis = self.symmetry.basis
+            displacements[self.free] = basis @ self.factorisation.solve(basis.T @ forces[self.free])
+        return displacements
+
+    def result_arrays(
+        self, displacements: np.ndarray, forces: np.ndarray, member_loads: MemberLoads
+    ) -> Dict[str, np.ndarray]:
+        """Get the results as arrays: the reactions of the supports (supports, 6), the displacements along the members in
+        their local axes (members, stations, 3) and every internal force along the members (members, stations). They
+        are linear in the loads, so the arrays of load cases can be combined, see combinations. Displacements are in mm,
+        forces in kN and moments in kNm.
+        """
+        reactions = (self.stiffness @ displacements - forces).reshape(-1, 6)
+
+        # Member end displacements in local axes
+        end = np.einsum("mij,maj->mai", self.rotation, displacements[self.member_dofs].reshape(-1, 4, 3))
+        (uA, rA, uB, rB) = end.transpose(1, 0, 2)
+
+        # Displacements along the member with the Hermite shape functions
+        L = self.length[:, None]
+        xi = STATIONS[None, :] / 100
+        N1, N2 = 1 - 3 * xi**2 + 2 * xi**3, L * (xi - 2 * xi**2 + xi**3)
+        N3, N4 = 3 * xi**2 - 2 * xi**3, L * (-(xi**2) + xi**3)
+        axial = uA[:, [0]] * (1 - xi) + uB[:, [0]] * xi
+        v = N1 * uA[:, [1]] + N2 * rA[:, [2]] + N3 * uB[:, [1]] + N4 * rB[:, [2]]
+        w = N1 * uA[:, [2]] - N2 * rA[:, [1]] + N3 * uB[:, [2]] - N4 * rB[:, [1]]
+
+        # Internal forces from the equilibrium of the member part between node A and the station
+        end_forces = np.einsum("mij,mj->mi", self.local_stiffness, end.reshape(-1, 12))
+        end_forces -= member_loads.fixed_end
+        x = L * xi
+        qx, qy, qz = member_loads.resultant.transpose(2, 0, 1)  # The resultant of the loads up to the station
+        _, my_q, mz_q = member_loads.moment.transpose(2, 0, 1)  # And its moment about the station
+        fx, fy, fz, mx, my, mz = (end_forces[:, [i]] for i in range(6))
+        return {
+            "reactions": reactions[self.supported],
+            "displacements": np.stack((axial, v, w), axis=-1) * 1000,
+            "axial_force": -(fx + qx),
+            "shear_force_y": -(fy + qy),
+            "shear_force_z": -(fz + qz),
+            "torsion": -np.broadcast_to(mx, x.shape),
+            "bending_moment_y": -(my + fz * x + mz_q),
+            "bending_moment_z": -(mz - fy * x - my_q),
+        }
+
+    def format_results(self, arrays: Dict[str, np.ndarray]) -> dict:
+        """Get the results in the s3d format of SkyCiv from the result arrays: the reactions per node and the member
+        results per member at the stations along the member (in %). The member displacements are the length of the
+        displacements, or are given as member_displacements, e.g. by an envelope.
+        """
+        stations = [str(s) for s in STATIONS]
+        member_ids = [str(i) for i in self.member_ids]
+
+        def per_member(values: np.ndarray) -> Dict[str, Dict[str, float]]:
+            return {m: dict(zip(stations, row)) for m, row in zip(member_ids, values.tolist())}
+
+        member_displacements = arrays.get("member_displacements")
+        if member_displacements is None:
+            member_displacements = np.linalg.norm(arrays["displacements"], axis=-1)
+        reactions = arrays["reactions"].tolist()
+        results = {
+            "reactions": {
+                str(self.node_ids[i]): dict(zip(("Fx", "Fy", "Fz", "Mx", "My", "Mz"), reaction))
+                for i, reaction in zip(self.supported, reactions)
+            },
+            "member_lengths": dict(zip(member_ids, self.length.tolist())),
+            "member_displacements": per_member(member_displacements),
+        }
+        results.update({key: per_member(arrays[key]) for key in INTERNAL_FORCES})
+        return results
+
+    def results(self, displacements: np.ndarray, forces: np.ndarray, member_loads: MemberLoads) -> dict:
+        """Get the results in the s3d format of SkyCiv of a displacement vector and its loads."""
+        return self.format_results(self.result_arrays(displacements, forces, member_loads))
+
+    def solve(self) -> dict:
+        """Solve the model for all load groups together, like SkyCiv does without load combinations."""
+        forces = np.zeros(self.num_dofs)
+        member_loads = MemberLoads(len(self.member_ids))
+        for load_group in self.load_groups():
+            group_forces, group_member_loads = self.loads(load_group)
+            forces += group_forces
+            member_loads += group_member_loads
+        return self.results(self.displacements(forces), forces, member_loads)
+
+    def solve_load_cases(self, load_cases: Dict[str, List[str]]) -> Dict[str, np.ndarray]:
+        """Solve load cases that are each the sum of some load groups, with one substitution for all of them. Returns
+        the result arrays of the load cases, stacked along the first axis in the order of the load cases.
+        """
+        forces = np.zeros((self.num_dofs, len(load_cases)))
+        member_loads = [MemberLoads(len(self.member_ids)) for _ in load_cases]
+        for i, load_groups in enumerate(load_cases.values()):
+            for load_group in load_groups:
+                group_forces, group_member_loads = self.loads(load_group)
+                forces[:, i] += group_forces
+                member_loads[i] += group_member_loads
+        displacements = self.displacements(forces)
+        arrays = [
+            self.result_arrays(displacements[:, i], forces[:, i], member_loads[i]) for i in range(len(load_cases))
+        ]
+        return {key: np.stack([case[key] for case in arrays]) for key in arrays[0]} if arrays else {}
+
+
+def solve_model(model: dict) -> dict:
+    """Solve a model dictionary made by skyciv.Model.get() with the local solver, returns the results in the s3d format."""
+    return LocalSolver(model).solve()
@@ -0,0 +1,87 @@
+"""Caches for the stages of building a SkyCiv request: the geometry, the loads and the request itself.
+
+Every stage is keyed on the inputs it depends on, so a change of only the loads, e.g. the floor pressure or the wind
+load, reuses the geometry, and going back to earlier params reuses the serialised request as well.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+from munch import Munch
+
+from .serialization import canonical_hash
+from .tracing import record_cache
+
+DEFAULT_MAX_ENTRIES = 16
+
+
+class StageCache:
+    """A least recently used cache of one stage in this process. The values are shared between the callers, so they must
+    not be changed.
+    """
+
+    def __init__(self, max_entries: int = None, name: str = None):
+        self.name = name  # The hits and misses are recorded in the current span under this name
+        self.max_entries = max_entries or int(os.environ.get("SKYCIV_STAGE_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def get_or_create(self, key: str, create: Callable[[], Any]) -> Any:
+        """Get the value of the key, or create and keep it if it is not in the cache."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                value = self._entries[key]
+            else:
+                value = None
+                self._counters["misses"] += 1
+        if self.name:
+            record_cache(self.name, value is not None)
+        if value is not None:
+            return value
+        value = create()  # Outside the lock, so other stages are not blocked
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """Get the counters of the hits and misses."""
+        with self._lock:
+            return dict(self._counters)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+TOPOLOGY = StageCache(name="topology")  # Topology key to the FrameGeometry of the nodes, members and supports
+GEOMETRY = StageCache(name="geometry")  # Geometry key to the FrameGeometry with the profiles
+LOADS = StageCache(name="loads")  # Loads key to the model dictionary of the loads
+REQUESTS = StageCache(name="request")  # Loads key to the SkyCivRequest
+
+
+def topology_key(params: Munch) -> str:
+    """Get the key of the topology, the nodes, members and supports. It does not depend on the sections, so another
+    profile reuses the nodes and members.
+    """
+    frame = params.step_design.frame
+    return canonical_hash({"office": frame.office, "columns": frame.columns})
+
+
+def geometry_key(params: Munch) -> str:
+    """Get the key of the geometry, it only depends on the frame params."""
+    return canonical_hash({"frame": params.step_design.frame})
+
+
+def loads_key(geometry: str, loads: Munch = None, snow_load: float = None) -> str:
+    """Get the key of the loads on a geometry. The engine and the result set are left out, they do not change the loads."""
+    loads = {k: v for k, v in (loads or {}).items() if k not in ("engine", "result_set")}
+    return canonical_hash({"geometry": geometry, "loads": loads, "snow_load": snow_load})
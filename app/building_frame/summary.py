@@ -0,0 +1,52 @@
+from typing import Dict
+
+import numpy as np
+
+from .frame_generator import FrameGeometry
+from .sections import get_catalogue
+
+
+def model_mass(model: dict, section_id: int = None) -> float:
+    """Get the total mass of the steel (kg) in a model dictionary made by skyciv.Model.get(), or only of the members
+    with the given section id.
+    """
+    nodes = model["nodes"]
+    designations = {k: section["load_section"][-1] for k, section in model["sections"].items()}
+    members = [m for m in model["members"].values() if section_id is None or m["section_id"] == section_id]
+    if not members:
+        return 0.0
+    start = np.array([[nodes[str(m["node_A"])][c] for c in "xyz"] for m in members])
+    end = np.array([[nodes[str(m["node_B"])][c] for c in "xyz"] for m in members])
+    catalogue = get_catalogue()
+    mass_per_length = catalogue.data["mass"][catalogue.rows([designations[str(m["section_id"])] for m in members])]
+    return float(np.sum(np.linalg.norm(end - start, axis=1) * mass_per_length))
+
+
+def geometry_mass(geometry: FrameGeometry) -> float:
+    """Get the total mass of the steel (kg) of a frame geometry with sections, the same as model_mass of its model but
+    straight from its arrays.
+    """
+    start, end = geometry.nodes[geometry.members[:, 0] - 1], geometry.nodes[geometry.members[:, 1] - 1]
+    catalogue = get_catalogue()
+    mass_per_length = catalogue.data["mass"][catalogue.rows(list(geometry.sections))][geometry.member_types - 1]
+    return float(np.sum(np.linalg.norm(end - start, axis=1) * mass_per_length))
+
+
+def _max_absolute(member_results: Dict[str, Dict[str, float]]) -> float:
+    """Get the largest absolute value of a member result over all members and stations."""
+    return max((abs(value) for stations in member_results.values() for value in stations.values()), default=0.0)
+
+
+def summarise_results(results: dict) -> dict:
+    """Summarise the results in the s3d format to the governing values: the maximum displacement (mm), the maximum axial
+    force (kN) and the maximum bending moment (kNm). Values that are not in the results are left out.
+    """
+    summary = {}
+    if "member_displacements" in results:
+        summary["max_displacement"] = _max_absolute(results["member_displacements"])
+    if "axial_force" in results:
+        summary["max_axial_force"] = _max_absolute(results["axial_force"])
+    moments = [_max_absolute(results[key]) for key in ("bending_moment_y", "bending_moment_z") if key in results]
+    if moments:
+        summary["max_bending_moment"] = max(moments)
+    return summary
@@ -0,0 +1,291 @@
+"""Batch parametric sweeps over frame configurations, outside the VIKTOR UI.
+
+A sweep file is a json file with the params that are the same for all runs and a grid with the values of the params
+that are varied, addressed by their path in the parametrization::
+
+    {
+        "base": {"step_call": {"floor_load": true}},
+        "grid": {
+            "step_design.frame.office.num_floors": [2, 5, 10],
+            "step_design.frame.columns.dist_length": [5, 7],
+            "step_design.frame.materials.columns": ["SHS100x100x5", "SHS150x150x8"]
+        }
+    }
+
+Run it with ``python -m app.building_frame.sweep sweep.json --output runs.csv``.
+"""
+import argparse
+import copy
+import csv
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+
+from munch import munchify
+
+import viktor
+from viktor.parametrization import Field
+from viktor.parametrization import Text
+from viktor.parametrization import _Group
+
+from .controller import evaluate_skyciv
+from .controller import get_engine
+from .model import BuildingFrame
+from .parametrization import SkyCivParametrization
+from .serialization import canonical_hash
+from .skyciv_functions import build_request
+from .solver import solve_model
+from .summary import model_mass
+from .summary import summarise_results
+
+
+def get_default_params(group=SkyCivParametrization) -> dict:
+    """Get the defaults of the fields of the parametrization, or of a step, tab or section of it, as nested params.
+    Fields without a value, like texts and buttons, are left out.
+    """
+    # VIKTOR has no public accessors, the groups keep their fields in _attrs and the fields their default in _default.
+    # These are only checked for the version of viktor that is pinned in requirements.txt, see tests/test_sweep.py.
+    try:
+        attributes = group._attrs.items() if isinstance(group, _Group) else vars(group).items()
+        params = {}
+        for name, value in attributes:
+            if isinstance(value, _Group):
+                params[name] = get_default_params(value)
+            elif isinstance(value, Field) and not isinstance(value, Text):
+                params[name] = value._default
+    except AttributeError as error:
+        raise RuntimeError(
+            f"Can not read the defaults of the parametrization with viktor {viktor.__version__}, use the version that "
+            f"is pinned in requirements.txt: {error}"
+        ) from error
+    return params
+
+
+# The params of every run start from these
+DEFAULT_PARAMS = get_default_params()
+SUMMARY_COLUMNS = ["max_displacement", "max_axial_force", "max_bending_moment"]
+
+
+def merge_params(params: dict, overrides: dict) -> dict:
+    """Get a copy of the params with the overrides merged in, nested dictionaries are merged as well."""
+    merged = copy.deepcopy(params)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_params(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def expand_grid(grid: Dict[str, list], base: dict = None) -> List[dict]:
+    """Get the params of every combination of the values in the grid. The keys of the grid are the dotted paths of the
+    params, e.g. "step_design.frame.office.num_floors".
+    """
+    base = merge_params(DEFAULT_PARAMS, base or {})
+    runs = []
+    for values in itertools.product(*grid.values()):
+        params = copy.deepcopy(base)
+        for path, value in zip(grid, values):
+            *parents, name = path.split(".")
+            section = params
+            for parent in parents:
+                section = section.setdefault(parent, {})
+            section[name] = value
+        runs.append(params)
+    return runs
+
+
+def build_model(params: dict) -> Tuple[str, dict, float]:
+    """Build the model with loads of a run. Returns the hash of the model, the model dictionary and the steel mass.
+    This runs in a worker process, so the params and the returned values are plain python objects.
+    """
+    building_frame = BuildingFrame(munchify(params))
+    building_frame.add_loads()
+    model_object = building_frame.get_model_object()
+    return canonical_hash(model_object), model_object, model_mass(model_object)
+
+
+def solve(engine: str, model_object: dict) -> dict:
+    """Solve a model dictionary with the analysis engine and summarise the results."""
+    if engine == "local":
+        results = solve_model(model_object)
+    else:
+        results = json.loads(evaluate_skyciv(build_request(model_object))["results"])
+    return summarise_results(results)
+
+
+class SummaryWriter:
+    """Writes the summary of every run to a csv or parquet file as soon as it is finished. Parquet needs pyarrow, the
+    rows are written in row groups so a sweep that is stopped halfway still has most of its rows.
+    """
+
+    def __init__(self, path: Union[str, Path], columns: List[str], row_group_size: int = 64):
+        self.path = Path(path)
+        self.columns = columns
+        self.row_group_size = row_group_size
+        self.parquet = self.path.suffix == ".parquet"
+        self.rows = []
+        if self.parquet:
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError("Writing parquet files needs pyarrow, install it or write to a csv file")
+            self._pyarrow = pyarrow
+            self._writer = None
+        else:
+            self._file = open(self.path, "w", newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=columns)
+            self._writer.writeheader()
+
+    def write(self, row: dict) -> None:
+        if not self.parquet:
+            self._writer.writerow(row)
+            self._file.flush()
+            return
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self.rows:
+            return
+        table = self._pyarrow.Table.from_pylist(
+            [{column: row.get(column) for column in self.columns} for row in self.rows]
+        )
+        if self._writer is None:
+            self._writer = self._pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+        self.rows = []
+
+    def close(self) -> None:
+        if self.parquet:
+            self._flush()
+            if self._writer is not None:
+                self._writer.close()
+        else:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def run_sweep(
+    runs: List[dict],
+    output: Union[str, Path],
+    workers: int = None,
+    concurrency: int = 2,
+    columns: Dict[str, str] = None,
+) -> List[dict]:
+    """Build and solve every run, and stream a summary per run to the output file as soon as it is finished.
+
+    The models are built in a process pool. Runs that give exactly the same model are solved once. SkyCiv solves are
+    sent from a thread pool with at most `concurrency` requests at the same time; local solves run in the process pool.
+
+    :param runs: The params of every run
+    :param output: A .csv or .parquet file
+    :param workers: The number of worker processes, defaults to the number of cpus
+    :param concurrency: The maximum number of concurrent SkyCiv solves
+    :param columns: Extra columns of the output, as column name and dotted path in the params
+    """
+    columns = columns or {}
+    header = ["run", *columns, "engine", "model_hash", "nodes", "members", "mass", *SUMMARY_COLUMNS, "error"]
+    rows = [None] * len(runs)
+
+    def param(params: dict, path: str):
+        for name in path.split("."):
+            params = params[name]
+        return params
+
+    with SummaryWriter(output, header) as writer:
+
+        def finish(index: int, **values) -> None:
+            row = {"run": index, **{column: param(runs[index], path) for column, path in columns.items()}}
+            row.update(rows[index] or {})
+            row.update(values)
+            rows[index] = row
+            writer.write(row)
+
+        with ProcessPoolExecutor(workers) as processes, ThreadPoolExecutor(concurrency) as requests:
+            builds: Dict[Future, int] = {processes.submit(build_model, run): i for i, run in enumerate(runs)}
+            solves: Dict[Future, str] = {}
+            waiting: Dict[str, List[int]] = {}  # The runs that wait for the solve of a model hash
+            solved: Dict[str, dict] = {}
+            pending = set(builds)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in builds:
+                        index = builds[future]
+                        engine = get_engine(munchify(runs[index]))
+                        try:
+                            key, model_object, mass = future.result()
+                        except Exception as error:
+                            finish(index, engine=engine, error=f"{type(error).__name__}: {error}")
+                            continue
+                        rows[index] = {
+                            "engine": engine,
+                            "model_hash": key,
+                            "nodes": len(model_object["nodes"]),
+                            "members": len(model_object["members"]),
+                            "mass": mass,
+                        }
+                        key = f"{engine}-{key}"
+                        if key in solved:
+                            finish(index, **solved[key])
+                        elif key in waiting:
+                            waiting[key].append(index)  # The same model is already being solved
+                        else:
+                            waiting[key] = [index]
+                            pool = processes if engine == "local" else requests
+                            solve_future = pool.submit(solve, engine, model_object)
+                            solves[solve_future] = key
+                            pending.add(solve_future)
+                    else:
+                        key = solves[future]
+                        try:
+                            solved[key] = future.result()
+                        except Exception as error:
+                            solved[key] = {"error": f"{type(error).__name__}: {error}"}
+                        for index in waiting.pop(key):
+                            finish(index, **solved[key])
+    return rows
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.building_frame.sweep", description="Run a parametric sweep over frame configurations."
+    )
+    parser.add_argument("sweep", type=Path, help="json file with the base params and the grid")
+    parser.add_argument("--output", "-o", type=Path, default=Path("sweep.csv"), help="csv or parquet file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--concurrency", type=int, default=2, help="maximum number of concurrent SkyCiv solves")
+    args = parser.parse_args(argv)
+
+    with open(args.sweep) as f:
+        sweep = json.load(f)
+    grid = sweep.get("grid", {})
+    runs = expand_grid(grid, sweep.get("base"))
+    print(f"Running {len(runs)} runs, writing the results to {args.output}")
+    rows = run_sweep(runs, args.output, args.workers, args.concurrency, columns={path: path for path in grid})
+    failed = sum(1 for row in rows if row.get("error"))
+    print(f"Finished {len(rows) - failed} runs, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Mirror symmetry of frames, used by the local solver to solve a half or a quarter of a regular frame.
+
+A BuildingFrame is a regular grid with the same bays everywhere, so it is mirror symmetric about its mid planes in the
+length and the width. Under loads that are symmetric as well, like the self weight, snow and floor loads, the
+displacements are symmetric, and the displacements of one half or quarter of the frame determine all others. The
+solver then only solves for the degrees of freedom of that part: the stiffness matrix is projected on the symmetric
+displacements, which is the same as solving the part with the boundary conditions of the symmetry planes (no
+displacement across the plane, no rotation out of it) and half the stiffness and loads of the members in the planes.
+The solved displacements are mirrored back onto every node, so the results have every node and member of the frame.
+
+Nothing is assumed about the frame: the symmetry is checked on the nodes, the stiffness matrix, the supports and the
+load vector of every load group, so a wind load on one side only leaves out the planes it is not symmetric about.
+The symmetry is used unless the environment variable SKYCIV_LOCAL_SYMMETRY is 0.
+"""
+import os
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+
+import numpy as np
+import scipy.sparse
+
+AXIS_NAMES = "xyz"
+TOLERANCE = 1e-6  # m, the distance within which a node is the mirror image of another
+RELATIVE_TOLERANCE = 1e-9  # Of the largest stiffness or load, within which two values are equal
+
+
+class Reflection(NamedTuple):
+    """A mirror operation on the degrees of freedom: the displacement u[dof] is mirrored onto u[target[dof]] with
+    sign[dof].
+    """
+
+    target: np.ndarray  # (n,) int, the mirrored degree of freedom of every degree of freedom
+    sign: np.ndarray  # (n,) float, 1 or -1
+
+    def then(self, other: "Reflection") -> "Reflection":
+        """The reflection of this reflection followed by another one."""
+        return Reflection(other.target[self.target], self.sign * other.sign[self.target])
+
+
+class Symmetry(NamedTuple):
+    """The symmetry planes of a frame and the basis of its symmetric displacements."""
+
+    planes: List[str]  # The axes normal to the symmetry planes, e.g. ["x", "z"]
+    basis: scipy.sparse.csc_matrix  # (free dofs, reduced dofs), the free displacements are basis @ reduced displacements
+
+
+def symmetry_enabled() -> bool:
+    """Whether the local solver uses the symmetry of a frame, set with the environment variable SKYCIV_LOCAL_SYMMETRY."""
+    return os.environ.get("SKYCIV_LOCAL_SYMMETRY", "1") != "0"
+
+
+def mirror_nodes(coordinates: np.ndarray, axis: int) -> Optional[np.ndarray]:
+    """Get for every node the index of its mirror image in the mid plane of the nodes normal to the axis, or None if
+    not every node has one.
+    """
+    mirrored = coordinates.copy()
+    mirrored[:, axis] = coordinates[:, axis].min() + coordinates[:, axis].max() - coordinates[:, axis]
+    keys = np.round(np.vstack((coordinates, mirrored)) / TOLERANCE).astype(np.int64)
+    _, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    n = len(coordinates)
+    index = np.full(n * 2, -1)
+    index[inverse[:n]] = np.arange(n)
+    images = index[inverse[n:]]
+    if np.any(images < 0) or len(np.unique(inverse[:n])) < n:
+        return None
+    return images
+
+
+def reflection(images: np.ndarray, axis: int) -> Reflection:
+    """Get the reflection of the degrees of freedom of the nodes, six per node, for a mirror plane normal to the axis.
+    The displacement along the axis flips, and so do the rotations about the two other axes.
+    """
+    sign = -np.ones(6)
+    sign[:3] = 1
+    sign[axis] = -1
+    sign[3 + axis] = 1
+    target = (6 * images[:, None] + np.arange(6)).ravel()
+    return Reflection(target, np.tile(sign, len(images)))
+
+
+def _is_symmetric_vector(vector: np.ndarray, mirror: Reflection) -> bool:
+    mirrored = np.zeros_like(vector)
+    mirrored[mirror.target] = mirror.sign * vector
+    return np.allclose(mirrored, vector, rtol=0, atol=RELATIVE_TOLERANCE * max(np.abs(vector).max(), 1e-12))
+
+
+def _is_symmetric_matrix(matrix: scipy.sparse.spmatrix, mirror: Reflection) -> bool:
+    permutation = scipy.sparse.coo_matrix(
+        (mirror.sign, (mirror.target, np.arange(len(mirror.target)))), shape=matrix.shape
+    ).tocsc()
+    difference = abs(permutation @ matrix @ permutation.T - matrix)
+    return difference.max() <= RELATIVE_TOLERANCE * abs(matrix).max()
+
+
+def find_symmetry(
+    coordinates: np.ndarray, stiffness: scipy.sparse.spmatrix, free: np.ndarray, loads: Sequence[np.ndarray]
+) -> Optional[Symmetry]:
+    """Find the mirror planes of a frame that the stiffness, the supports and every load vector are symmetric about, and
+    get the basis of the symmetric displacements of the free degrees of freedom. Returns None without symmetry planes.
+
+    :param coordinates: (n, 3) The coordinates of the nodes
+    :param stiffness: The stiffness matrix of all degrees of freedom
+    :param free: The index of the free degrees of freedom
+    :param loads: The load vector of all degrees of freedom of every load group
+    """
+    fixed = np.ones(stiffness.shape[0], dtype=bool)
+    fixed[free] = False
+    planes, reflections = [], []
+    for axis, name in enumerate(AXIS_NAMES):
+        images = mirror_nodes(coordinates, axis)
+        if images is None:
+            continue
+        mirror = reflection(images, axis)
+        if (
+            np.array_equal(fixed[mirror.target], fixed)
+            and all(_is_symmetric_vector(forces, mirror) for forces in loads)
+            and _is_symmetric_matrix(stiffness, mirror)
+        ):
+            planes.append(name)
+            reflections.append(mirror)
+    if not planes:
+        return None
+    return Symmetry(planes, _symmetric_basis(reflections, len(coordinates), free))
+
+
+def _symmetric_basis(reflections: List[Reflection], num_nodes: int, free: np.ndarray) -> scipy.sparse.csc_matrix:
+    """Get the basis of the displacements that are symmetric about all reflections. Every node of the part that is
+    solved has a basis vector per degree of freedom, which is the sum of all its mirror images. The degrees of freedom
+    of a node in a plane that the plane mirrors onto their own opposite cancel out, they can not move.
+    """
+    num_dofs = 6 * num_nodes
+    group = [Reflection(np.arange(num_dofs), np.ones(num_dofs))]
+    for mirror in reflections:
+        group += [element.then(mirror) for element in group]
+
+    # The node of every orbit of mirror images with the lowest index is in the part that is solved
+    nodes = np.arange(num_nodes)
+    orbit = np.min([element.target[6 * nodes] // 6 for element in group], axis=0)
+    dofs = (6 * np.flatnonzero(orbit == nodes)[:, None] + np.arange(6)).ravel()
+
+    columns = np.arange(len(dofs))
+    rows = np.concatenate([element.target[dofs] for element in group])
+    data = np.concatenate([element.sign[dofs] for element in group])
+    basis = scipy.sparse.coo_matrix((data, (rows, np.tile(columns, len(group)))), shape=(num_dofs, len(dofs))).tocsc()
+    basis = basis[free]
+    basis.eliminate_zeros()
+    return basis[:, np.flatnonzero(np.diff(basis.indptr))]
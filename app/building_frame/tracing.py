@@ -0,0 +1,220 @@
+"""Tracing of the stages behind the views.
+
+A span measures one stage, like building the model, the snow load lookup, the request to SkyCiv or writing the page, with
+attributes such as the size of the payload and whether a cache was hit. Spans started within another span are its
+children, also in the background jobs, so the trace of a view shows where its time went.
+
+The spans are exported when they end, by the exporters listed in the environment variable SKYCIV_TRACE_EXPORTERS:
+- log: a json line per span, logged with the logger skyciv.tracing
+- otlp: the span in the OpenTelemetry json format (OTLP/JSON), appended as a line to the file SKYCIV_TRACE_FILE. The file
+  can be read by the otlpjsonfile receiver of the OpenTelemetry collector.
+
+Without exporters no spans are made, so the tracing costs next to nothing.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import secrets
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Union
+
+DEFAULT_FILE = Path(tempfile.gettempdir()) / "skyciv-traces.jsonl"
+SERVICE_NAME = "skyciv-building-frame"
+
+logger = logging.getLogger("skyciv.tracing")
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A stage that is measured, with its attributes. The ids follow OpenTelemetry: a trace id of 16 bytes shared by all
+    spans of a trace, and a span id of 8 bytes.
+    """
+
+    def __init__(self, name: str, parent: "Span" = None, attributes: Dict[str, Any] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.error: Optional[str] = None
+        self.start = time.time_ns()
+        self.end: Optional[int] = None
+
+    @property
+    def duration(self) -> float:
+        """The duration in seconds, up to now if the span has not ended."""
+        return ((self.end or time.time_ns()) - self.start) / 1e9
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_record(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start / 1e9,
+            "duration": round(self.duration, 6),
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class LogExporter:
+    """Logs every span as a line of json."""
+
+    def __init__(self, level: int = logging.INFO):
+        self.level = level
+
+    def export(self, span: Span) -> None:
+        logger.log(self.level, json.dumps(span.to_record(), default=str))
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # OTLP/JSON writes 64-bit integers as strings
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpFileExporter:
+    """Appends every span to a file as an OTLP/JSON export request, one per line."""
+
+    def __init__(self, path: Union[str, Path] = None):
+        self.path = Path(path or os.environ.get("SKYCIV_TRACE_FILE", DEFAULT_FILE))
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id or "",
+            "name": span.name,
+            "kind": 1,  # Internal
+            "startTimeUnixNano": str(span.start),
+            "endTimeUnixNano": str(span.end),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},  # Error or ok
+        }
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                    "scopeSpans": [{"scope": {"name": logger.name}, "spans": [otlp_span]}],
+                }
+            ]
+        }
+        line = json.dumps(request, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+EXPORTERS = {"log": LogExporter, "otlp": OtlpFileExporter}
+
+
+class Tracer:
+    """Makes the spans and hands every span that ends to the exporters."""
+
+    def __init__(self, exporters: List = None):
+        if exporters is None:
+            names = os.environ.get("SKYCIV_TRACE_EXPORTERS", "")
+            exporters = [EXPORTERS[name.strip().lower()]() for name in names.split(",") if name.strip()]
+        self.exporters = exporters
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """Measure the stage within the context, gives the span, or None when nothing is exported."""
+        if not self.exporters:
+            yield None
+            return
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.error = f"{type(error).__name__}: {error}"
+            raise
+        finally:
+            span.end = time.time_ns()
+            _current_span.reset(token)
+            for exporter in self.exporters:
+                try:
+                    exporter.export(span)
+                except Exception:  # A broken exporter must not break the view
+                    logger.exception("Could not export span %s", span.name)
+
+
+_tracer = None
+
+
+def get_tracer() -> Tracer:
+    """Get the tracer of this process, configured with the environment variables."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> None:
+    """Replace the tracer, e.g. with one that has other exporters."""
+    global _tracer
+    _tracer = tracer
+
+
+def span(name: str, **attributes):
+    """Measure the stage within the context in a span of the tracer of this process."""
+    return get_tracer().span(name, **attributes)
+
+
+def traced(name: str) -> Callable:
+    """Decorator that measures every call of the function in a span."""
+
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Set an attribute of the current span, if there is one."""
+    current = _current_span.get()
+    if current is not None:
+        current.set(key, value)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a hit or a miss of a cache in the current span, as the attribute cache.<cache>.hits or .misses."""
+    current = _current_span.get()
+    if current is not None:
+        key = f"cache.{cache}.{'hits' if hit else 'misses'}"
+        current.set(key, current.attributes.get(key, 0) + 1)
+
+
+def propagate(function: Callable) -> Callable:
+    """Run the function in the context of the caller, so the spans it makes in another thread are children of the
+    current span. Used for the functions that are submitted to an executor.
+    """
+    return functools.partial(contextvars.copy_context().run, function)
@@ -0,0 +1,187 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import zlib
+from typing import BinaryIO
+from typing import Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from viktor import UserException
+
+from .tracing import set_attribute
+from .tracing import span
+
+# The SkyCiv API listens on port 8085 for https, see skyciv.lib.request
+SKYCIV_API_URL = "https://api.skyciv.com:8085/v3"
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")  # A POST starts a solve, which SkyCiv bills, so it is not sent twice
+CHUNK_SIZE = 1024 * 1024  # Requests and responses that are streamed are handled in chunks of 1 MB
+SPOOL_BYTES = 16 * 1024 * 1024  # Streamed responses up to 16 MB are kept in memory, larger ones on disk
+
+
+class Transport:
+    """All the http traffic of the app goes through a transport. It uses a single requests.Session, so connections are
+    pooled and kept alive between calls, and every call has a timeout. Calls that fail before they are sent, like a
+    refused connection, are retried with a jittered exponential backoff. Other connection errors, timeouts and 5xx
+    responses are only retried for idempotent calls, as a solve could have been started already.
+
+    The defaults can be changed with environment variables, and the url of the API can be pointed at a local server. A
+    timeout of 0 means no time limit.
+    """
+
+    def __init__(
+        self,
+        api_url: str = None,
+        connect_timeout: float = None,
+        read_timeout: float = None,
+        max_retries: int = None,
+        backoff: float = 0.5,
+        max_backoff: float = 10,
+        pool_size: int = 10,
+    ):
+        self.api_url = api_url or os.environ.get("SKYCIV_API_URL", SKYCIV_API_URL)
+        if connect_timeout is None:
+            connect_timeout = float(os.environ.get("SKYCIV_CONNECT_TIMEOUT", 10))
+        if read_timeout is None:
+            read_timeout = float(os.environ.get("SKYCIV_READ_TIMEOUT", 300))  # Solves can take long
+        self.connect_timeout = connect_timeout or None  # requests takes None for no limit, 0 is an invalid timeout
+        self.read_timeout = read_timeout or None
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get("SKYCIV_MAX_RETRIES", 3))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request_api(self, api_object: Union[str, dict], key: str = None) -> dict:
+        """Send an API object to SkyCiv and return the parsed response.
+
+        :param api_object: The json made by ApiObject.to_json() or the dictionary made by ApiObject.get()
+        :param key: The request key of the API object if it is known, see send
+        """
+        with span("skyciv.http"):
+            if not isinstance(api_object, str):
+                api_object = json.dumps(api_object, separators=(",", ":"))
+            data = api_object.encode("utf-8")
+            set_attribute("request.bytes", len(data))
+            response = self.send("POST", self.api_url, key, data=data, headers={"Content-Type": "application/json"})
+            set_attribute("response.bytes", len(response.content))
+            return response.json()
+
+    def request_api_file(self, api_object: str, compress: bool = False, level: int = 1, key: str = None) -> BinaryIO:
+        """Send an API object to SkyCiv and return the response as a file, without reading it into memory at once. The
+        response is streamed to a temporary file, which can be parsed incrementally.
+
+        :param api_object: The json made by ApiObject.to_json()
+        :param compress: Send the API object gzipped, which makes the json of a large model many times smaller
+        :param level: The gzip level, the lowest is by far the fastest and still compresses json well
+        :param key: The request key of the API object if it is known, see send
+        """
+        with span("skyciv.http"):
+            headers = {"Content-Type": "application/json"}
+            if compress:
+                data = gzip_text(api_object, level)
+                headers["Content-Encoding"] = "gzip"
+            else:
+                data = api_object.encode("utf-8")
+            set_attribute("request.bytes", len(data))
+            response = self.send("POST", self.api_url, key, data=data, headers=headers, stream=True)
+            del data  # Not needed while the response is read
+            f = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):  # Unpacks a gzipped response as well
+                    f.write(chunk)
+            except BaseException:
+                f.close()
+                raise
+            finally:
+                response.close()
+            set_attribute("response.bytes", f.tell())
+            f.seek(0)
+            return f
+
+    def get(self, url: str) -> bytes:
+        """Get the content of an url, e.g. the SkyCiv renderer."""
+        with span("http.get", url=url):
+            content = self.send("GET", url).content
+            set_attribute("response.bytes", len(content))
+            return content
+
+    def send(self, method: str, url: str, key: str = None, **kwargs) -> requests.Response:
+        """Send a request, and retry it when it failed before it was sent, or on connection errors and 5xx responses when
+        the method is idempotent. The key is not sent, it is the request key of an API object (see
+        result_store.request_key) for transports that look requests up, like the cassette.
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        for attempt in range(self.max_retries + 1):
+            set_attribute("attempts", attempt + 1)
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.request(
+                    method, url, timeout=(self.connect_timeout, self.read_timeout), **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if last_attempt or not (idempotent or _not_sent(error)):
+                    raise UserException(f"Could not reach {url}: {error}") from error
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    if not response.ok:
+                        raise UserException(f"{url} responded with status {response.status_code}")
+                    return response
+                if last_attempt or not idempotent:
+                    raise UserException(f"{url} responded with status {response.status_code}")
+            time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt)))  # Full jitter
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def _not_sent(error: requests.RequestException) -> bool:
+    """Whether a call failed before the request was sent, because no connection could be made, so it can be retried
+    without doing the work twice.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None  # The MaxRetryError of urllib3
+    return isinstance(reason, NewConnectionError)
+
+
+def gzip_text(text: str, level: int = 1) -> bytes:
+    """Gzip a string as utf-8, encoded chunk by chunk so the whole text is never held in memory as bytes as well."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # 16 + max bits writes a gzip header
+    parts = [compressor.compress(text[i : i + CHUNK_SIZE].encode("utf-8")) for i in range(0, len(text), CHUNK_SIZE)]
+    parts.append(compressor.flush())
+    return b"".join(parts)
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Get the transport that is shared by all calls in this process. When the environment variable SKYCIV_CASSETTE is
+    set, it records the calls to a cassette or replays them from it, see cassette.
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            from .cassette import CassetteTransport  # The cassette transport is built on this module
+            from .cassette import cassette_mode
+
+            _transport = CassetteTransport() if cassette_mode() else Transport()
+        return _transport
+
+
+def set_transport(transport: Transport) -> None:
+    """Replace the shared transport, e.g. with one that points to a local server."""
+    global _transport
+    with _transport_lock:
+        _transport = transport
@@ -0,0 +1,64 @@
+"""Benchmark of the geometry of frames from 5 to 20 floors: the memory it takes in the stage caches and the time to export
+it to the forms the app uses.
+
+The memory compares the geometry as it used to be cached, a skyciv.Model with an object per node and member together with
+its model dictionary, against the arrays of FrameGeometry. The exports are the skyciv.Model (to_model), the model
+dictionary (model_object) and the canonical json of the requests and the page, from the dictionary as it used to be made
+and straight from the arrays (model_payload). Run it from the root of the repository:
+
+    python -m benchmarks.frame_geometry
+"""
+import time
+import tracemalloc
+
+from munch import munchify
+
+from app.building_frame.frame_generator import GEOMETRY_ATTRIBUTES
+from app.building_frame.model import BuildingFrame
+from app.building_frame.serialization import dumps
+from app.building_frame.sweep import DEFAULT_PARAMS
+from app.building_frame.sweep import merge_params
+
+FLOORS = (5, 10, 20)
+REPEAT = 3
+
+
+def measure(function):
+    """Get the best time (ms) of a function, and its result with the memory (MB) that the result holds on to."""
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    result = function()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times) * 1000, size / 1024**2, result
+
+
+def main():
+    print(f"{'floors':>6} {'members':>8} {'':>22} {'time (ms)':>10} {'memory (MB)':>12}")
+    for floors in FLOORS:
+        frame = {"office": {"length": 100, "width": 100, "num_floors": floors}, "columns": {"dist_length": 2, "dist_width": 2}}
+        building_frame = BuildingFrame(munchify(merge_params(DEFAULT_PARAMS, {"step_design": {"frame": frame}})))
+        geometry = building_frame.geometry
+
+        def model_and_dictionary():
+            model = geometry.to_model()
+            return model, {name: getattr(model, name).get() for name in GEOMETRY_ATTRIBUTES}
+
+        cases = {
+            "arrays": lambda: building_frame._build_topology(),
+            "model and dictionary": model_and_dictionary,
+            "model_object": geometry.model_object,
+            "json of model_object": lambda: dumps(geometry.model_object()),
+            "json of model_payload": lambda: dumps(geometry.model_payload()),
+        }
+        for name, function in cases.items():
+            milliseconds, size, _ = measure(function)
+            print(f"{floors:>6} {len(geometry.members):>8} {name:>22} {milliseconds:>10.0f} {size:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark of solving a large model the usual way against the large model mode, against the local SkyCiv stub.
+
+The usual way sends the model as plain json, gets the model back with all results and parses the response at once. The
+large model mode gzips the request, only fetches the results of the Results view and parses the response incrementally,
+see app/building_frame/large_model.py. The stub answers with random results of the right size, as the local solver takes
+too long on a model this large. The peak memory is measured with tracemalloc, the stub runs in a process of its own so
+it is not counted. Run it from the root of the repository, the extreme of the parametrization is --spacing 1:
+
+    python -m benchmarks.large_model --length 100 --width 100 --spacing 2 --floors 20
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Dict
+from typing import List
+
+import numpy as np
+from munch import munchify
+
+from app.building_frame import large_model
+from app.building_frame.controller import evaluate_skyciv
+from app.building_frame.model import BuildingFrame
+from app.building_frame.result_store import get_result_store
+from app.building_frame.results_payload import get_result_keys
+from app.building_frame.skyciv_functions import build_request
+from app.building_frame.solver import STATIONS
+from app.building_frame.sweep import DEFAULT_PARAMS
+from app.building_frame.sweep import merge_params
+from app.building_frame.tracing import Span
+from app.building_frame.tracing import Tracer
+from app.building_frame.tracing import set_tracer
+from app.building_frame.transport import Transport
+from app.building_frame.transport import set_transport
+
+from benchmarks.skyciv_stub import StubProcess
+
+MEMBER_RESULTS = [
+    "member_displacements",
+    "axial_force",
+    "shear_force_y",
+    "shear_force_z",
+    "torsion",
+    "bending_moment_y",
+    "bending_moment_z",
+]
+
+
+class SpanCollector:
+    """An exporter that keeps the spans, to read the sizes of the payloads."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+def random_results(model_object: dict) -> dict:
+    """Results in the s3d format for every member and support of the model, with random values."""
+    rng = np.random.default_rng(0)
+
+    def table(ids: List[str], columns: List[str]) -> Dict[str, Dict[str, float]]:
+        return {i: dict(zip(columns, row)) for i, row in zip(ids, rng.random((len(ids), len(columns))).tolist())}
+
+    members = list(model_object["members"])
+    results = {key: table(members, [str(s) for s in STATIONS]) for key in MEMBER_RESULTS}
+    results["member_lengths"] = dict(zip(members, rng.random(len(members)).tolist()))
+    supports = [str(s["node"]) for s in model_object["supports"].values()]
+    results["reactions"] = table(supports, ["Fx", "Fy", "Fz", "Mx", "My", "Mz"])
+    return results
+
+
+def solve(model_object: dict, result_keys: List[str] = None) -> None:
+    get_result_store().clear()
+    evaluate_skyciv(build_request(model_object, result_keys=result_keys))
+
+
+def measure(model_object: dict, result_keys: List[str] = None) -> Dict[str, float]:
+    """Get the time (s) and peak memory (MB) of a solve, and the size of the request and response (MB)."""
+    collector = SpanCollector()
+    set_tracer(Tracer([collector]))
+    start = time.perf_counter()
+    solve(model_object, result_keys)
+    seconds = time.perf_counter() - start
+    set_tracer(Tracer([]))
+
+    tracemalloc.start()
+    try:
+        solve(model_object, result_keys)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    http = next(span for span in collector.spans if span.name == "skyciv.http")
+    return {
+        "time": seconds,
+        "peak": peak / 1024**2,
+        "request": http.attributes["request.bytes"] / 1024**2,
+        "response": http.attributes["response.bytes"] / 1024**2,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.large_model", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--length", type=float, default=100)
+    parser.add_argument("--width", type=float, default=100)
+    parser.add_argument("--spacing", type=float, default=2)
+    parser.add_argument("--floors", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the stub waits before every answer")
+    args = parser.parse_args(argv)
+
+    office = {"length": args.length, "width": args.width, "num_floors": args.floors}
+    frame = {"office": office, "columns": {"dist_length": args.spacing, "dist_width": args.spacing}}
+    params = merge_params(DEFAULT_PARAMS, {"step_design": {"frame": frame}, "step_call": {"floor_load": True}})
+    building_frame = BuildingFrame(munchify(params))
+    building_frame.add_loads()
+    model_object = building_frame.get_model_object()
+    print(f"{len(model_object['nodes'])} nodes, {len(model_object['members'])} members")
+    if large_model.ijson is None:
+        print("ijson is not installed, the large model mode parses the response in one go")
+
+    with tempfile.TemporaryDirectory() as directory, StubProcess(args.latency) as stub:
+        os.environ.update(
+            {
+                "VIKTOR_APP_SECRET": "benchmark;stub",
+                "SKYCIV_RESULT_STORE": os.path.join(directory, "results"),
+            }
+        )
+        set_transport(Transport(api_url=stub.api_url))
+        stub.set_results(random_results(model_object))
+
+        print(f"{'':>8} {'time (s)':>10} {'peak (MB)':>10} {'request (MB)':>13} {'response (MB)':>14}")
+        for name, result_keys in (("usual", None), ("large", get_result_keys())):
+            m = measure(model_object, result_keys)
+            print(f"{name:>8} {m['time']:>10.2f} {m['peak']:>10.0f} {m['request']:>13.1f} {m['response']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark of building the html page of the Results view, the old two pass Jinja render against the streaming page,
+and the size of the results in the page with every results encoding.
+
+The results are made with the local solver for a frame of 20 floors, the renderer is replaced by a script of the same
+size as the SkyCiv renderer, so the benchmark runs offline. render_jinja_template renders the template on the VIKTOR
+platform, the baseline renders it with Jinja locally instead, so the upload of the page (twice) is not even counted.
+Needs jinja2, run it from the root of the repository:
+
+    python -m benchmarks.page_render
+"""
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+import jinja2
+from munch import munchify
+
+from viktor.core import File
+
+from app.building_frame.model import BuildingFrame
+from app.building_frame.page import JSON_SEPARATORS
+from app.building_frame.page import write_page
+from app.building_frame.results_payload import encode_results
+from app.building_frame.solver import solve_model
+from app.building_frame.sweep import DEFAULT_PARAMS
+from app.building_frame.sweep import merge_params
+
+TEMPLATE = Path(__file__).parent.parent / "app" / "lib" / "renderer.html.jinja"
+RENDERER_SIZE = 3 * 1024 * 1024  # The SkyCiv renderer is a few MB of javascript
+REPEAT = 5
+PARAMS = {
+    "step_design": {"frame": {"office": {"length": 40, "width": 30, "num_floors": 20, "add_braces": True}}},
+    "step_call": {"engine": "local", "wind_load": True, "floor_load": True},
+}
+
+
+def render_jinja_template(template, context: dict) -> File:
+    """A local stand-in for viktor.utils.render_jinja_template."""
+    return File.from_data(jinja2.Template(template.read().decode("utf-8")).render(context).encode("utf-8"))
+
+
+def two_pass_page(renderer: str, model_object: dict, results: dict) -> File:
+    """The page as it was built before: the results indented, then two renders with Jinja."""
+    results = json.dumps(results, indent=4)
+    context = {"renderer": renderer, "model": json.dumps(model_object, indent=4), "mode": "results"}
+    with open(TEMPLATE, "rb") as template:
+        page = render_jinja_template(template, {**context, "results": "{{ results }}"})
+    with page.open_binary() as f:
+        page = render_jinja_template(f, {"results": results})
+    return page
+
+
+def streaming_page(renderer: str, model_object: dict, results: dict) -> File:
+    """The page as it is built now: the results kept as compact json, written straight into the file."""
+    results = json.dumps(results, separators=JSON_SEPARATORS)
+    return write_page(TEMPLATE, {"renderer": renderer, "model": model_object, "mode": "results", "results": results})
+
+
+def measure(function, *args):
+    """Get the best time (s), the peak memory (MB) and the size of the page (MB) of a page function."""
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    page = function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = len(page.getvalue_binary())
+    return min(times), peak / 1024**2, size / 1024**2
+
+
+def main():
+    building_frame = BuildingFrame(munchify(merge_params(DEFAULT_PARAMS, PARAMS)))
+    building_frame.add_loads()
+    model_object = building_frame.get_model_object()
+    results = solve_model(model_object)
+    renderer = "<script>\n" + "x" * RENDERER_SIZE + "\n</script>"
+    print(f"{len(model_object['nodes'])} nodes, {len(model_object['members'])} members")
+
+    print(f"{'':>10} {'time (s)':>10} {'peak (MB)':>10} {'page (MB)':>10}")
+    baseline = measure(two_pass_page, renderer, model_object, results)
+    streaming = measure(streaming_page, renderer, model_object, results)
+    for name, (seconds, peak, size) in (("two pass", baseline), ("streaming", streaming)):
+        print(f"{name:>10} {seconds:>10.3f} {peak:>10.1f} {size:>10.1f}")
+    print(f"{baseline[0] / streaming[0]:.1f}x faster, {baseline[1] / streaming[1]:.1f}x less peak memory")
+
+    print(f"\n{'results':>17} {'size (kB)':>10}")
+    print(f"{'indented json':>17} {len(json.dumps(results, indent=4)) / 1024:>10.0f}")
+    print(f"{'json':>17} {len(encode_results(results, 'json')) / 1024:>10.0f}")
+    for encoding in ("float32", "uint16"):
+        for compress in (False, True):
+            name = f"{encoding}{' + gzip' if compress else ''}"
+            print(f"{name:>17} {len(encode_results(results, encoding, compress=compress)) / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
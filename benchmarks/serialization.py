@@ -0,0 +1,82 @@
+"""Benchmark of serialising and hashing the SkyCiv model of frames from 2 to 20 floors.
+
+The serialisation compares the indented json that BuildingFrame.get used to make against the canonical json of the
+standard encoder and of orjson (when 3.9 or later is installed). The hashing compares the sha256 of the whole canonical json, as
+the request key used to be made, against the streaming 128-bit hash of serialization.canonical_hash. Run it from the root
+of the repository:
+
+    python -m benchmarks.serialization
+"""
+import hashlib
+import json
+import time
+import tracemalloc
+
+from munch import munchify
+
+from app.building_frame import serialization
+from app.building_frame.model import BuildingFrame
+from app.building_frame.serialization import canonical_hash
+from app.building_frame.skyciv_functions import get_functions
+from app.building_frame.sweep import DEFAULT_PARAMS
+from app.building_frame.sweep import merge_params
+
+FLOORS = (2, 5, 10, 20)
+REPEAT = 5
+
+
+def sha256_hash(value) -> str:
+    """The hash as it was made before: sha256 of the whole canonical json."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def standard_dumps(value) -> str:
+    """The canonical json of the standard encoder, serialization.dumps without orjson."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def measure(function, *args):
+    """Get the best time (ms) and the peak memory (MB) of a function."""
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times) * 1000, peak / 1024**2
+
+
+def main():
+    functions = {
+        "indented": lambda value: json.dumps(value, indent=4),
+        "canonical": standard_dumps,
+        "sha256": sha256_hash,
+        "blake2b-128": canonical_hash,
+    }
+    if serialization.orjson is not None:
+        functions["orjson"] = serialization.dumps
+    else:
+        print("orjson 3.9 or later is not installed, only the standard encoder is measured")
+
+    print(f"{'floors':>6} {'nodes':>6} {'json (kB)':>10}" + "".join(f" {name + ' (ms)':>17}" for name in functions))
+    peaks = {}
+    for floors in FLOORS:
+        params = {"step_design": {"frame": {"office": {"num_floors": floors}}}, "step_call": {"floor_load": True}}
+        building_frame = BuildingFrame(munchify(merge_params(DEFAULT_PARAMS, params)))
+        building_frame.add_loads()
+        model_object = building_frame.get_model_object()
+        request = {"options": {}, "functions": get_functions(model_object)}  # What the request key is made of
+        size = len(standard_dumps(request)) / 1024
+        row = f"{floors:>6} {len(model_object['nodes']):>6} {size:>10.0f}"
+        for name, function in functions.items():
+            seconds, peaks[name] = measure(function, request)
+            row += f" {seconds:>17.2f}"
+        print(row)
+    print(f"\npeak memory at {FLOORS[-1]} floors (MB): " + ", ".join(f"{k} {v:.1f}" for k, v in peaks.items()))
+
+
+if __name__ == "__main__":
+    main()
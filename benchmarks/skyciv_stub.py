@@ -0,0 +1,214 @@
+"""A local stand-in for the SkyCiv API and the CDN of the renderer, so the views can be benchmarked offline.
+
+The stub answers every API object with canned data per function, after a configurable latency. The results, the snow
+load and the renderer are set by the benchmark; the model of S3D.model.get is the model that was sent, like SkyCiv does.
+Gzipped requests and the result_filter of S3D.results.get are supported, like the large model mode uses them.
+
+The stub runs in a process of its own, so its memory is not measured together with the app. Point the app at it with
+the transport and the renderer url:
+
+    with StubProcess(latency=0.1) as stub:
+        stub.set_results(results)
+        set_transport(Transport(api_url=stub.api_url))
+        os.environ["SKYCIV_RENDERER_URL"] = stub.renderer_url
+"""
+import argparse
+import gzip
+import itertools
+import json
+import socket
+import subprocess
+import sys
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Dict
+from typing import List
+
+import requests
+
+RENDERER_PATH = "/dist/skyciv-renderer.js"
+RENDERER_SIZE = 3 * 1024 * 1024  # The SkyCiv renderer is a few MB of javascript
+STARTUP_TIMEOUT = 30
+
+
+class StubServer:
+    """A SkyCiv API and renderer CDN on localhost. Besides the API it has two paths to set its canned data:
+    /stub/results for the results of S3D.results.get and /stub/responses for the data of the other functions.
+
+    :param latency: Seconds every request waits before it is answered, like the round trip to SkyCiv
+    :param solve_latency: Extra seconds for every S3D.model.solve, like the solve itself
+    """
+
+    def __init__(self, latency: float = 0, solve_latency: float = 0, port: int = 0):
+        self.latency = latency
+        self.solve_latency = solve_latency
+        self.responses: Dict[str, object] = {"standalone.loads.getLoads": {"snow_data": {"snow_load": 0.5}}}
+        self.results: Dict[str, bytes] = {}  # The json of every result key, encoded once
+        self.renderer = b"/* SkyCiv renderer stub */\n" + b"x" * RENDERER_SIZE
+        self._sessions = itertools.count(1)
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def set_results(self, results: dict) -> None:
+        self.results = {key: json.dumps(value, separators=(",", ":")).encode("utf-8") for key, value in results.items()}
+
+    def respond(self, api_object: dict) -> List[bytes]:
+        """Get the json of the response to an API object, with the canned data of every function. The json is given in
+        parts, so the results are written as they were encoded, without joining them into one string first.
+        """
+        session_id = api_object.get("auth", {}).get("session_id")
+        model = None
+        parts = []
+        data = None
+        for function in api_object.get("functions", []):
+            name, arguments = function["function"], function.get("arguments", {})
+            data = None
+            if name in ("S3D.session.start", "standalone.loads.start"):
+                session_id = f"stub-session-{next(self._sessions)}"
+                data = {"session_id": session_id}
+            elif name == "S3D.model.set":
+                model = arguments["s3d_model"]
+            elif name == "S3D.model.get":
+                data = model
+            elif name == "S3D.model.solve":
+                time.sleep(self.solve_latency)
+            elif name == "S3D.results.getAnalysisReport":
+                data = {"view_link": f"{self.url}/report/{session_id}.pdf"}
+            elif name != "S3D.results.get":
+                data = self.responses.get(name)
+            head = {"function": name, "status": 0, "msg": "Success"}
+            parts.append((b"," if parts else b"") + json.dumps(head).encode("utf-8")[:-1] + b',"data":')
+            if name == "S3D.results.get":
+                keys = arguments.get("result_filter") or list(self.results)
+                results = [f'"{key}":'.encode("utf-8") + self.results[key] for key in keys if key in self.results]
+                parts.extend([b"[{", b",".join(results), b"}]}"])
+            else:
+                parts.append(json.dumps(data).encode("utf-8") + b"}")
+        # The response has the data of the last function
+        response = {"status": 0, "msg": "Success", "data": data, "last_session_id": session_id}
+        return [b'{"response":' + json.dumps(response).encode("utf-8") + b',"functions":['] + parts + [b"]}"]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep alive, like SkyCiv, so the pooled connections of the transport are used
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                if self.path == "/stub/results":
+                    stub.set_results(json.loads(body))
+                    self._send([b"{}"], "application/json")
+                elif self.path == "/stub/responses":
+                    stub.responses.update(json.loads(body))
+                    self._send([b"{}"], "application/json")
+                else:
+                    time.sleep(stub.latency)
+                    self._send(stub.respond(json.loads(body)), "application/json")
+
+            def do_GET(self):
+                if self.path == "/stub/ready":
+                    self._send([b"{}"], "application/json")
+                    return
+                time.sleep(stub.latency)
+                if self.path != RENDERER_PATH:
+                    self.send_error(404)
+                    return
+                self._send([stub.renderer], "application/javascript")
+
+            def _send(self, parts: List[bytes], content_type: str):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(sum(len(part) for part in parts)))
+                self.end_headers()
+                for part in parts:
+                    self.wfile.write(part)
+
+            def log_message(self, format, *args):
+                pass  # Keep the output of the benchmark clean
+
+        return Handler
+
+
+class StubProcess:
+    """Runs a StubServer in a process of its own and sets its canned data over http."""
+
+    def __init__(self, latency: float = 0, solve_latency: float = 0):
+        self.latency = latency
+        self.solve_latency = solve_latency
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))  # Find a free port
+            self.port = s.getsockname()[1]
+        self._process = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}/v3"
+
+    @property
+    def renderer_url(self) -> str:
+        return f"{self.url}{RENDERER_PATH}"
+
+    def start(self) -> "StubProcess":
+        arguments = ["--port", str(self.port), "--latency", str(self.latency)]
+        arguments += ["--solve-latency", str(self.solve_latency)]
+        self._process = subprocess.Popen([sys.executable, "-m", "benchmarks.skyciv_stub", *arguments])
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                requests.get(f"{self.url}/stub/ready", timeout=1)
+                return self
+            except requests.ConnectionError:
+                if time.monotonic() > deadline or self._process.poll() is not None:
+                    self.stop()
+                    raise RuntimeError("The SkyCiv stub did not start")
+                time.sleep(0.05)
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+            self._process = None
+
+    def __enter__(self) -> "StubProcess":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def set_results(self, results: dict) -> None:
+        """Set the results of S3D.results.get, a dictionary per result key."""
+        data = gzip.compress(json.dumps(results).encode("utf-8"), compresslevel=1)
+        requests.post(f"{self.url}/stub/results", data=data, headers={"Content-Encoding": "gzip"}).raise_for_status()
+
+    def set_response(self, function: str, data) -> None:
+        """Set the data of the response of a function."""
+        requests.post(f"{self.url}/stub/responses", data=json.dumps({function: data})).raise_for_status()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.skyciv_stub", description="Run the SkyCiv stub.")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--solve-latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    StubServer(args.latency, args.solve_latency, args.port).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Benchmark of the views of SkyCivController end-to-end, against a local stand-in for the SkyCiv API and the renderer CDN.
+
+Every case is a frame from the ranges of the parametrization, from 2 floors with a column spacing of 20 m up to 20 floors
+with a spacing of 1 m. A case starts with empty caches and runs the stages of a solve one by one (building the model,
+the snow load, the loads, the request, the solve and the page), followed by the views in the order a user opens them:
+the Render view, the Results view with a cold and a warm cache and the Analysis Report view. The time of a stage is the
+best of a few runs, its peak memory is measured in a separate run with tracemalloc.
+
+The stub answers after a configurable latency, with the results of the local solver for the model of the case. Run it
+from the root of the repository, and keep the numbers to compare later runs against:
+
+    python -m benchmarks.views --latency 0.05 --output views.json
+    python -m benchmarks.views --latency 0.05 --compare views.json  # Fails when a stage got slower than the tolerance
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict
+
+from munch import munchify
+
+from app.building_frame.combinations import LOAD_CASES
+from app.building_frame.controller import SkyCivController
+from app.building_frame.controller import evaluate_skyciv
+from app.building_frame.controller import get_request
+from app.building_frame.jobs import JOBS
+from app.building_frame.model import BuildingFrame
+from app.building_frame.model import get_site_load_arguments
+from app.building_frame.renderer_assets import get_renderer_asset
+from app.building_frame.result_store import get_result_store
+from app.building_frame.sessions import SESSIONS
+from app.building_frame.site_loads import get_site_load_cache
+from app.building_frame.site_loads import get_snow_load
+from app.building_frame.solver import solve_model
+from app.building_frame.stages import GEOMETRY
+from app.building_frame.stages import LOADS
+from app.building_frame.stages import REQUESTS
+from app.building_frame.stages import TOPOLOGY
+from app.building_frame.sweep import DEFAULT_PARAMS
+from app.building_frame.sweep import merge_params
+from app.building_frame.transport import Transport
+from app.building_frame.transport import set_transport
+
+from benchmarks.skyciv_stub import StubProcess
+
+CASES = ((2, 20), (5, 10), (10, 5), (20, 2), (20, 1))  # Number of floors and column spacing (m)
+SNOW_LOAD = 0.7  # kPa, the canned answer of standalone.loads.getLoads
+REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+MIN_SLOWDOWN = 5  # ms, stages that take a few ms are too noisy to compare by their fraction alone
+
+CONTROLLER = SkyCivController()
+
+
+def case_params(floors: int, spacing: float) -> dict:
+    frame = {"office": {"num_floors": floors}, "columns": {"dist_length": spacing, "dist_width": spacing}}
+    loads = {"engine": "skyciv", "snow_load": True, "wind_load": True, "floor_load": True}
+    return merge_params(DEFAULT_PARAMS, {"step_design": {"frame": frame}, "step_call": loads})
+
+
+def view(name: str, params: dict):
+    """Call a view of the controller, like the VIKTOR platform does."""
+    return getattr(SkyCivController, name)(CONTROLLER, params=munchify(params))
+
+
+def reset() -> None:
+    """Empty every cache, so the next run starts cold. The renderer is kept, it is only downloaded once per process."""
+    get_result_store().clear()
+    get_site_load_cache().store.clear()
+    for stage in (TOPOLOGY, GEOMETRY, LOADS, REQUESTS, LOAD_CASES):
+        stage.clear()
+    SESSIONS.clear()
+    JOBS.clear()
+
+
+class Recorder:
+    """Records the time (s) of every stage, and its peak memory (MB) when tracemalloc is tracing."""
+
+    def __init__(self):
+        self.times: Dict[str, float] = {}
+        self.peaks: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            start_memory, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = time.perf_counter() - start
+            if tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                self.peaks[name] = (peak - start_memory) / 1024**2
+
+
+def run_case(params: dict, recorder: Recorder) -> None:
+    """Run the stages of a solve and then the views, both from empty caches."""
+    reset()
+    munched = munchify(params)
+    with recorder.stage("model"):
+        building_frame = BuildingFrame(munched)
+        building_frame.geometry  # The geometry is built on first use
+    with recorder.stage("snow_load"):
+        snow_load = get_snow_load(get_site_load_arguments(munched))
+    with recorder.stage("loads"):
+        building_frame.add_loads(snow_load)
+    with recorder.stage("request"):
+        request = get_request(building_frame)
+    with recorder.stage("solve"):
+        evaluation = evaluate_skyciv(request)
+    with recorder.stage("page"):
+        if evaluation["model"] is not None:  # Not sent back for a large model or a local solve
+            building_frame.set(evaluation["model"])
+        building_frame.get_html_render("results", evaluation["results"])
+
+    reset()
+    with recorder.stage("render_view"):
+        view("get_web_view", params)
+    with recorder.stage("results_view"):
+        view("get_results_view", params)
+    with recorder.stage("results_view_warm"):
+        view("get_results_view", params)
+    with recorder.stage("report_view"):
+        view("get_analysis_report", params)
+
+
+def measure_case(stub: StubProcess, floors: int, spacing: float, repeat: int) -> Dict[str, dict]:
+    """Get the best time (ms) and the peak memory (MB) of every stage of a case."""
+    params = case_params(floors, spacing)
+    building_frame = BuildingFrame(munchify(params))
+    building_frame.add_loads(SNOW_LOAD)
+    stub.set_results(solve_model(building_frame.get_model_object()))
+
+    times = {}
+    for _ in range(repeat):
+        recorder = Recorder()
+        run_case(params, recorder)
+        times = {name: min(seconds, times.get(name, seconds)) for name, seconds in recorder.times.items()}
+    recorder = Recorder()
+    tracemalloc.start()
+    try:
+        run_case(params, recorder)
+    finally:
+        tracemalloc.stop()
+    return {name: {"time": times[name] * 1000, "peak": recorder.peaks[name]} for name in times}
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> list:
+    """Get the stages that are slower than in the baseline by more than the tolerance, a fraction of the baseline time."""
+    regressions = []
+    for case, stages in results.items():
+        for name, stage in stages.items():
+            before = baseline.get(case, {}).get(name)
+            if before is None or stage["time"] - before["time"] < MIN_SLOWDOWN:
+                continue
+            if stage["time"] > before["time"] * (1 + tolerance):
+                regressions.append(f"{case} {name}: {before['time']:.1f} ms -> {stage['time']:.1f} ms")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.views", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the stub waits before every answer")
+    parser.add_argument("--solve-latency", type=float, default=0.0, help="extra seconds of every solve in the stub")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per case, the best time is kept")
+    parser.add_argument("--output", help="write the numbers to a json file")
+    parser.add_argument("--compare", help="a json file of an earlier run, fail when a stage got slower")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown, as a fraction")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory, StubProcess(args.latency, args.solve_latency) as stub:
+        os.environ.update(
+            {
+                "VIKTOR_APP_SECRET": "benchmark;stub",
+                "SKYCIV_RESULT_STORE": os.path.join(directory, "results"),
+                "SKYCIV_SITE_LOAD_CACHE": os.path.join(directory, "site-loads"),
+                "SKYCIV_RENDERER_DIRECTORY": os.path.join(directory, "renderer"),
+                "SKYCIV_RENDERER_URL": stub.renderer_url,
+                "SKYCIV_JOB_WAIT": "inf",  # The views wait for their solve instead of showing the pending page
+            }
+        )
+        os.environ.pop("SKYCIV_ANALYSIS_ENGINE", None)
+        stub.set_response("standalone.loads.getLoads", {"snow_data": {"snow_load": SNOW_LOAD}})
+        set_transport(Transport(api_url=stub.api_url))
+        get_renderer_asset().content()  # Downloaded once, before the cases, so the first case is not slower
+
+        results = {}
+        for floors, spacing in CASES:
+            case = f"{floors} floors, {spacing} m"
+            results[case] = measure_case(stub, floors, spacing, args.repeat)
+            stages = results[case]
+            print(f"\n{case}\n{'stage':>18} {'time (ms)':>10} {'peak (MB)':>10}")
+            for name, stage in stages.items():
+                print(f"{name:>18} {stage['time']:>10.1f} {stage['peak']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} stages are more than {args.tolerance:.0%} slower:\n" + "\n".join(regressions))
+            return 1
+        print(f"\nNo stage is more than {args.tolerance:.0%} slower")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""The load combinations of EN 1990 and their envelopes."""
+import numpy as np
+import pytest
+from munch import munchify
+
+from app.building_frame.combinations import combination_factors
+from app.building_frame.combinations import combine
+from app.building_frame.combinations import en1990_combinations
+from app.building_frame.combinations import envelope
+from app.building_frame.combinations import solve_envelope
+from app.building_frame.model import BuildingFrame
+from app.building_frame.solver import solve_model
+from app.building_frame.sweep import DEFAULT_PARAMS
+
+ACTIONS = ["permanent", "imposed", "wind"]
+
+
+def as_set(combinations):
+    return {tuple(sorted((action, round(factor, 12)) for action, factor in c.items())) for c in combinations}
+
+
+def test_uls_combinations_of_6_10():
+    """The permanent action unfavourable (1.35) and favourable (1.0), with every variable action leading (1.5) and the
+    others accompanying (1.5 psi_0) or left out. psi_0 is 0.7 for offices and 0.6 for wind.
+    """
+    expected = []
+    for gamma_g in (1.35, 1.0):
+        expected += [
+            {"permanent": gamma_g},
+            {"permanent": gamma_g, "imposed": 1.5},
+            {"permanent": gamma_g, "imposed": 1.5, "wind": 1.5 * 0.6},
+            {"permanent": gamma_g, "wind": 1.5},
+            {"permanent": gamma_g, "wind": 1.5, "imposed": 1.5 * 0.7},
+        ]
+    combinations = en1990_combinations(ACTIONS, "uls")
+    assert len(combinations) == len(expected)
+    assert as_set(combinations) == as_set(expected)
+
+
+def test_sls_characteristic_combinations():
+    combinations = en1990_combinations(ACTIONS + ["snow"], "sls")
+    assert {"permanent": 1.0, "snow": 1.0, "imposed": 0.7, "wind": 0.6} in combinations
+    for combination in combinations:
+        assert combination["permanent"] == 1.0
+        assert sum(factor == 1.0 for action, factor in combination.items() if action != "permanent") <= 1
+
+
+def test_without_permanent_action():
+    assert as_set(en1990_combinations(["snow"], "uls")) == as_set([{"snow": 1.5}])
+
+
+def test_envelope_is_the_extreme_of_every_combination():
+    rng = np.random.default_rng(0)
+    load_cases = ["permanent", "imposed", "wind"]
+    arrays = {
+        "axial_force": rng.normal(size=(3, 5, 11)),
+        "reactions": rng.normal(size=(3, 4, 6)),
+        "displacements": rng.normal(size=(3, 5, 11, 3)),
+    }
+    combinations = en1990_combinations(load_cases, "uls")
+    factors = combination_factors(combinations, load_cases)
+    every = [combine(arrays, row) for row in factors]
+
+    maximum, minimum = envelope(arrays, factors, "max"), envelope(arrays, factors, "min")
+    for key in ("axial_force", "reactions"):
+        assert np.allclose(maximum[key], np.max([c[key] for c in every], axis=0), rtol=0, atol=1e-12)
+        assert np.allclose(minimum[key], np.min([c[key] for c in every], axis=0), rtol=0, atol=1e-12)
+    lengths = [np.linalg.norm(c["displacements"], axis=-1) for c in every]
+    assert np.allclose(maximum["member_displacements"], np.max(lengths, axis=0), rtol=0, atol=1e-12)
+    assert "displacements" not in maximum
+
+
+def test_envelope_of_the_self_weight():
+    """With only the permanent action the envelopes of the ultimate limit state are 1.35 and 1.0 times the self weight."""
+    building_frame = BuildingFrame(munchify(DEFAULT_PARAMS))
+    building_frame.add_loads()
+    model = building_frame.get_model_object()
+    loads = solve_model(model)["axial_force"]
+    maximum = solve_envelope(model, "uls_max")["axial_force"]
+    minimum = solve_envelope(model, "uls_min")["axial_force"]
+    for member, stations in loads.items():
+        for station, value in stations.items():
+            assert maximum[member][station] == pytest.approx(max(1.35 * value, value), abs=1e-9)
+            assert minimum[member][station] == pytest.approx(min(1.35 * value, value), abs=1e-9)
@@ -0,0 +1,76 @@
+"""The solve job and the solves of the controller, offline: fake SkyCiv responses and the local analysis engine."""
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+from munch import munchify
+
+from viktor import UserException
+
+from app.building_frame import controller
+from app.building_frame import result_store
+from app.building_frame.combinations import LOAD_CASES
+from app.building_frame.model import BuildingFrame
+from app.building_frame.result_store import ResultStore
+from app.building_frame.stages import GEOMETRY
+from app.building_frame.stages import LOADS
+from app.building_frame.stages import REQUESTS
+from app.building_frame.stages import TOPOLOGY
+from app.building_frame.sweep import DEFAULT_PARAMS
+from app.building_frame.sweep import merge_params
+
+SNOW_LOOKUP = 0.5  # Seconds the fake snow load lookup takes
+
+
+@pytest.fixture(autouse=True)
+def cold_stages(tmp_path, monkeypatch):
+    """Start every test without cached stages and with an empty result store."""
+    for stage in (TOPOLOGY, GEOMETRY, LOADS, REQUESTS, LOAD_CASES):
+        stage.clear()
+    monkeypatch.setattr(result_store, "_result_store", ResultStore(tmp_path / "results"))
+    yield
+    for stage in (TOPOLOGY, GEOMETRY, LOADS, REQUESTS, LOAD_CASES):
+        stage.clear()
+
+
+def test_geometry_is_built_while_the_snow_load_is_looked_up(monkeypatch):
+    events = {}
+
+    def slow_lookup(arguments):
+        future = Future()
+
+        def resolve():
+            events["snow_load"] = time.monotonic()
+            future.set_result(0.5)
+
+        threading.Timer(SNOW_LOOKUP, resolve).start()
+        return future, False
+
+    build_topology = BuildingFrame._build_topology
+
+    def timed_build(self):
+        events["geometry"] = time.monotonic()
+        return build_topology(self)
+
+    monkeypatch.setattr(controller, "prefetch_snow_load", slow_lookup)
+    monkeypatch.setattr(BuildingFrame, "_build_topology", timed_build)
+    stages = []
+    params = merge_params(DEFAULT_PARAMS, {"step_call": {"engine": "local", "snow_load": True}})
+    start = time.monotonic()
+    controller.solve_job(munchify(params), lambda stage, detail="": stages.append(stage))
+
+    assert events["geometry"] < events["snow_load"]  # Built before the lookup finished, not after it
+    assert events["geometry"] - start < SNOW_LOOKUP / 2
+    assert stages[:3] == ["model", "snow_load", "loads"]
+
+
+def test_response_without_results_is_a_clear_error(monkeypatch):
+    response = {
+        "response": {"status": 0, "msg": "Success"},
+        "functions": [{"function": "S3D.model.get", "data": {}}],
+    }
+    monkeypatch.setattr(controller, "_send", lambda api_json, key: response)
+    with pytest.raises(UserException, match="did not send back the results"):
+        controller._solve("{}", "key")
+    assert result_store.get_result_store().get("key") is None
@@ -0,0 +1,133 @@
+"""Parity of the batched frame generator with the node-by-node loop it replaced.
+
+The loop is the one BuildingFrame used to build its skyciv.Model with, and the loads are added to that model as
+add_loads did. Every export of the geometry must give exactly the same json as the model of the loop: the same nodes,
+members, supports and loads, and the same number types, so the requests and their hashes are the same as well.
+"""
+import itertools
+
+import pytest
+import skyciv
+from munch import munchify
+
+from app.building_frame.model import FLOOR_HEIGHT
+from app.building_frame.model import SUPPORT
+from app.building_frame.model import BuildingFrame
+from app.building_frame.serialization import dumps
+from app.building_frame.sweep import DEFAULT_PARAMS
+from app.building_frame.sweep import merge_params
+
+SNOW_LOAD = 0.5
+SIZES = [
+    # length, width, dist_length, dist_width, num_floors
+    (20, 10, 7, 7, 2),
+    (20, 20, 7, 7, 3),
+    (30, 20, 4, 6, 4),
+    (50, 30, 10, 3.5, 2),
+    (35, 25, 4.5, 5, 5),
+    (60, 40, 9, 13, 3),
+]
+
+
+def build_loop_model(frame: BuildingFrame) -> skyciv.Model:
+    """Build the model of a frame node by node, like BuildingFrame did before the frame generator."""
+    model = skyciv.Model("metric")
+    current_y = 0
+    for current_floor in range(frame.num_floors + 1):
+        current_z = 0
+        for _ in range(frame.grid_num_width):
+            current_x = 0
+            for _ in range(frame.grid_num_length):
+                uid = int(model.nodes.add(current_x, current_y, current_z))
+                if uid > frame.nodes_per_plain:
+                    model.members.add(uid - frame.nodes_per_plain, uid, 1)
+                    if (uid - 1) % frame.grid_num_length > 0:
+                        model.members.add(uid, uid - 1, 2)
+                    floor_position = (uid - 1) % frame.nodes_per_plain
+                    if floor_position >= frame.grid_num_length:
+                        model.members.add(uid, uid - frame.grid_num_length, 2)
+                    if frame.add_braces:
+                        for c, n in zip(frame.corner_positions, frame.neighbours):
+                            if floor_position == c:
+                                for sn in n:
+                                    nid = sn + current_floor * frame.nodes_per_plain + 1
+                                    model.members.add(nid, uid - frame.nodes_per_plain, 3)
+                                    model.members.add(nid - frame.nodes_per_plain, uid, 3)
+                else:
+                    model.supports.add(uid, SUPPORT[0])
+                current_x += frame.grid_size_length
+            current_z += frame.grid_size_width
+        current_y += FLOOR_HEIGHT
+
+    for material in (frame.column_material, frame.beam_material, frame.brace_material):
+        model.sections.add_library_section(["European", "Steel", "EN 10210-2 SHS", material], 1)
+    model.materials.add("Structural Steel")
+    return model
+
+
+def add_loop_loads(frame: BuildingFrame, model: skyciv.Model) -> None:
+    """Add the loads to the model of the loop, like add_loads did before the frame generator."""
+    loads = frame.params.step_call
+    if loads.self_weight:
+        model.self_weight.add(y=-1, LG="SW1")
+    if loads.snow_load:
+        n1 = model.nodes.length()
+        n2 = n1 - int(frame.grid_num_length - 1)
+        n3 = n1 + 1 - frame.nodes_per_plain
+        n4 = n3 + int(frame.grid_num_length - 1)
+        model.area_loads.add(type="two_way", nodes=[n1, n2, n3, n4], mag=-SNOW_LOAD, direction="Y", LG="SNOW")
+    if loads.wind_load:
+        n1 = 1
+        n2 = frame.grid_num_length
+        n3 = n2 + frame.nodes_per_plain * frame.num_floors
+        n4 = n1 + frame.nodes_per_plain * frame.num_floors
+        elevations = ",".join(str(e) for e in range(0, frame.num_floors * FLOOR_HEIGHT + FLOOR_HEIGHT, FLOOR_HEIGHT))
+        model.area_loads.add(
+            type="column_wind_load",
+            nodes=[n1, n2, n3, n4],
+            mag=1,
+            mags="1",
+            direction="Y",
+            elevations=elevations,
+            column_direction=f"{n1},{n4}",
+            LG="WL1",
+        )
+    if loads.floor_load:
+        p = (loads.floor_pressure * -9.81) * 0.001
+        for n in range(1, frame.num_floors):
+            nodes = [fp + n * frame.nodes_per_plain + 1 for fp in frame.corner_positions]
+            model.area_loads.add(type="two_way", nodes=nodes, mag=p, direction="Y", LG=f"AL{n}")
+
+
+def make_params(size, add_braces: bool, loads: bool) -> dict:
+    length, width, dist_length, dist_width, num_floors = size
+    frame = {
+        "office": {"length": length, "width": width, "num_floors": num_floors, "add_braces": add_braces},
+        "columns": {"dist_length": dist_length, "dist_width": dist_width},
+        "materials": {"columns": "SHS100x100x5", "beams": "SHS80x80x3.6", "braces": "SHS50x50x4"},
+    }
+    step_call = {"self_weight": True, "snow_load": loads, "wind_load": loads, "floor_load": loads}
+    return merge_params(DEFAULT_PARAMS, {"step_design": {"frame": frame}, "step_call": step_call})
+
+
+@pytest.mark.parametrize("size, add_braces, loads", list(itertools.product(SIZES, (False, True), (False, True))))
+def test_frame_matches_loop(size, add_braces, loads):
+    frame = BuildingFrame(munchify(make_params(size, add_braces, loads)))
+    frame.add_loads(SNOW_LOAD)
+    loop_model = build_loop_model(frame)
+    add_loop_loads(frame, loop_model)
+    expected = dumps(loop_model.get())
+
+    assert dumps(frame.get_model_object()) == expected
+    assert dumps(frame.get_model_payload()) == expected
+    assert dumps(frame.model.get()) == expected
+
+
+def test_coordinate_types_match_loop():
+    frame = BuildingFrame(munchify(make_params(SIZES[1], False, False)))
+    expected = build_loop_model(frame).get()["nodes"]
+    nodes = frame.get_model_object()["nodes"]
+    assert nodes == expected
+    assert [type(v) for node in nodes.values() for v in node.values()] == [
+        type(v) for node in expected.values() for v in node.values()
+    ]
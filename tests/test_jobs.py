@@ -0,0 +1,56 @@
+"""The background solve jobs, with a result store in a temporary directory."""
+import threading
+import time
+
+import pytest
+
+from app.building_frame.jobs import JobManager
+from app.building_frame.result_store import ResultStore
+
+HEARTBEAT = 0.01
+SLOW_WRITE = 0.2  # Seconds a heartbeat takes to write a record
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(tmp_path / "results")
+
+
+def test_late_heartbeat_does_not_overwrite_a_finished_job(store, monkeypatch):
+    """A heartbeat that is still writing the record of a running job when the job finishes must not write it after the
+    final record of the job.
+    """
+    put = ResultStore.put
+
+    def slow_heartbeat(self, key, value):
+        if threading.current_thread().name == "solve-job-heartbeat":
+            time.sleep(SLOW_WRITE)
+        put(self, key, value)
+
+    monkeypatch.setattr(ResultStore, "put", slow_heartbeat)
+    jobs = JobManager(store, heartbeat=HEARTBEAT)
+
+    def solve(report):
+        time.sleep(5 * HEARTBEAT)  # Long enough for a heartbeat to start writing
+        store.put("evaluation", {"value": 1})
+        return "evaluation"
+
+    job = jobs.submit("job", solve)
+    assert jobs.wait(job, timeout=5).state == "done"
+    time.sleep(2 * SLOW_WRITE)  # Any heartbeat that was writing has written by now
+    assert jobs.records.get("job")["state"] == "done"
+
+
+def test_zero_timeout_and_heartbeat_are_not_replaced_by_the_environment(store, monkeypatch):
+    monkeypatch.setenv("SKYCIV_JOB_TIMEOUT", "10")
+    monkeypatch.setenv("SKYCIV_JOB_HEARTBEAT", "1")
+    jobs = JobManager(store, timeout=0, heartbeat=0)
+    assert jobs.timeout == float("inf")  # No limit
+    assert jobs.heartbeat == 0
+
+    job = jobs.submit("job", lambda report: "evaluation")
+    jobs.wait(job, timeout=5)
+    assert jobs._heartbeats is None  # Turned off
+
+    assert JobManager(store).timeout == 10
+    assert JobManager(store).heartbeat == 1
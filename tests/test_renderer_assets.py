@@ -0,0 +1,80 @@
+"""Where the renderer asset takes its copy from, and when it counts as verified, with a fake CDN."""
+import pytest
+
+from viktor import UserException
+
+from app.building_frame import renderer_assets
+from app.building_frame.renderer_assets import RendererAsset
+from app.building_frame.renderer_assets import sha256
+
+RENDERER = b"window.SKYCIV = {};"
+
+
+class FakeTransport:
+    """Answers every download with the content, or fails like a transport without network when it is None."""
+
+    def __init__(self, content: bytes = None):
+        self.content = content
+        self.calls = 0
+
+    def get(self, url: str) -> bytes:
+        self.calls += 1
+        if self.content is None:
+            raise UserException(f"Could not reach {url}")
+        return self.content
+
+
+@pytest.fixture
+def cdn(monkeypatch):
+    transport = FakeTransport(RENDERER)
+    monkeypatch.delenv("SKYCIV_RENDERER_SHA256", raising=False)
+    monkeypatch.setattr(renderer_assets, "get_transport", lambda: transport)
+    return transport
+
+
+def make_asset(tmp_path, **kwargs) -> RendererAsset:
+    return RendererAsset(version="1.0.0", directory=tmp_path / "disk", bundle=tmp_path / "bundle", url="cdn", **kwargs)
+
+
+def test_bundle_is_used_offline(tmp_path, cdn):
+    cdn.content = None
+    asset = make_asset(tmp_path, sha256=sha256(RENDERER))
+    asset.write(asset.bundle, RENDERER)
+    assert asset.content() == RENDERER
+    assert asset.verified
+    assert cdn.calls == 0
+
+
+def test_download_is_kept_on_disk(tmp_path, cdn):
+    asset = make_asset(tmp_path, sha256=sha256(RENDERER))
+    assert asset.content() == RENDERER
+    assert (asset.directory / asset.filename).read_bytes() == RENDERER
+    assert make_asset(tmp_path, sha256=sha256(RENDERER)).content() == RENDERER
+    assert cdn.calls == 1
+
+
+def test_copies_that_do_not_match_the_pin_are_skipped(tmp_path, cdn):
+    asset = make_asset(tmp_path, sha256=sha256(RENDERER))
+    asset.write(asset.bundle, b"tampered")
+    asset.write(asset.directory, b"tampered")
+    assert asset.content() == RENDERER
+    assert cdn.calls == 1
+
+
+def test_download_that_does_not_match_the_pin_fails(tmp_path, cdn):
+    cdn.content = b"tampered"
+    with pytest.raises(UserException, match="--bundle"):
+        make_asset(tmp_path, sha256=sha256(RENDERER)).content()
+
+
+def test_unpinned_renderer_is_not_verified(tmp_path, cdn):
+    asset = make_asset(tmp_path)
+    assert asset.sha256 is None
+    assert asset.content() == RENDERER
+    assert not asset.verified
+
+
+def test_no_bundle_and_no_network_explains_how_to_bundle(tmp_path, cdn):
+    cdn.content = None
+    with pytest.raises(UserException, match="renderer_assets --bundle"):
+        make_asset(tmp_path).content()
@@ -0,0 +1,117 @@
+"""The result store, in a temporary directory."""
+import os
+import threading
+
+import pytest
+
+from app.building_frame import result_store
+from app.building_frame.result_store import ResultStore
+
+ENTRY = {"value": "x" * 90}  # About 100 bytes of json
+
+
+@pytest.fixture
+def evictions(monkeypatch):
+    """Count the evictions of the stores."""
+    counted = []
+    evict = ResultStore.evict
+
+    def counting(self):
+        counted.append(self)
+        evict(self)
+
+    monkeypatch.setattr(ResultStore, "evict", counting)
+    return counted
+
+
+def age(store: ResultStore, key: str, seconds: float) -> None:
+    """Make an entry look like it was last used this many seconds ago."""
+    path = store.directory / f"{key}.json"
+    mtime = path.stat().st_mtime - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_evicted_after_a_part_of_the_budget_is_written(tmp_path, evictions):
+    store = ResultStore(tmp_path, max_bytes=32 * 1000)  # Evicted after every 1000 bytes
+    store.put("first", ENTRY)
+    assert len(evictions) == 1  # The first write evicts what earlier processes left
+    for i in range(8):
+        store.put(f"entry-{i}", ENTRY)
+    assert len(evictions) == 1
+    for i in range(8, 12):
+        store.put(f"entry-{i}", ENTRY)
+    assert len(evictions) == 2
+
+
+def test_evicted_after_the_interval(tmp_path, evictions, monkeypatch):
+    store = ResultStore(tmp_path, max_bytes=32 * 1000)
+    store.put("first", ENTRY)
+    monkeypatch.setattr(result_store, "EVICT_INTERVAL", 0)
+    store.put("second", ENTRY)
+    assert len(evictions) == 2
+
+
+def test_zero_max_bytes_is_never_evicted(tmp_path, evictions):
+    store = ResultStore(tmp_path, max_bytes=0)
+    for i in range(100):
+        store.put(f"entry-{i}", ENTRY)
+    store.evict()
+    assert len(list(tmp_path.glob("*.json"))) == 100
+
+
+def test_evict_removes_the_least_recently_used(tmp_path):
+    store = ResultStore(tmp_path, max_bytes=0)
+    for i in range(4):
+        store.put(f"entry-{i}", ENTRY)
+        age(store, f"entry-{i}", 100 - i)  # entry-0 is the oldest
+    store.get("entry-0")  # Used again
+    size = (tmp_path / "entry-0.json").stat().st_size
+    store.max_bytes = 2 * size
+    store.evict()
+    assert sorted(path.stem for path in tmp_path.glob("*.json")) == ["entry-0", "entry-3"]
+
+
+def test_put_replaces_atomically(tmp_path):
+    """Readers see the old or the new entry, never a half written one, and a failed write leaves the old entry."""
+    store = ResultStore(tmp_path, max_bytes=0)
+    small, large = {"value": "a"}, {"value": "b" * 1_000_000}
+    store.put("key", small)
+    stop = threading.Event()
+
+    def write():
+        while not stop.is_set():
+            store.put("key", large)
+            store.put("key", small)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        for _ in range(200):
+            assert store.get("key") in (small, large)
+    finally:
+        stop.set()
+        writer.join()
+
+    with pytest.raises(TypeError):
+        store.put("key", {"value": object()})
+    assert store.get("key") == small
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_namespaces_are_isolated(tmp_path):
+    store = ResultStore(tmp_path, max_bytes=32 * 1000)
+    jobs = store.namespace("jobs")
+    assert store.namespace("jobs") is jobs
+    assert jobs.max_bytes == 0
+
+    jobs.put("key", {"state": "running"})
+    assert store.get("key") is None
+    assert store.namespace("other").get("key") is None
+    store.put("key", ENTRY)
+    assert jobs.get("key") == {"state": "running"}
+
+    store.max_bytes = 1  # Evicts every entry of the store itself
+    store.evict()
+    store.clear()
+    assert store.get("key") is None
+    assert jobs.get("key") == {"state": "running"}
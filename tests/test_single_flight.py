@@ -0,0 +1,86 @@
+"""Concurrent callers of the single flight, with a threaded fake solve and a result store in a temporary directory."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.building_frame.result_store import ResultStore
+from app.building_frame.single_flight import SingleFlight
+
+CALLERS = 8
+
+
+class FakeSolve:
+    """A solve that waits until every other caller joined it, and stores its result like the solves of the controller."""
+
+    def __init__(self, flight: SingleFlight, store: ResultStore, error: Exception = None):
+        self.flight = flight
+        self.store = store
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, key: str) -> dict:
+        self.calls += 1
+        deadline = time.monotonic() + 5
+        while self.flight.stats()["joins"] < CALLERS - 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        if self.error is not None:
+            raise self.error
+        result = {"key": key, "call": self.calls}
+        self.store.put(key, result)
+        return result
+
+    def do(self, key: str) -> dict:
+        return self.flight.do(key, lambda: self(key), lookup=lambda: self.store.get(key))
+
+
+def call_concurrently(function, *args) -> list:
+    with ThreadPoolExecutor(CALLERS) as executor:
+        futures = [executor.submit(function, *args) for _ in range(CALLERS)]
+    return futures
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(tmp_path, max_bytes=0)
+
+
+def test_concurrent_callers_join_one_solve(store):
+    solve = FakeSolve(SingleFlight(), store)
+    results = [future.result() for future in call_concurrently(solve.do, "key")]
+    assert solve.calls == 1
+    assert all(result is results[0] for result in results)
+    assert solve.flight.stats() == {"hits": 0, "joins": CALLERS - 1, "misses": 1}
+
+    assert solve.do("key") == results[0]  # From the store
+    assert solve.calls == 1
+    assert solve.flight.stats()["hits"] == 1
+
+
+def test_other_keys_are_not_joined():
+    flight = SingleFlight()
+    started = threading.Barrier(2, timeout=5)
+
+    def solve(key):
+        started.wait()  # Only passes when both solves run at the same time
+        return key
+
+    with ThreadPoolExecutor(2) as executor:
+        futures = [executor.submit(flight.do, key, lambda key=key: solve(key)) for key in ("a", "b")]
+    assert [future.result() for future in futures] == ["a", "b"]
+    assert flight.stats()["misses"] == 2
+
+
+def test_error_is_raised_in_every_caller(store):
+    error = RuntimeError("SkyCiv is down")
+    solve = FakeSolve(SingleFlight(), store, error=error)
+    for future in call_concurrently(solve.do, "key"):
+        with pytest.raises(RuntimeError) as info:
+            future.result()
+        assert info.value is error
+    assert solve.calls == 1
+    assert store.get("key") is None
+
+    solve.error = None
+    assert solve.do("key")["call"] == 2  # The failed call is not kept, the next caller solves again
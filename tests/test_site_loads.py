@@ -0,0 +1,28 @@
+"""The site load cache, in a temporary directory."""
+from app.building_frame.site_loads import SiteLoadCache
+
+DELFT = {"site_data": {"lat": 52.0116, "lng": 4.3571}, "building_data": {"length": 20}}
+SYDNEY = {"site_data": {"lat": -33.8688, "lng": 151.2093}, "building_data": {"length": 20}}
+
+
+def test_zero_settings_are_not_replaced_by_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("SKYCIV_SITE_LOAD_PRECISION", "5")
+    monkeypatch.setenv("SKYCIV_SITE_LOAD_TTL", "3600")
+    monkeypatch.setenv("SKYCIV_SITE_LOAD_CACHE_MAX_BYTES", "1000")
+    cache = SiteLoadCache(tmp_path, precision=0, ttl=0, max_bytes=0)
+    assert (cache.precision, cache.ttl, cache.store.max_bytes) == (0, 0, 0)
+
+    default = SiteLoadCache(tmp_path)
+    assert (default.precision, default.ttl, default.store.max_bytes) == (5, 3600, 1000)
+
+
+def test_zero_ttl_expires_right_away(tmp_path):
+    cache = SiteLoadCache(tmp_path, ttl=0)
+    cache.put(DELFT, 0.7)
+    assert cache.get(DELFT) is None
+    assert SiteLoadCache(tmp_path, ttl=60).get(DELFT) == 0.7
+
+
+def test_zero_precision_is_one_cell_for_the_world(tmp_path):
+    assert SiteLoadCache(tmp_path, precision=0).key(DELFT) == SiteLoadCache(tmp_path, precision=0).key(SYDNEY)
+    assert SiteLoadCache(tmp_path, precision=5).key(DELFT) != SiteLoadCache(tmp_path, precision=5).key(SYDNEY)
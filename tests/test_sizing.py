@@ -0,0 +1,70 @@
+"""The floor loads bend the beams in the local solver, so the stress limit of the section sizing checks the beams."""
+import pytest
+from munch import munchify
+
+from app.building_frame.model import FLOOR_HEIGHT
+from app.building_frame.model import BuildingFrame
+from app.building_frame.sizing import _max_stress
+from app.building_frame.sizing import _with_sections
+from app.building_frame.sizing import size_sections
+from app.building_frame.solver import LocalSolver
+from app.building_frame.solver import solve_model
+from app.building_frame.sweep import DEFAULT_PARAMS
+from app.building_frame.sweep import merge_params
+
+FLOOR_PRESSURE = 300  # kg/m2, an office floor
+SPAN = 10  # m, the frame has 2 by 2 square panels
+
+
+def floor_params(**frame) -> dict:
+    grid = {
+        "office": {"length": 2 * SPAN, "width": 2 * SPAN, "num_floors": 2},
+        "columns": {"dist_length": SPAN, "dist_width": SPAN},
+    }
+    overrides = {
+        "step_design": {"frame": merge_params(grid, frame)},
+        "step_call": {"self_weight": False, "floor_load": True, "floor_pressure": FLOOR_PRESSURE},
+    }
+    return merge_params(DEFAULT_PARAMS, overrides)
+
+
+def floor_model(**frame) -> dict:
+    building_frame = BuildingFrame(munchify(floor_params(**frame)))
+    building_frame.add_loads()
+    return building_frame.get_model_object()
+
+
+def test_floor_load_bends_the_beams():
+    """Every beam of the floor carries a triangle of the square panel on each side. Whatever its end moments, the moment
+    in its middle is the moment of a simply supported beam under that load plus the mean of its end moments.
+    """
+    model = floor_model()
+    solver = LocalSolver(model)
+    results = solve_model(model)
+    pressure = FLOOR_PRESSURE * 9.81 / 1000  # kN/m2
+
+    checked = 0
+    for index, member_id in enumerate(solver.member_ids):
+        start, end = solver.coordinates[solver.member_nodes[index]]
+        if not (start[1] == end[1] == FLOOR_HEIGHT):
+            continue  # Not a beam of the loaded floor
+        across = 2 if start[0] != end[0] else 0  # The axis across the beam
+        panels = 1 if start[across] in (0, 2 * SPAN) else 2  # A beam at the facade has a panel on one side
+        peak = panels * pressure * SPAN / 2
+        simply_supported = peak * SPAN**2 / 12  # A triangular load with its peak in the middle
+        moments = results["bending_moment_z"][str(member_id)]
+        assert abs(moments["50"] - (moments["0"] + moments["100"]) / 2) == pytest.approx(simply_supported, rel=1e-9)
+        checked += 1
+    assert checked == 12
+
+
+def test_stress_limit_checks_the_beams():
+    model = floor_model(materials={"columns": "SHS300x300x8", "beams": "SHS40x40x3.2", "braces": "SHS50x50x4"})
+    assert _max_stress(model, solve_model(model))["beams"] > 235  # Far too light for a 10 m span under an office floor
+
+    sized = size_sections(munchify(floor_params()), max_stress=235)
+    assert sized["max_stress"] <= 235
+    profiles = (sized["columns"], sized["beams"], sized["braces"])
+    sized_model = _with_sections(floor_model(), profiles)
+    beam_stress = _max_stress(sized_model, solve_model(sized_model))["beams"]
+    assert 0.5 * 235 < beam_stress <= 235  # The beams are governed by the limit, not picked as the lightest profile
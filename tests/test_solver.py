@@ -0,0 +1,98 @@
+"""The local solver against closed-form results of beams and frames, in kN and m."""
+import numpy as np
+import pytest
+
+from app.building_frame.solver import GRAVITY
+from app.building_frame.solver import LocalSolver
+from app.building_frame.solver import MemberLoads
+from app.building_frame.solver import section_properties
+from app.building_frame.solver import solve_model
+
+PROFILE = "SHS100x100x5"
+E = 200000 * 1000  # kPa
+DENSITY = 7850  # kg/m3
+AREA, INERTIA, _ = section_properties(PROFILE)
+WEIGHT = DENSITY * AREA * GRAVITY / 1000  # kN/m
+FIXED = "FFFFFF"
+
+
+def make_model(nodes, members, supports, self_weight: bool = False) -> dict:
+    """A model dictionary like skyciv.Model.get() makes, with one SHS section of structural steel.
+
+    :param nodes: The x, y and z of every node, the node ids start at 1
+    :param members: The node ids of every member
+    :param supports: The node ids of the fixed supports
+    """
+    model = {
+        "nodes": {str(i): dict(zip("xyz", xyz)) for i, xyz in enumerate(nodes, start=1)},
+        "members": {
+            str(i): {"node_A": a, "node_B": b, "section_id": 1} for i, (a, b) in enumerate(members, start=1)
+        },
+        "sections": {"1": {"load_section": ["European", "Steel", "EN 10210-2 SHS", PROFILE], "material_id": 1}},
+        "materials": {"1": {"density": DENSITY, "elasticity_modulus": 200000, "poissons_ratio": 0.27}},
+        "supports": {str(i): {"node": n, "restraint_code": FIXED} for i, n in enumerate(supports, start=1)},
+        "self_weight": {},
+        "area_loads": {},
+    }
+    if self_weight:
+        model["self_weight"]["1"] = {"x": 0, "y": -1, "z": 0, "LG": "SW1"}
+    return model
+
+
+def test_cantilever_tip_load():
+    length, load = 4.0, 10.0
+    solver = LocalSolver(make_model([(0, 0, 0), (length, 0, 0)], [(1, 2)], [1]), symmetry=False)
+    forces = np.zeros(solver.num_dofs)
+    forces[6 + 1] = -load  # Down at the tip
+    displacements = solver.displacements(forces)
+    arrays = solver.result_arrays(displacements, forces, MemberLoads(1))
+
+    assert displacements[6 + 1] == pytest.approx(-load * length**3 / (3 * E * INERTIA), rel=1e-9)
+    assert displacements[6 + 5] == pytest.approx(-load * length**2 / (2 * E * INERTIA), rel=1e-9)
+    assert arrays["reactions"][0][1] == pytest.approx(load, rel=1e-9)
+    moments = arrays["bending_moment_z"][0]
+    assert abs(moments[0]) == pytest.approx(load * length, rel=1e-9)  # P L at the support
+    assert moments[-1] == pytest.approx(0, abs=1e-9)
+    assert np.allclose(np.abs(moments), load * length * (1 - np.linspace(0, 1, len(moments))), rtol=1e-9)
+
+
+def test_fixed_fixed_beam_self_weight():
+    length = 6.0
+    model = make_model([(0, 0, 0), (length / 2, 0, 0), (length, 0, 0)], [(1, 2), (2, 3)], [1, 3], self_weight=True)
+    results = solve_model(model)
+    solver = LocalSolver(model, symmetry=False)
+    forces, _ = solver.loads("SW1")
+    displacements = solver.displacements(forces)
+
+    assert displacements[6 + 1] == pytest.approx(-WEIGHT * length**4 / (384 * E * INERTIA), rel=1e-9)
+    first = results["bending_moment_z"]["1"]
+    assert abs(first["0"]) == pytest.approx(WEIGHT * length**2 / 12, rel=1e-9)  # At the support
+    assert abs(first["100"]) == pytest.approx(WEIGHT * length**2 / 24, rel=1e-9)  # In the middle
+    assert np.sign(first["0"]) == -np.sign(first["100"])
+    for reaction in results["reactions"].values():
+        assert reaction["Fy"] == pytest.approx(WEIGHT * length / 2, rel=1e-9)
+
+
+def test_portal_self_weight():
+    """A portal with fixed feet and the same section everywhere, see Kleinlogel: with k = (I_beam / L) / (I_column / h)
+    the moments are w L^2 / (12 (k + 2)) at the feet and w L^2 / (6 (k + 2)) at the knees. The formulas leave out the
+    axial strain, so they agree to a fraction of a percent.
+    """
+    span, height = 6.0, 3.0
+    nodes = [(0, 0, 0), (0, height, 0), (span, height, 0), (span, 0, 0)]
+    model = make_model(nodes, [(1, 2), (2, 3), (4, 3)], [1, 4], self_weight=True)
+    results = solve_model(model)
+
+    k = height / span
+    foot = WEIGHT * span**2 / (12 * (k + 2))
+    knee = WEIGHT * span**2 / (6 * (k + 2))
+    column, beam = results["bending_moment_z"]["1"], results["bending_moment_z"]["2"]
+    assert abs(column["0"]) == pytest.approx(foot, rel=5e-3)
+    assert abs(column["100"]) == pytest.approx(knee, rel=5e-3)
+    assert abs(beam["0"]) == pytest.approx(knee, rel=5e-3)
+    assert abs(beam["50"]) == pytest.approx(WEIGHT * span**2 / 8 - knee, rel=5e-3)
+
+    reactions = list(results["reactions"].values())
+    assert sum(r["Fy"] for r in reactions) == pytest.approx(WEIGHT * (span + 2 * height), rel=1e-9)
+    assert reactions[0]["Fx"] == pytest.approx(-reactions[1]["Fx"], rel=1e-9)
+    assert abs(reactions[0]["Fx"]) == pytest.approx(3 * foot / height, rel=5e-3)
@@ -0,0 +1,43 @@
+"""The defaults of the parametrization, read from private attributes of the pinned viktor version."""
+import re
+from pathlib import Path
+
+import pytest
+
+import viktor
+from viktor.parametrization import Field
+from viktor.parametrization import _Group
+
+from app.building_frame.parametrization import SkyCivParametrization
+from app.building_frame.sweep import DEFAULT_PARAMS
+from app.building_frame.sweep import get_default_params
+
+REQUIREMENTS = Path(__file__).parent.parent / "requirements.txt"
+
+
+def test_viktor_is_the_pinned_version():
+    """get_default_params reads private attributes of viktor, another version has to be checked before it is pinned."""
+    pinned = re.search(r"viktor==([\d.]+)", REQUIREMENTS.read_text()).group(1)
+    assert viktor.__version__ == pinned, f"viktor {viktor.__version__} is installed, {pinned} is pinned"
+
+
+def test_private_attributes_exist():
+    step = SkyCivParametrization.step_design
+    assert isinstance(step, _Group)
+    assert isinstance(step._attrs, dict)
+    fields = [value for value in step.frame.office._attrs.values() if isinstance(value, Field)]
+    assert fields
+    for field in fields:
+        assert hasattr(field, "_default"), f"{type(field).__name__} has no _default"
+
+
+def test_defaults():
+    assert DEFAULT_PARAMS["step_design"]["frame"]["office"]["num_floors"] == 3
+    assert DEFAULT_PARAMS["step_call"]["engine"] == "skyciv"
+    assert DEFAULT_PARAMS["step_call"]["self_weight"] is True
+
+
+def test_missing_private_attribute_fails_loudly():
+    group = _Group.__new__(type("Section", (_Group,), {}))  # A group without the _attrs of the pinned version
+    with pytest.raises(RuntimeError, match="pinned in requirements.txt"):
+        get_default_params(group)
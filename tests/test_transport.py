@@ -0,0 +1,84 @@
+"""Retries and timeouts of the transport, against a local http server that answers every call with a fixed status."""
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from viktor import UserException
+
+from app.building_frame.transport import Transport
+
+
+@pytest.fixture
+def server():
+    """A local server that counts the calls per method and answers them with server.status."""
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self):
+            calls.append(self.command)
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(server.status)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        do_GET = do_POST = _respond
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.status = 200
+    server.calls = calls
+    server.url = f"http://127.0.0.1:{server.server_port}/"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def closed_port_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}/"
+
+
+def test_zero_timeout_is_no_limit(server, monkeypatch):
+    monkeypatch.setenv("SKYCIV_READ_TIMEOUT", "0")
+    transport = Transport(connect_timeout=0)
+    assert (transport.connect_timeout, transport.read_timeout) == (None, None)
+    assert transport.get(server.url) == b"{}"
+
+
+def test_get_is_retried_on_5xx(server):
+    server.status = 503
+    with pytest.raises(UserException, match="503"):
+        Transport(max_retries=2, backoff=0).send("GET", server.url)
+    assert server.calls == ["GET"] * 3
+
+
+def test_post_is_not_retried_on_5xx(server):
+    server.status = 503
+    with pytest.raises(UserException, match="503"):
+        Transport(max_retries=2, backoff=0).send("POST", server.url, data=b"{}")
+    assert server.calls == ["POST"]
+
+
+def test_post_is_retried_when_not_sent(monkeypatch):
+    transport = Transport(max_retries=2, backoff=0)
+    attempts = []
+    request = transport.session.request
+
+    def count(*args, **kwargs):
+        attempts.append(1)
+        return request(*args, **kwargs)
+
+    monkeypatch.setattr(transport.session, "request", count)
+    with pytest.raises(UserException, match="Could not reach") as info:
+        transport.send("POST", closed_port_url(), data=b"{}")
+    assert len(attempts) == 3
+    assert info.value.__cause__ is not None